@@ -1,13 +1,28 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
+import sqlite3
 import time
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import calendar
-import random
+from datetime import datetime
+from dashboard_data import (DATA_DIR, SHARED_DIR, OUT_OF_CORE, DATE_RANGES, range_start, load_datasets, load_bitmap_index,
+                            load_user_analytics, load_column_stats, get_rollups, get_revenue_anomalies,
+                            get_view_cache, load_dataset_key, load_ticket_store, load_event_log,
+                            get_resource_governor, get_backup_runner, start_backup, load_entity_joins,
+                            load_ticket_breakdown,
+                            load_revenue_breakdown, load_table_view, load_sales_dimensions)
+from user_analytics import monthly_growth, active_user_summary
+from timeseries_rollups import period_over_period, rolling_series, cumulative_series
+from revenue_anomalies import anomaly_table, anomaly_markers, trend_table
+from stats_engine import describe_summaries
+from view_cache import compact_rows
+from event_log import RETENTION_PERIODS
+from backup_store import BACKUP_INTERVALS, list_snapshots, restore_snapshot
+from table_render import page_rows
+from sales_aggregates import aggregate_sales, scan_sales
+from bitmap_index import (bitmap_from_mask, bitmap_and, bitmap_filter, bitmap_isin, bitmap_count,
+                          bitmap_rows, bitmap_values, bitmap_value_counts)
+
+# Charting libraries (plotly) are imported inside dashboard(), once the
+# sidebar and the page header are on screen; see serve.py for prewarming.
 
 # Set page config
 st.set_page_config(
@@ -60,149 +75,16 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# Function to generate random sales data
-@st.cache_data
-def generate_sales_data(days=90):
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
-
-    date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-
-    # Generate product data
-    products = ['Product A', 'Product B', 'Product C', 'Product D', 'Product E']
-    regions = ['North', 'South', 'East', 'West', 'Central']
-
-    # Create random data
-    data = []
-    for date in date_range:
-        for product in products:
-            for region in regions:
-                # Create some seasonality and trends
-                base_quantity = random.randint(5, 50)
-                day_factor = 1 + 0.3 * np.sin(date.day_of_year / 30)
-
-                # Products have different popularity
-                product_factor = {
-                    'Product A': 1.5,
-                    'Product B': 0.7,
-                    'Product C': 1.2,
-                    'Product D': 0.9,
-                    'Product E': 1.1
-                }[product]
-
-                # Regions have different sales volumes
-                region_factor = {
-                    'North': 1.1,
-                    'South': 0.9,
-                    'East': 1.3,
-                    'West': 1.2,
-                    'Central': 0.8
-                }[region]
-
-                quantity = int(base_quantity * day_factor * product_factor * region_factor)
-                price = {
-                    'Product A': 50,
-                    'Product B': 75,
-                    'Product C': 100,
-                    'Product D': 120,
-                    'Product E': 200
-                }[product]
-
-                revenue = quantity * price
-
-                data.append({
-                    'date': date,
-                    'product': product,
-                    'region': region,
-                    'quantity': quantity,
-                    'price': price,
-                    'revenue': revenue
-                })
-
-    return pd.DataFrame(data)
-
-
-# Function to generate random user data
-@st.cache_data
-def generate_user_data(num_users=1000):
-    start_date = datetime.now() - timedelta(days=365)
-    end_date = datetime.now()
-
-    users = []
-    for i in range(num_users):
-        # Generate a random join date
-        join_date = start_date + timedelta(days=random.randint(0, 365))
-
-        # Generate user activity level
-        activity_level = random.choice(['High', 'Medium', 'Low'])
-
-        # Generate login count based on activity level
-        if activity_level == 'High':
-            login_count = random.randint(50, 200)
-        elif activity_level == 'Medium':
-            login_count = random.randint(15, 50)
-        else:
-            login_count = random.randint(1, 15)
-
-        # Generate subscription status
-        subscription = random.choice(['Free', 'Basic', 'Premium', 'Enterprise'])
-
-        # Generate user data
-        users.append({
-            'user_id': f'USER{i + 1000}',
-            'join_date': join_date,
-            'last_login': join_date + timedelta(days=random.randint(0, (end_date - join_date).days)),
-            'name': f'User {i + 1}',
-            'email': f'user{i + 1}@example.com',
-            'country': random.choice(
-                ['USA', 'Canada', 'UK', 'Germany', 'France', 'Australia', 'Japan', 'Brazil', 'India', 'China']),
-            'subscription': subscription,
-            'activity_level': activity_level,
-            'login_count': login_count,
-            'completed_profile': random.choice([True, False]),
-            'notifications_enabled': random.choice([True, False])
-        })
-
-    return pd.DataFrame(users)
-
-
-# Function to generate issue tickets
-@st.cache_data
-def generate_tickets(num_tickets=200):
-    start_date = datetime.now() - timedelta(days=30)
-
-    tickets = []
-    for i in range(num_tickets):
-        created_date = start_date + timedelta(days=random.randint(0, 30))
-
-        status = random.choice(['Open', 'In Progress', 'Closed', 'Resolved'])
-
-        if status in ['Closed', 'Resolved']:
-            resolved_date = created_date + timedelta(days=random.randint(1, 5))
-        else:
-            resolved_date = None
-
-        priority = random.choice(['Low', 'Medium', 'High', 'Critical'])
-
-        tickets.append({
-            'ticket_id': f'TCK-{i + 1000}',
-            'created_date': created_date,
-            'resolved_date': resolved_date,
-            'status': status,
-            'title': f'Issue {i + 1}',
-            'category': random.choice(['Bug', 'Feature Request', 'Question', 'Technical Issue', 'Billing']),
-            'priority': priority,
-            'assigned_to': f'Agent {random.randint(1, 10)}',
-            'user_id': f'USER{random.randint(1000, 2000)}'
-        })
-
-    return pd.DataFrame(tickets)
+# Function to format a period-over-period change for st.metric
+def format_change(change):
+    return f"{change:+.1f}%" if change is not None else None
 
 
-# Load data (cached)
-sales_df = generate_sales_data()
-user_df = generate_user_data()
-ticket_df = generate_tickets()
+# Function to format an event time for the activity lists ("Today, 10:30 AM")
+def format_event_time(time, now):
+    days_ago = (now.date() - time.date()).days
+    day = "Today" if days_ago == 0 else "Yesterday" if days_ago == 1 else time.strftime('%b %d')
+    return f"{day}, {time.strftime('%I:%M %p').lstrip('0')}"
 
 
 # Authentication (simple demo version)
@@ -232,6 +114,15 @@ def check_password():
 
 # Main dashboard function
 def dashboard():
+    # Session timeout, cache budgets and retention from the persisted settings
+    governor = get_resource_governor()
+    settings = governor.settings
+    if governor.touch_session():
+        st.info(f"Your session was idle for more than {settings['session_timeout_minutes']} minutes "
+                "and has been reset.")
+    # Automatic backups are taken in the background (the scheduler starts once per process)
+    get_backup_runner()
+
     # Sidebar navigation
     st.sidebar.title("Admin Dashboard")
 
@@ -247,63 +138,107 @@ def dashboard():
     st.sidebar.header("Filters")
 
     # Date range filter
-    date_option = st.sidebar.selectbox(
-        "Date Range",
-        ["Last 7 days", "Last 30 days", "Last 90 days", "All time"]
-    )
+    date_option = st.sidebar.selectbox("Date Range", list(DATE_RANGES))
 
     # Update dataframes based on date filter
-    if date_option == "Last 7 days":
-        filter_date = datetime.now() - timedelta(days=7)
-    elif date_option == "Last 30 days":
-        filter_date = datetime.now() - timedelta(days=30)
-    elif date_option == "Last 90 days":
-        filter_date = datetime.now() - timedelta(days=90)
-    else:
-        filter_date = datetime.now() - timedelta(days=365)
-
-    filtered_sales = sales_df[sales_df['date'] >= filter_date]
-    filtered_users = user_df[user_df['join_date'] >= filter_date]
-    filtered_tickets = ticket_df[ticket_df['created_date'] >= filter_date]
+    period_days = DATE_RANGES[date_option]
+    filter_date = range_start(period_days)
+
+    # Load data (partitioned sales and tickets are pruned to the selected date range)
+    (sales_df, user_df, ticket_df), data_version = load_datasets(filter_date.date())
+    user_index = load_bitmap_index('users', data_version, len(user_df), user_df)
+    ticket_index = load_bitmap_index('tickets', data_version, len(ticket_df), ticket_df)
+    rollups = get_rollups(data_version, sales_df, user_df, ticket_df)
+
+    # Ticket status changes written back by the Support Tickets page
+    data_key = load_dataset_key(data_version, user_df, ticket_df)
+    ticket_store = load_ticket_store(data_version, data_key, ticket_df, ticket_index, rollups)
+    ticket_snapshot = ticket_store.current()
+    ticket_df, ticket_index, rollups = ticket_snapshot['frame'], ticket_snapshot['index'], ticket_snapshot['rollups']
+    ticket_version = (data_version, ticket_snapshot['version'])
+    event_log = load_event_log(data_version, data_key, user_df, ticket_df)
+    user_stats = load_user_analytics(data_version, len(user_df), user_df)
+    active_summary = active_user_summary(user_stats, datetime.now())
+
+    # Date filters, memoized as bitmaps so they combine with the categorical indexes
+    view_cache = get_view_cache()
+    user_date_bitmap = view_cache.get_or_compute(
+        ('users', data_version), {'join_date_from': filter_date},
+        lambda: bitmap_from_mask(user_df['join_date'] >= filter_date))
+    ticket_date_bitmap = view_cache.get_or_compute(
+        ('tickets', *ticket_version), {'created_date_from': filter_date},
+        lambda: bitmap_from_mask(ticket_df['created_date'] >= filter_date))
+
+    if not OUT_OF_CORE:
+        sales_index = load_bitmap_index('sales', data_version, len(sales_df), sales_df)
+        sales_date_bitmap = view_cache.get_or_compute(
+            ('sales', data_version), {'date_from': filter_date},
+            lambda: bitmap_from_mask(sales_df['date'] >= filter_date))
 
     # Dashboard page
     if page == "Dashboard":
         st.title("📊 Dashboard Overview")
 
+        # Sales aggregates (streamed from the partitions in out-of-core mode)
+        if OUT_OF_CORE:
+            sales_aggs = aggregate_sales(scan_sales(DATA_DIR, filter_date))
+        else:
+            sales_aggs = aggregate_sales([sales_df.iloc[bitmap_rows(sales_index, sales_date_bitmap)]])
+
+        # Period-over-period deltas and sparklines from the daily rollups
+        now = datetime.now()
+        spark_days = min(period_days, 90)
+        _, _, revenue_change = period_over_period(rollups, 'revenue', now, period_days)
+        _, _, new_user_change = period_over_period(rollups, 'new_users', now, period_days)
+
+        # Open-ticket backlog: tickets opened minus tickets closed, as of each day
+        backlog = (cumulative_series(rollups, 'tickets_opened', now, period_days + 1)
+                   - cumulative_series(rollups, 'tickets_closed', now, period_days + 1))
+        backlog_change = ((backlog.iloc[-1] - backlog.iloc[0]) / backlog.iloc[0] * 100
+                          if backlog.iloc[0] else None)
+
         # KPI metrics in cards
         col1, col2, col3, col4 = st.columns(4)
 
         with col1:
             st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
-            st.metric("Total Revenue", f"${filtered_sales['revenue'].sum():,.2f}",
-                      f"{random.randint(5, 15)}% ↑")
+            st.metric("Total Revenue", f"${sales_aggs['total_revenue']:,.2f}",
+                      format_change(revenue_change),
+                      chart_data=rolling_series(rollups, 'revenue', 7, now, spark_days).tolist())
             st.markdown("</div>", unsafe_allow_html=True)
 
         with col2:
             st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
-            st.metric("New Users", len(filtered_users),
-                      f"{random.randint(3, 10)}% ↑")
+            st.metric("New Users", bitmap_count(user_date_bitmap),
+                      format_change(new_user_change),
+                      chart_data=rolling_series(rollups, 'new_users', 7, now, spark_days).tolist())
             st.markdown("</div>", unsafe_allow_html=True)
 
         with col3:
             st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
-            st.metric("Active Users", int(len(user_df) * 0.7),
-                      f"{random.randint(-5, 5)}% ↓")
+            # Only the latest login of each user is known, so there is no
+            # history of past MAU (no delta, no sparkline); show today's actives instead
+            st.metric("Active Users", active_summary['mau'],
+                      f"{active_summary['dau']:,} today", delta_color="off")
             st.markdown("</div>", unsafe_allow_html=True)
 
         with col4:
             st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
-            open_tickets = len(filtered_tickets[filtered_tickets['status'].isin(['Open', 'In Progress'])])
+            open_tickets = bitmap_count(bitmap_and(
+                ticket_date_bitmap, bitmap_isin(ticket_index, 'status', ['Open', 'In Progress'])))
             st.metric("Open Tickets", open_tickets,
-                      f"{random.randint(-10, 0)}% ↓")
+                      format_change(backlog_change), delta_color="inverse",
+                      chart_data=backlog.iloc[-spark_days:].tolist())
             st.markdown("</div>", unsafe_allow_html=True)
 
+        import plotly.express as px
+
         # Revenue trend chart
         st.markdown("<div class='info-box'>", unsafe_allow_html=True)
         st.subheader("Revenue Trend")
 
         # Aggregate daily revenue
-        daily_revenue = filtered_sales.groupby('date')['revenue'].sum().reset_index()
+        daily_revenue = sales_aggs['daily_revenue']
 
         # Create line chart with Plotly
         fig = px.line(
@@ -313,8 +248,35 @@ def dashboard():
             title='Daily Revenue',
             labels={'date': 'Date', 'revenue': 'Revenue ($)'}
         )
+        rolling_window = st.radio("Rolling average", [None, 7, 30, 90], horizontal=True,
+                                  format_func=lambda days: "None" if days is None else f"{days} days")
+        if rolling_window and 'revenue' in rollups['prefix']:
+            rolling_revenue = rolling_series(rollups, 'revenue', rolling_window, now, period_days) / rolling_window
+            fig.add_scatter(x=rolling_revenue.index, y=rolling_revenue.values,
+                            name=f"{rolling_window}-day average")
+
+        # Days where a product x region series left its baseline
+        revenue_anomalies = get_revenue_anomalies(data_version, sales_df)
+        anomalies = anomaly_table(revenue_anomalies, since=filter_date)
+        markers = anomaly_markers(anomalies, daily_revenue)
+        if len(markers):
+            fig.add_scatter(x=markers['date'], y=markers['revenue'], mode='markers', name='Anomalies',
+                            marker=dict(color='red', size=10, symbol='x'),
+                            hovertext=markers['label'], hoverinfo='x+text')
         fig.update_layout(height=400)
         st.plotly_chart(fig, use_container_width=True)
+
+        with st.expander(f"Revenue Anomalies ({len(anomalies)})"):
+            st.caption("Daily product x region revenue more than 3 standard deviations from its "
+                       "seasonal + EWMA baseline.")
+            st.dataframe(anomalies, use_container_width=True, hide_index=True, column_config={
+                'revenue': st.column_config.NumberColumn('revenue', format='dollar'),
+                'expected': st.column_config.NumberColumn('expected', format='dollar'),
+                'zscore': st.column_config.NumberColumn('z-score', format='%.1f')
+            })
+            st.write("**Trend by series** (fitted revenue change per day)")
+            st.dataframe(trend_table(revenue_anomalies), use_container_width=True, hide_index=True,
+                         column_config={'trend_per_day': st.column_config.NumberColumn('trend', format='dollar')})
         st.markdown("</div>", unsafe_allow_html=True)
 
         # Second row with user and sales distribution
@@ -341,7 +303,7 @@ def dashboard():
             st.markdown("<div class='info-box'>", unsafe_allow_html=True)
             st.subheader("Sales by Product")
 
-            product_sales = filtered_sales.groupby('product')['revenue'].sum().reset_index()
+            product_sales = sales_aggs['product_revenue']
 
             fig = px.bar(
                 product_sales,
@@ -361,24 +323,18 @@ def dashboard():
             st.markdown("<div class='info-box'>", unsafe_allow_html=True)
             st.subheader("Recent Activities")
 
-            # Create a sample activity log
-            activities = [
-                {"time": "Today, 10:30 AM", "description": "New user registration: John Doe"},
-                {"time": "Today, 09:15 AM", "description": "Support ticket #1245 resolved"},
-                {"time": "Yesterday, 4:20 PM", "description": "System update completed"},
-                {"time": "Yesterday, 1:30 PM", "description": "Product C price updated"},
-                {"time": "Apr 22, 11:00 AM", "description": "New feature deployed"}
-            ]
-
-            for activity in activities:
-                st.write(f"**{activity['time']}**: {activity['description']}")
+            # Newest events of the event log
+            for activity in event_log.latest(5).itertuples():
+                description = f"{activity.entity}: {activity.action}" if activity.kind == 'ticket' else activity.action
+                st.write(f"**{format_event_time(activity.time, now)}**: {description}")
             st.markdown("</div>", unsafe_allow_html=True)
 
         with col2:
             st.markdown("<div class='info-box'>", unsafe_allow_html=True)
             st.subheader("Ticket Status Distribution")
 
-            status_counts = filtered_tickets['status'].value_counts().reset_index()
+            status_counts = bitmap_value_counts(ticket_index, 'status', within=ticket_date_bitmap)
+            status_counts = status_counts[status_counts > 0].rename_axis('status').reset_index()
             status_counts.columns = ['status', 'count']
 
             # Custom colors for different statuses
@@ -404,20 +360,27 @@ def dashboard():
     # Sales Analytics page
     elif page == "Sales Analytics":
         st.title("📈 Sales Analytics")
+        import plotly.express as px
 
         # Filters specific to sales
+        if OUT_OF_CORE:
+            product_options, region_options = load_sales_dimensions(DATA_DIR)
+        else:
+            product_options = bitmap_values(sales_index, 'product')
+            region_options = bitmap_values(sales_index, 'region')
+
         col1, col2, col3 = st.columns(3)
         with col1:
             selected_product = st.multiselect(
                 "Select Products",
-                options=sales_df['product'].unique(),
-                default=sales_df['product'].unique()
+                options=product_options,
+                default=product_options
             )
         with col2:
             selected_region = st.multiselect(
                 "Select Regions",
-                options=sales_df['region'].unique(),
-                default=sales_df['region'].unique()
+                options=region_options,
+                default=region_options
             )
         with col3:
             group_by = st.selectbox(
@@ -425,30 +388,30 @@ def dashboard():
                 options=["Day", "Week", "Month"]
             )
 
-        # Filter data based on selections
-        filtered_data = filtered_sales[
-            (filtered_sales['product'].isin(selected_product)) &
-            (filtered_sales['region'].isin(selected_region))
-            ]
+        # Filter and aggregate data based on selections; sales_view keys the
+        # cached tables and breakdowns of this selection (filter_date at minute resolution)
+        sales_view = (filter_date, tuple(selected_product), tuple(selected_region))
+        if OUT_OF_CORE:
+            sales_batches = scan_sales(DATA_DIR, filter_date, selected_product, selected_region)
+        else:
+            sales_rows = view_cache.get_or_compute(
+                ('sales', data_version),
+                {'date_from': filter_date, 'product': selected_product, 'region': selected_region},
+                lambda: compact_rows(bitmap_rows(sales_index, bitmap_and(
+                    sales_date_bitmap,
+                    bitmap_isin(sales_index, 'product', selected_product),
+                    bitmap_isin(sales_index, 'region', selected_region)
+                )), len(sales_df)))
+            sales_batches = [sales_df.iloc[sales_rows]]
+        sales_aggs = aggregate_sales(sales_batches, group_by)
 
         # Grouping data based on selection
-        if group_by == "Day":
-            grouped_data = filtered_data.groupby(['date', 'product'])['revenue'].sum().reset_index()
-            time_col = 'date'
-        elif group_by == "Week":
-            filtered_data['week'] = filtered_data['date'].dt.isocalendar().week
-            filtered_data['year'] = filtered_data['date'].dt.isocalendar().year
-            filtered_data['week_label'] = filtered_data['year'].astype(str) + '-W' + filtered_data['week'].astype(str)
-            grouped_data = filtered_data.groupby(['week_label', 'product'])['revenue'].sum().reset_index()
-            time_col = 'week_label'
-        else:  # Month
-            filtered_data['month'] = filtered_data['date'].dt.strftime('%Y-%m')
-            grouped_data = filtered_data.groupby(['month', 'product'])['revenue'].sum().reset_index()
-            time_col = 'month'
+        grouped_data = sales_aggs['grouped_data']
+        time_col = sales_aggs['time_col']
 
         # Show total revenue
-        total_revenue = filtered_data['revenue'].sum()
-        avg_order = filtered_data['revenue'].mean()
+        total_revenue = sales_aggs['total_revenue']
+        avg_order = sales_aggs['avg_order']
 
         col1, col2 = st.columns(2)
         with col1:
@@ -472,6 +435,16 @@ def dashboard():
             color='product',
             labels={time_col: group_by, 'revenue': 'Revenue ($)'}
         )
+
+        # Anomalous days of the selected series, marked on their product's line
+        if group_by == "Day":
+            anomalies = anomaly_table(get_revenue_anomalies(data_version, sales_df), since=filter_date,
+                                      products=selected_product, regions=selected_region)
+            markers = anomaly_markers(anomalies, grouped_data, time_col, by=['product'])
+            if len(markers):
+                fig.add_scatter(x=markers[time_col], y=markers['revenue'], mode='markers', name='Anomalies',
+                                marker=dict(color='red', size=10, symbol='x'),
+                                hovertext=markers['label'], hoverinfo='x+text')
         st.plotly_chart(fig, use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
@@ -481,7 +454,7 @@ def dashboard():
         with col1:
             st.markdown("<div class='info-box'>", unsafe_allow_html=True)
             st.subheader("Sales by Product")
-            product_revenue = filtered_data.groupby('product')['revenue'].sum().reset_index()
+            product_revenue = sales_aggs['product_revenue']
 
             fig = px.pie(
                 product_revenue,
@@ -495,7 +468,7 @@ def dashboard():
         with col2:
             st.markdown("<div class='info-box'>", unsafe_allow_html=True)
             st.subheader("Sales by Region")
-            region_revenue = filtered_data.groupby('region')['revenue'].sum().reset_index()
+            region_revenue = sales_aggs['region_revenue']
 
             fig = px.pie(
                 region_revenue,
@@ -506,33 +479,55 @@ def dashboard():
             st.plotly_chart(fig, use_container_width=True)
             st.markdown("</div>", unsafe_allow_html=True)
 
+        # Revenue per country of the buying users (sales joined to users)
+        st.markdown("<div class='info-box'>", unsafe_allow_html=True)
+        st.subheader("Revenue by Country")
+        entity_joins = load_entity_joins(data_version, user_df, ticket_df, sales_df)
+        country_revenue = load_revenue_breakdown(data_version, 'country', sales_view, entity_joins,
+                                                 sales_df, None if OUT_OF_CORE else sales_rows)
+        if country_revenue is None:
+            st.info("The sales data has no user_id column to join users on. "
+                    "Regenerate it to see revenue by country.")
+        else:
+            fig = px.bar(
+                country_revenue.sort_values('revenue', ascending=False),
+                x='country',
+                y='revenue',
+                hover_data=['orders'],
+                labels={'country': 'Country', 'revenue': 'Revenue ($)'}
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+
         # Sales data table
         st.markdown("<div class='info-box'>", unsafe_allow_html=True)
         st.subheader("Detailed Sales Data")
 
-        # Aggregate data
-        agg_data = filtered_data.groupby(['product', 'region']).agg({
-            'quantity': 'sum',
-            'revenue': 'sum'
-        }).reset_index()
-
-        # Sort by revenue (descending)
-        agg_data = agg_data.sort_values('revenue', ascending=False)
+        # Aggregate data (sorted by revenue, descending)
+        agg_data = sales_aggs['agg_data']
+        agg_table = load_table_view('sales_agg', data_version, sales_view, agg_data)
 
-        # Format revenue column
-        agg_data['revenue'] = agg_data['revenue'].apply(lambda x: f"${x:,.2f}")
+        # Revenue stays numeric and is formatted in the browser
+        st.dataframe(agg_table, use_container_width=True, column_config={
+            'revenue': st.column_config.NumberColumn('revenue', format='dollar')
+        })
 
-        st.dataframe(agg_data, use_container_width=True)
+        if not OUT_OF_CORE:
+            with st.expander("Column Statistics"):
+                sales_stats = load_column_stats('sales', data_version, len(sales_df), sales_df)
+                st.dataframe(describe_summaries(sales_stats), use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
     # User Management page
     elif page == "User Management":
         st.title("👥 User Management")
+        import plotly.express as px
+        import plotly.graph_objects as go
 
         # User metrics
         total_users = len(user_df)
-        active_users = len(user_df[user_df['last_login'] >= (datetime.now() - timedelta(days=30))])
-        premium_users = len(user_df[user_df['subscription'].isin(['Premium', 'Enterprise'])])
+        active_users = active_summary['mau']
+        premium_users = bitmap_count(bitmap_isin(user_index, 'subscription', ['Premium', 'Enterprise']))
 
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -553,9 +548,7 @@ def dashboard():
         st.subheader("User Growth")
 
         # Group users by join date
-        user_df['join_month'] = user_df['join_date'].dt.strftime('%Y-%m')
-        monthly_users = user_df.groupby('join_month').size().reset_index(name='count')
-        monthly_users['cumulative'] = monthly_users['count'].cumsum()
+        monthly_users = monthly_growth(user_stats)
 
         # Create dual-axis chart
         fig = go.Figure()
@@ -635,52 +628,63 @@ def dashboard():
         with col2:
             subscription_filter = st.multiselect(
                 "Subscription Type",
-                options=user_df['subscription'].unique(),
+                options=bitmap_values(user_index, 'subscription'),
                 default=[]
             )
         with col3:
             activity_filter = st.multiselect(
                 "Activity Level",
-                options=user_df['activity_level'].unique(),
+                options=bitmap_values(user_index, 'activity_level'),
                 default=[]
             )
 
-        # Apply filters
-        filtered_user_data = user_df.copy()
-
-        if search_term:
-            mask = (filtered_user_data['name'].str.contains(search_term, case=False)) | \
-                   (filtered_user_data['email'].str.contains(search_term, case=False)) | \
-                   (filtered_user_data['user_id'].str.contains(search_term, case=False))
-            filtered_user_data = filtered_user_data[mask]
-
-        if subscription_filter:
-            filtered_user_data = filtered_user_data[filtered_user_data['subscription'].isin(subscription_filter)]
-
-        if activity_filter:
-            filtered_user_data = filtered_user_data[filtered_user_data['activity_level'].isin(activity_filter)]
+        # Apply filters (memoized as row positions per filter combination)
+        def filter_users():
+            search_bitmap = None
+            if search_term:
+                mask = (user_df['name'].str.contains(search_term, case=False)) | \
+                       (user_df['email'].str.contains(search_term, case=False)) | \
+                       (user_df['user_id'].str.contains(search_term, case=False))
+                search_bitmap = bitmap_from_mask(mask)
+
+            user_bitmap = bitmap_filter(user_index, {
+                'subscription': subscription_filter,
+                'activity_level': activity_filter
+            }, base=search_bitmap)
+            return compact_rows(bitmap_rows(user_index, user_bitmap), len(user_df))
+
+        user_rows = view_cache.get_or_compute(
+            ('users', data_version),
+            {'search': search_term, 'subscription': subscription_filter, 'activity_level': activity_filter},
+            filter_users)
 
         # Display paginated results
         user_page_size = 10
         user_page_number = st.number_input("Page", min_value=1, value=1)
-        start_idx = (user_page_number - 1) * user_page_size
-        end_idx = start_idx + user_page_size
 
+        # Only the visible page is converted and sent
         display_columns = ['user_id', 'name', 'email', 'subscription', 'activity_level', 'join_date', 'last_login']
-        st.dataframe(filtered_user_data[display_columns].iloc[start_idx:end_idx], use_container_width=True)
+        user_view = (search_term, tuple(subscription_filter), tuple(activity_filter), user_page_number)
+        user_page = user_df.iloc[page_rows(user_rows, user_page_number, user_page_size)][display_columns]
+        st.dataframe(load_table_view('users', data_version, user_view, user_page), use_container_width=True)
 
-        total_pages = (len(filtered_user_data) - 1) // user_page_size + 1
-        st.write(f"Showing page {user_page_number} of {total_pages} ({len(filtered_user_data)} total users)")
+        total_pages = (len(user_rows) - 1) // user_page_size + 1
+        st.write(f"Showing page {user_page_number} of {total_pages} ({len(user_rows)} total users)")
+
+        with st.expander("Column Statistics"):
+            user_stats_table = describe_summaries(load_column_stats('users', data_version, len(user_df), user_df))
+            st.dataframe(user_stats_table, use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
     # Support Tickets page
     elif page == "Support Tickets":
         st.title("🎫 Support Tickets")
+        import plotly.express as px
 
         # Ticket metrics
-        open_tickets = len(ticket_df[ticket_df['status'] == 'Open'])
-        in_progress = len(ticket_df[ticket_df['status'] == 'In Progress'])
-        resolved = len(ticket_df[ticket_df['status'] == 'Resolved'])
+        open_tickets = bitmap_count(bitmap_isin(ticket_index, 'status', ['Open']))
+        in_progress = bitmap_count(bitmap_isin(ticket_index, 'status', ['In Progress']))
+        resolved = bitmap_count(bitmap_isin(ticket_index, 'status', ['Resolved']))
 
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -774,6 +778,36 @@ def dashboard():
         st.plotly_chart(fig, use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
+        # Ticket volume and resolution time per subscription tier of the ticket's user
+        st.markdown("<div class='info-box'>", unsafe_allow_html=True)
+        st.subheader("Tickets by Subscription Tier")
+        entity_joins = load_entity_joins(data_version, user_df, ticket_df, sales_df)
+        tier_tickets = load_ticket_breakdown(ticket_version, 'subscription', entity_joins, ticket_df)
+
+        # Order tiers
+        tier_order = {'Free': 0, 'Basic': 1, 'Premium': 2, 'Enterprise': 3}
+        tier_tickets = tier_tickets.assign(order=tier_tickets['subscription'].map(tier_order)).sort_values('order')
+
+        col1, col2 = st.columns(2)
+        with col1:
+            fig = px.bar(
+                tier_tickets,
+                x='subscription',
+                y=['open', 'resolved'],
+                labels={'subscription': 'Subscription', 'value': 'Tickets', 'variable': 'Status'}
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            fig = px.bar(
+                tier_tickets,
+                x='subscription',
+                y='avg_resolution_hours',
+                labels={'subscription': 'Subscription',
+                        'avg_resolution_hours': 'Average Resolution Time (hours)'}
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+
         # Ticket table with search and filters
         st.markdown("<div class='info-box'>", unsafe_allow_html=True)
         st.subheader("Ticket Management")
@@ -785,42 +819,48 @@ def dashboard():
         with col2:
             status_filter = st.multiselect(
                 "Status",
-                options=ticket_df['status'].unique(),
+                options=bitmap_values(ticket_index, 'status'),
                 default=[]
             )
         with col3:
             priority_filter = st.multiselect(
                 "Priority",
-                options=ticket_df['priority'].unique(),
+                options=bitmap_values(ticket_index, 'priority'),
                 default=[]
             )
 
-        # Apply filters
-        filtered_ticket_data = ticket_df.copy()
-
-        if ticket_search:
-            mask = (filtered_ticket_data['ticket_id'].str.contains(ticket_search, case=False)) | \
-                   (filtered_ticket_data['title'].str.contains(ticket_search, case=False)) | \
-                   (filtered_ticket_data['user_id'].str.contains(ticket_search, case=False))
-            filtered_ticket_data = filtered_ticket_data[mask]
-
-        if status_filter:
-            filtered_ticket_data = filtered_ticket_data[filtered_ticket_data['status'].isin(status_filter)]
-
-        if priority_filter:
-            filtered_ticket_data = filtered_ticket_data[filtered_ticket_data['priority'].isin(priority_filter)]
+        # Apply filters (memoized as row positions per filter combination)
+        def filter_tickets():
+            search_bitmap = None
+            if ticket_search:
+                mask = (ticket_df['ticket_id'].str.contains(ticket_search, case=False)) | \
+                       (ticket_df['title'].str.contains(ticket_search, case=False)) | \
+                       (ticket_df['user_id'].str.contains(ticket_search, case=False))
+                search_bitmap = bitmap_from_mask(mask)
+
+            ticket_bitmap = bitmap_filter(ticket_index, {
+                'status': status_filter,
+                'priority': priority_filter
+            }, base=search_bitmap)
+            return compact_rows(bitmap_rows(ticket_index, ticket_bitmap), len(ticket_df))
+
+        ticket_rows = view_cache.get_or_compute(
+            ('tickets', *ticket_version),
+            {'search': ticket_search, 'status': status_filter, 'priority': priority_filter},
+            filter_tickets)
 
         # Display paginated results
         ticket_page_size = 10
         ticket_page_number = st.number_input("Page", min_value=1, value=1, key="ticket_page")
-        start_idx = (ticket_page_number - 1) * ticket_page_size
-        end_idx = start_idx + ticket_page_size
 
+        # Only the visible page is converted and sent
         display_columns = ['ticket_id', 'title', 'status', 'priority', 'category', 'created_date', 'assigned_to']
-        st.dataframe(filtered_ticket_data[display_columns].iloc[start_idx:end_idx], use_container_width=True)
+        ticket_view = (ticket_search, tuple(status_filter), tuple(priority_filter), ticket_page_number)
+        ticket_page = ticket_df.iloc[page_rows(ticket_rows, ticket_page_number, ticket_page_size)][display_columns]
+        st.dataframe(load_table_view('tickets', ticket_version, ticket_view, ticket_page), use_container_width=True)
 
-        total_pages = (len(filtered_ticket_data) - 1) // ticket_page_size + 1
-        st.write(f"Showing page {ticket_page_number} of {total_pages} ({len(filtered_ticket_data)} total tickets)")
+        total_pages = (len(ticket_rows) - 1) // ticket_page_size + 1
+        st.write(f"Showing page {ticket_page_number} of {total_pages} ({len(ticket_rows)} total tickets)")
 
         # Ticket detail expansion
         st.write("---")
@@ -847,22 +887,32 @@ def dashboard():
                     "This is a placeholder for the ticket description. In a real application, this would contain the details of the user's issue or request.")
 
                 st.write("### Activity Log")
-                activities = [
-                    {"time": "2 hours ago", "user": "System", "action": "Ticket priority changed from Medium to High"},
-                    {"time": "3 hours ago", "user": ticket['assigned_to'],
-                     "action": "Added comment: Working on this issue"},
-                    {"time": "1 day ago", "user": "System", "action": f"Assigned ticket to {ticket['assigned_to']}"},
-                    {"time": ticket['created_date'].strftime('%Y-%m-%d %H:%M'), "user": "System",
-                     "action": "Ticket created"}
-                ]
-
-                for activity in activities:
-                    st.write(f"**{activity['time']}** - {activity['user']}: {activity['action']}")
-
-                # Status update - demo only
-                new_status = st.selectbox("Update Status", options=["Open", "In Progress", "Resolved", "Closed"])
+                activities = event_log.scan(entity=ticket_id, kind='ticket')
+                if not (activities['action'] == "Ticket created").any():
+                    activities.loc[-1] = [ticket['created_date'], 'ticket', ticket_id, "System", "Ticket created"]
+                for activity in activities.sort_values('time', ascending=False, kind='stable').itertuples():
+                    st.write(f"**{activity.time.strftime('%Y-%m-%d %H:%M')}** - {activity.user}: {activity.action}")
+
+                # Status update, written back to the ticket store
+                status_options = ["Open", "In Progress", "Resolved", "Closed"]
+                new_status = st.selectbox("Update Status", options=status_options,
+                                          index=status_options.index(ticket['status'])
+                                          if ticket['status'] in status_options else 0)
                 if st.button("Update Ticket"):
-                    st.success(f"Ticket {ticket_id} status updated to {new_status}")
+                    if new_status == ticket['status']:
+                        st.info(f"Ticket {ticket_id} is already {new_status}")
+                    else:
+                        try:
+                            ticket_store.update_status(ticket_id, new_status).result(timeout=5)
+                        except (TimeoutError, sqlite3.Error) as e:
+                            st.error(f"Could not update ticket {ticket_id}: "
+                                     f"{'the ticket database is busy' if isinstance(e, TimeoutError) else e}. "
+                                     "Please try again.")
+                        else:
+                            st.session_state['ticket_notice'] = f"Ticket {ticket_id} status updated to {new_status}"
+                            st.rerun()
+                if 'ticket_notice' in st.session_state:
+                    st.success(st.session_state.pop('ticket_notice'))
             else:
                 st.error("Ticket not found")
         st.markdown("</div>", unsafe_allow_html=True)
@@ -880,29 +930,111 @@ def dashboard():
 
             col1, col2 = st.columns(2)
             with col1:
-                st.selectbox("Theme", ["Light", "Dark", "Auto"])
-                st.selectbox("Date Format", ["MM/DD/YYYY", "DD/MM/YYYY", "YYYY-MM-DD"])
-                st.selectbox("Time Zone", ["UTC", "Eastern Time", "Pacific Time", "Central European Time"])
+                theme_options = ["Light", "Dark", "Auto"]
+                theme = st.selectbox("Theme", theme_options, index=theme_options.index(settings['theme']))
+                date_format_options = ["MM/DD/YYYY", "DD/MM/YYYY", "YYYY-MM-DD"]
+                date_format = st.selectbox("Date Format", date_format_options,
+                                           index=date_format_options.index(settings['date_format']))
+                time_zone_options = ["UTC", "Eastern Time", "Pacific Time", "Central European Time"]
+                time_zone = st.selectbox("Time Zone", time_zone_options,
+                                         index=time_zone_options.index(settings['time_zone']))
 
             with col2:
-                st.selectbox("Default Language", ["English", "Spanish", "French", "German"])
-                st.number_input("Session Timeout (minutes)", min_value=5, max_value=120, value=30)
-                st.checkbox("Enable Analytics", value=True)
+                language_options = ["English", "Spanish", "French", "German"]
+                language = st.selectbox("Default Language", language_options,
+                                        index=language_options.index(settings['language']))
+                session_timeout = st.number_input("Session Timeout (minutes)", min_value=5, max_value=120,
+                                                  value=settings['session_timeout_minutes'])
+                enable_analytics = st.checkbox("Enable Analytics", value=settings['enable_analytics'])
 
             st.write("---")
             st.subheader("Data Management")
 
             col1, col2 = st.columns(2)
             with col1:
-                st.selectbox("Data Retention Period", ["30 days", "90 days", "1 year", "Forever"])
-                st.selectbox("Backup Schedule", ["Daily", "Weekly", "Monthly"])
+                retention_options = list(RETENTION_PERIODS)
+                retention_period = st.selectbox("Data Retention Period", retention_options,
+                                                index=retention_options.index(settings['retention_period']))
+                backup_schedule_options = list(BACKUP_INTERVALS)
+                backup_schedule = st.selectbox("Backup Schedule", backup_schedule_options,
+                                               index=backup_schedule_options.index(settings['backup_schedule']))
+                cache_budget = st.number_input("Cache Budget (MB)", min_value=64, max_value=65536,
+                                               value=settings['cache_budget_mb'], step=64)
 
             with col2:
-                st.text_input("Backup Location", "/data/backups")
-                st.checkbox("Enable Automatic Backups", value=True)
+                backup_location = st.text_input("Backup Location", settings['backup_location'])
+                automatic_backups = st.checkbox("Enable Automatic Backups", value=settings['automatic_backups'])
+                view_cache_budget = st.number_input("View Cache Budget (MB)", min_value=1, max_value=4096,
+                                                    value=settings['view_cache_mb'])
 
             if st.button("Save General Settings"):
-                st.success("Settings saved successfully!")
+                removed = governor.save({
+                    'theme': theme,
+                    'date_format': date_format,
+                    'time_zone': time_zone,
+                    'language': language,
+                    'session_timeout_minutes': int(session_timeout),
+                    'enable_analytics': enable_analytics,
+                    'retention_period': retention_period,
+                    'backup_schedule': backup_schedule,
+                    'backup_location': backup_location,
+                    'automatic_backups': automatic_backups,
+                    'cache_budget_mb': int(cache_budget),
+                    'view_cache_mb': int(view_cache_budget)
+                })
+                st.success("Settings saved successfully!"
+                           + (f" {removed:,} expired event(s) removed." if removed else ""))
+
+            st.write("---")
+            st.subheader("Backups")
+
+            backup_runner = get_backup_runner()
+            if st.button("Back Up Now"):
+                with st.spinner("Writing snapshot..."):
+                    start_backup(settings, data_key, sales_df, user_df, ticket_df, rollups)
+                    backup_runner.wait(timeout=300)
+            if backup_runner.running():
+                st.info("A backup is running in the background.")
+            elif backup_runner.error:
+                st.error(f"Last backup failed: {backup_runner.error}")
+            elif backup_runner.last:
+                backup_stats = backup_runner.last['stats']
+                st.success(f"Snapshot {backup_runner.last['id']}: {backup_stats['chunks_written']} new chunks "
+                           f"({backup_stats['bytes_written'] / 1024 ** 2:,.1f} MB), "
+                           f"{backup_stats['chunks_reused']} unchanged, in {backup_stats['seconds']:.1f}s")
+
+            snapshots = list_snapshots(settings['backup_location'])
+            if snapshots.empty:
+                st.write(f"No snapshots in {settings['backup_location']} yet.")
+            else:
+                st.dataframe(snapshots, use_container_width=True, hide_index=True)
+
+                # Restoring publishes the snapshot to the shared directory every server maps
+                if SHARED_DIR:
+                    restore_id = st.selectbox("Snapshot to Restore", snapshots['snapshot'])
+                    if st.button("Restore Snapshot"):
+                        with st.spinner("Restoring snapshot..."):
+                            version = restore_snapshot(settings['backup_location'], SHARED_DIR, restore_id)
+                        st.success(f"Snapshot {restore_id} published as version {version}; "
+                                   "servers switch to it on their next rerun.")
+
+            st.write("---")
+            st.subheader("Memory Usage")
+
+            governor_stats = governor.stats()
+            cache_stats = view_cache.stats()
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Process Memory", f"{governor_stats['rss'] / 1024 ** 2:,.0f} MB"
+                        if governor_stats['rss'] is not None else "n/a")
+            col2.metric("Cached Data", f"{governor_stats['cache_bytes'] / 1024 ** 2:,.0f} MB",
+                        f"of {governor_stats['cache_max_bytes'] / 1024 ** 2:,.0f} MB budget", delta_color="off")
+            col3.metric("Active Sessions", governor_stats['sessions'])
+            col4.metric("Cache Evictions", governor_stats['cache_evictions'] + cache_stats['evictions'])
+
+            st.dataframe(governor.memory_report(), use_container_width=True, hide_index=True,
+                         column_config={'MB': st.column_config.NumberColumn(format="%.2f")})
+            st.caption(f"View cache hit ratio: {cache_stats['hit_ratio']:.0%} - "
+                       f"expired sessions: {governor_stats['expired_sessions']}")
             st.markdown("</div>", unsafe_allow_html=True)
 
         with settings_tab2:
@@ -970,9 +1102,10 @@ def dashboard():
                 st.success("Test email sent successfully!")
             st.markdown("</div>", unsafe_allow_html=True)
 
-    def main():
-        if check_password():
-            dashboard()
+def main():
+    if check_password():
+        dashboard()
+
 
-    if __name__ == "__main__":
-        main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,127 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from stats_engine import (column_summary, merge_summaries, summarize_frame, update_frame_summaries,
+                          describe_summaries, missing_values)
+from table_render import to_arrow
+from histogram_service import BIN_RULES, histogram_edges, histogram_counts, compute_histograms, histogram_chart_data
 
 # Set page config
 st.set_page_config(page_title="Data Explorer", layout="wide")
 
+# Large-N mode settings: rows are generated in float32 chunks and only
+# aggregates (moments, histograms, density rasters) are kept, so memory and
+# render time stay flat as the data size grows
+LARGE_N_SIZES = [100_000, 1_000_000, 10_000_000, 50_000_000, 100_000_000]
+LARGE_N_CHUNK = 1_000_000
+RASTER_WIDTH, RASTER_HEIGHT = 800, 300
+SIGNAL_COLUMNS = ['sin(x)', 'cos(x)', 'sin(x)cos(x)']
+
+
+# Function to generate rows [start, stop) of the signals as float32 columns.
+# Every chunk and column has its own RNG stream, so any prefix of a chunk can
+# be regenerated on demand (e.g. for the preview) and matches the full data.
+def generate_chunk(n, noise_level, seed, start, stop):
+    x = (np.arange(start, stop, dtype=np.float64) * (10 / max(n - 1, 1))).astype(np.float32)
+    noise = [np.random.default_rng([seed, start, i]).normal(0, noise_level, stop - start).astype(np.float32)
+             for i in range(3)]
+    return {
+        'x': x,
+        'sin(x)': np.sin(x) + noise[0],
+        'cos(x)': np.cos(x) + noise[1],
+        'sin(x)cos(x)': np.sin(x) * np.cos(x) + noise[2]
+    }
+
+
+def iter_chunks(n, noise_level, seed):
+    for start in range(0, n, LARGE_N_CHUNK):
+        yield generate_chunk(n, noise_level, seed, start, min(start + LARGE_N_CHUNK, n))
+
+
+# Function to compute describe()-style statistics, histograms and density rasters
+# for a large dataset in two streaming passes over the chunks
+@st.cache_data(max_entries=4)
+def summarize_large_data(n, noise_level, seed):
+    columns = ['x'] + SIGNAL_COLUMNS
+
+    # Pass 1: mergeable column summaries (moments, min/max, quantile sketch)
+    summaries = None
+    for chunk in iter_chunks(n, noise_level, seed):
+        chunk_summaries = {col: column_summary(chunk[col]) for col in columns}
+        summaries = chunk_summaries if summaries is None else {
+            col: merge_summaries(summaries[col], chunk_summaries[col]) for col in columns
+        }
+
+    x_low, x_high = summaries['x']['min'], summaries['x']['max']
+    y_low = min(summaries[col]['min'] for col in SIGNAL_COLUMNS)
+    y_high = max(summaries[col]['max'] for col in SIGNAL_COLUMNS)
+
+    # Pass 2: density rasters on a grid fixed by pass 1
+    rasters = {col: np.zeros((RASTER_WIDTH, RASTER_HEIGHT), dtype=np.int64) for col in SIGNAL_COLUMNS}
+    line_sums = {col: np.zeros(RASTER_WIDTH) for col in SIGNAL_COLUMNS}
+    x_span = max(x_high - x_low, 1e-12)
+    y_span = max(y_high - y_low, 1e-12)
+
+    for chunk in iter_chunks(n, noise_level, seed):
+        x_bins = np.clip(((chunk['x'] - x_low) / x_span * RASTER_WIDTH).astype(np.int64), 0, RASTER_WIDTH - 1)
+        for col in SIGNAL_COLUMNS:
+            y_bins = np.clip(((chunk[col] - y_low) / y_span * RASTER_HEIGHT).astype(np.int64),
+                             0, RASTER_HEIGHT - 1)
+            rasters[col] += np.bincount(x_bins * RASTER_HEIGHT + y_bins,
+                                        minlength=RASTER_WIDTH * RASTER_HEIGHT).reshape(RASTER_WIDTH, RASTER_HEIGHT)
+            line_sums[col] += np.bincount(x_bins, weights=chunk[col], minlength=RASTER_WIDTH)
+
+    # Mean value per pixel column, for the lightweight interactive line chart
+    x_counts = rasters[SIGNAL_COLUMNS[0]].sum(axis=1)
+    x_centers = x_low + (np.arange(RASTER_WIDTH) + 0.5) * x_span / RASTER_WIDTH
+    line_data = pd.DataFrame({col: line_sums[col] / np.maximum(x_counts, 1) for col in SIGNAL_COLUMNS},
+                             index=pd.Index(x_centers, name='x'))[x_counts > 0]
+
+    return {
+        'summaries': summaries,
+        'stats': describe_summaries(summaries),
+        'missing': missing_values(summaries),
+        'extent': [x_low, x_high, y_low, y_high],
+        'rasters': rasters,
+        'line_data': line_data
+    }
+
+
+# Function to compute the histograms of a large dataset for one bin rule,
+# streaming the chunks once for all signal columns
+@st.cache_data(max_entries=8)
+def large_histograms(n, noise_level, seed, rule):
+    summaries = summarize_large_data(n, noise_level, seed)['summaries']
+    edges = histogram_edges(summaries, SIGNAL_COLUMNS, rule)
+    counts = {col: np.zeros(len(edges[col]) - 1, dtype=np.int64) for col in SIGNAL_COLUMNS}
+    for chunk in iter_chunks(n, noise_level, seed):
+        chunk_counts = histogram_counts(chunk, edges)
+        for col in SIGNAL_COLUMNS:
+            counts[col] += chunk_counts[col]
+    return {col: (counts[col], edges[col]) for col in SIGNAL_COLUMNS}
+
+
+# Function to get histograms for the current in-memory dataset, cached in the
+# session per (dataset version, columns, bin rule)
+def session_histograms(columns, rule):
+    version = st.session_state.data_version
+    cache = {key: value for key, value in st.session_state.get('histogram_cache', {}).items()
+             if key[0] == version}
+    key = (version, tuple(columns), rule)
+    if key not in cache:
+        cache[key] = compute_histograms(st.session_state.data, st.session_state.stats, columns, rule)
+    st.session_state.histogram_cache = cache
+    return cache[key]
+
+
+# Function to get the Arrow preview table, rebuilt only when the dataset changes
+def preview_table(version):
+    if st.session_state.get('preview_version') != version:
+        st.session_state.preview_table = to_arrow(st.session_state.data.head(10))
+        st.session_state.preview_version = version
+    return st.session_state.preview_table
+
+
 # Main title
 st.title("📊 Interactive Data Explorer")
 
@@ -14,7 +130,12 @@ with st.sidebar:
     st.header("Data Settings")
 
     # Data generation options
-    data_size = st.slider("Data Size", 10, 1000, 100)
+    large_n = st.checkbox("Large-N mode", value=False)
+    if large_n:
+        data_size = st.select_slider("Data Size", options=LARGE_N_SIZES, value=LARGE_N_SIZES[1],
+                                     format_func=lambda n: f"{n:,}")
+    else:
+        data_size = st.slider("Data Size", 10, 1000, 100)
     noise_level = st.slider("Noise Level", 0.0, 2.0, 0.5)
 
     # Chart options
@@ -22,6 +143,10 @@ with st.sidebar:
         "Select Chart Type",
         ["Line", "Bar", "Scatter", "Histogram"]
     )
+    if chart_type == "Histogram":
+        bin_rule = st.selectbox("Histogram Bins", BIN_RULES)
+    else:
+        bin_rule = BIN_RULES[0]
 
     # Color options
     color_theme = st.selectbox(
@@ -31,9 +156,20 @@ with st.sidebar:
 
     # Generate data button
     generate_btn = st.button("Generate New Data")
+    append_btn = st.button("Append Data", disabled=large_n)
 
 # Initialize session state
-if 'data' not in st.session_state or generate_btn:
+if large_n:
+    # Large-N data is never materialized: keep a seed and the first rows only
+    if 'large_seed' not in st.session_state or generate_btn:
+        st.session_state.large_seed = int(np.random.default_rng().integers(2 ** 31))
+    summary = summarize_large_data(data_size, noise_level, st.session_state.large_seed)
+    preview = generate_chunk(data_size, noise_level, st.session_state.large_seed, 0, min(30, data_size))
+    st.session_state.data = pd.DataFrame(preview)
+    st.session_state.large_preview = True
+elif 'data' not in st.session_state or generate_btn or st.session_state.get('large_preview'):
+    st.session_state.large_preview = False
+
     # Generate random data
     x = np.linspace(0, 10, data_size)
     y1 = np.sin(x) + np.random.normal(0, noise_level, data_size)
@@ -46,22 +182,48 @@ if 'data' not in st.session_state or generate_btn:
         'cos(x)': y2,
         'sin(x)cos(x)': y3
     })
+    st.session_state.data_version = st.session_state.get('data_version', 0) + 1
+    st.session_state.stats = summarize_frame(st.session_state.data)
+elif append_btn:
+    # Append another batch, continuing x, and fold it into the cached statistics
+    step = 10 / max(data_size - 1, 1)
+    x = st.session_state.data['x'].iloc[-1] + step * np.arange(1, data_size + 1)
+    new_rows = pd.DataFrame({
+        'x': x,
+        'sin(x)': np.sin(x) + np.random.normal(0, noise_level, data_size),
+        'cos(x)': np.cos(x) + np.random.normal(0, noise_level, data_size),
+        'sin(x)cos(x)': np.sin(x) * np.cos(x) + np.random.normal(0, noise_level, data_size)
+    })
+
+    st.session_state.data = pd.concat([st.session_state.data, new_rows], ignore_index=True)
+    st.session_state.data_version += 1
+    st.session_state.stats = update_frame_summaries(st.session_state.stats, new_rows)
 
 # Display the data
 st.subheader("Data Preview")
-st.dataframe(st.session_state.data.head(10))
+if large_n:
+    data_key = ('large', data_size, noise_level, st.session_state.large_seed)
+else:
+    data_key = st.session_state.data_version
+st.dataframe(preview_table(data_key))
 
 # Data statistics
 st.subheader("Data Statistics")
 col1, col2 = st.columns(2)
 with col1:
     st.write("Summary Statistics")
-    st.write(st.session_state.data.describe())
+    if large_n:
+        st.write(summary['stats'])
+    else:
+        st.write(describe_summaries(st.session_state.stats))
 with col2:
     st.write("Data Information")
-    buffer = st.session_state.data.info()
-    st.text(f"Data Shape: {st.session_state.data.shape}")
-    st.text(f"Missing Values: {st.session_state.data.isnull().sum().sum()}")
+    if large_n:
+        st.text(f"Data Shape: {(data_size, len(st.session_state.data.columns))}")
+        st.text(f"Missing Values: {summary['missing']}")
+    else:
+        st.text(f"Data Shape: {st.session_state.data.shape}")
+        st.text(f"Missing Values: {missing_values(st.session_state.stats)}")
 
 # Visualization
 st.header("Data Visualization")
@@ -75,11 +237,22 @@ selected_columns = st.multiselect(
 )
 
 if selected_columns:
+    # Imported here so the sidebar and statistics render before Matplotlib loads
+    import matplotlib.pyplot as plt
+
     # Create figure
     fig, ax = plt.subplots(figsize=(10, 6))
 
     # Plot based on selection
-    if chart_type == "Line":
+    if large_n and chart_type in ["Line", "Scatter"]:
+        # Rasterized density: one image per column instead of one marker per point
+        density = sum(summary['rasters'][col] for col in selected_columns)
+        cmap = color_theme if color_theme in plt.colormaps() else color_theme.lower()
+        ax.imshow(np.log1p(density).T, origin='lower', aspect='auto', extent=summary['extent'],
+                  cmap=cmap, interpolation='nearest')
+        ax.set_title(f"{chart_type} Density ({data_size:,} points per column)")
+
+    elif chart_type == "Line":
         for col in selected_columns:
             ax.plot(st.session_state.data['x'], st.session_state.data[col], label=col)
         ax.set_title("Line Chart")
@@ -103,14 +276,21 @@ if selected_columns:
         ax.set_title("Scatter Plot")
 
     elif chart_type == "Histogram":
-        for col in selected_columns:
-            ax.hist(st.session_state.data[col], bins=20, alpha=0.7, label=col)
+        # Precomputed counts, rendered as bars
+        if large_n:
+            all_histograms = large_histograms(data_size, noise_level, st.session_state.large_seed, bin_rule)
+            histograms = {col: all_histograms[col] for col in selected_columns}
+        else:
+            histograms = session_histograms(selected_columns, bin_rule)
+        for col, (counts, edges) in histograms.items():
+            ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', alpha=0.7, label=col)
         ax.set_title("Histogram")
 
     # Customize plot
     ax.set_xlabel("X")
     ax.set_ylabel("Value")
-    ax.legend()
+    if ax.get_legend_handles_labels()[0]:
+        ax.legend()
     ax.grid(True, alpha=0.3)
     plt.tight_layout()
 
@@ -127,23 +307,30 @@ if selected_columns:
 
     # Different Streamlit chart based on selection
     if chart_type in ["Line", "Scatter"]:
-        chart_data = st.session_state.data[selected_columns]
+        if large_n:
+            # One averaged point per pixel column
+            chart_data = summary['line_data'][selected_columns]
+        else:
+            chart_data = st.session_state.data[selected_columns]
         st.line_chart(chart_data)
     elif chart_type == "Bar":
         chart_data = st.session_state.data.iloc[:30][selected_columns]  # Limit for visibility
         st.bar_chart(chart_data)
     else:
-        st.write("Interactive histogram not available with Streamlit's built-in charts")
+        st.bar_chart(histogram_chart_data(histograms), x='bin', y='count', color='column')
 
 # Data download section
 st.header("Download Data")
-csv = st.session_state.data.to_csv(index=False)
-st.download_button(
-    label="Download CSV",
-    data=csv,
-    file_name="streamlit_generated_data.csv",
-    mime="text/csv"
-)
+if large_n:
+    st.info("Download is not available in Large-N mode: the full dataset is never held in memory.")
+else:
+    csv = st.session_state.data.to_csv(index=False)
+    st.download_button(
+        label="Download CSV",
+        data=csv,
+        file_name="streamlit_generated_data.csv",
+        mime="text/csv"
+    )
 
 # App information
 with st.expander("About this app"):
@@ -0,0 +1,371 @@
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from shared_data import (DEFAULT_SHARED_DIR, file_lock, write_atomic, write_json, read_manifest, publish_datasets,
+                         attach_datasets, dataset_key)
+from partitioned_data import list_partitions, load_partitions, partitions_key
+from timeseries_rollups import build_dashboard_rollups, rollup_to_frame
+from ticket_store import ticket_db_path, read_updates, overlay_updates
+
+# Snapshot backups of the dashboard datasets and rollups.
+# A snapshot is a small JSON manifest listing, per dataset, the chunks it is
+# made of. Chunks are Arrow IPC streams of at most CHUNK_ROWS rows, compressed
+# with zstd and stored under the SHA-256 of their bytes:
+#
+#   <backup dir>/snapshots/20240501-020000-000000.json
+#   <backup dir>/chunks/3f/3fa4...e1.arrows
+#
+# A chunk that already exists is not written again, so a backup only writes
+# what changed since the previous one. Chunks are shared between snapshots, so
+# writing or restoring a snapshot holds a shared lock on chunks.lock and
+# pruning takes it exclusively: a chunk is never deleted while a snapshot
+# whose manifest is not written yet may use it, or while it is being restored.
+# Pruning is skipped when other snapshots are in flight; the last one to
+# finish prunes. Datasets are passed as a sequence of
+# pieces (one per month partition when backing up partitioned data) and
+# chunk boundaries restart with each piece, so an unchanged partition always
+# maps to the same chunks. The manifest also keeps the Arrow schema of each
+# dataset, so one without any pieces is restored as an empty table of the
+# right columns. Status changes from the ticket database are
+# stored with the snapshot and applied to the tickets on restore.
+#
+# Automatic backups are taken by a scheduler thread (BackupRunner.schedule),
+# never from a page render. Every backup runs under a lock file in the backup
+# directory, and an automatic one checks again under the lock whether it is
+# still due, so the server processes of a deployment write one snapshot per
+# schedule interval between them.
+#
+# Restoring publishes the snapshot into a shared directory (shared_data.py):
+# the chunks are decompressed straight into uncompressed Arrow IPC files and
+# every server process with DASHBOARD_SHARED_DIR memory-maps them on its next
+# rerun - no regeneration, no Parquet decoding, no rebuilding of the rollups.
+#
+# Usage:
+#   python backup_store.py backup --dir /data/backups --data-dir data
+#   python backup_store.py list --dir /data/backups
+#   python backup_store.py restore --dir /data/backups --to /dev/shm/admin-dashboard
+
+SNAPSHOT_DIR = 'snapshots'
+CHUNK_DIR = 'chunks'
+CHUNK_ROWS = 65536
+KEEP_SNAPSHOTS = 14
+BACKUP_LOCK_FILE = 'backup.lock'
+CHUNK_LOCK_FILE = 'chunks.lock'
+SCHEDULE_INTERVAL = 60
+DATASET_NAMES = ['sales', 'users', 'tickets']
+
+# Settings "Backup Schedule" as an interval between automatic backups
+BACKUP_INTERVALS = {
+    "Daily": timedelta(days=1),
+    "Weekly": timedelta(weeks=1),
+    "Monthly": timedelta(days=30)
+}
+
+
+# Function to serialize a record batch as a compressed Arrow IPC stream
+def chunk_bytes(batch):
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression='zstd')
+    with pa.ipc.new_stream(sink, batch.schema, options=options) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue()
+
+
+def chunk_path(backup_dir, digest):
+    return os.path.join(backup_dir, CHUNK_DIR, digest[:2], f'{digest}.arrows')
+
+
+# Function to store one chunk under its content hash; returns (digest, bytes written)
+def write_chunk(backup_dir, data):
+    digest = hashlib.sha256(data).hexdigest()
+    path = chunk_path(backup_dir, digest)
+    if os.path.exists(path):
+        return digest, 0
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def write(tmp_path):
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+    write_atomic(path, write)
+    return digest, len(data)
+
+
+# Function to cut one piece (frame or Arrow table) into record batches of CHUNK_ROWS rows.
+# Schema metadata is dropped so the same rows give the same chunk whatever their source.
+def piece_batches(piece, chunk_rows=CHUNK_ROWS):
+    table = piece if isinstance(piece, pa.Table) else pa.Table.from_pandas(piece, preserve_index=False)
+    table = table.replace_schema_metadata(None)
+    for start in range(0, max(table.num_rows, 1), chunk_rows):
+        batches = table.slice(start, chunk_rows).combine_chunks().to_batches()
+        yield batches[0] if batches else pa.RecordBatch.from_pylist([], schema=table.schema)
+
+
+# Function to write a snapshot of {name: frame, table or iterable of pieces}; returns its manifest
+def create_snapshot(backup_dir, datasets, keep=KEEP_SNAPSHOTS, chunk_rows=CHUNK_ROWS):
+    start = time.perf_counter()
+    created = datetime.now()
+    snapshot = {'id': created.strftime('%Y%m%d-%H%M%S-%f'), 'created': created.isoformat(), 'datasets': {}}
+    written = reused = bytes_written = 0
+    os.makedirs(os.path.join(backup_dir, SNAPSHOT_DIR), exist_ok=True)
+
+    # Until the manifest is written, the chunks are protected from pruning by the shared lock
+    with file_lock(os.path.join(backup_dir, CHUNK_LOCK_FILE), shared=True):
+        for name, pieces in datasets.items():
+            if isinstance(pieces, (pd.DataFrame, pa.Table)):
+                pieces = [pieces]
+            chunks, rows, schema = [], 0, None
+            for piece in pieces:
+                for batch in piece_batches(piece, chunk_rows):
+                    digest, size = write_chunk(backup_dir, chunk_bytes(batch))
+                    chunks.append(digest)
+                    rows += batch.num_rows
+                    schema = batch.schema
+                    written += size > 0
+                    reused += size == 0
+                    bytes_written += size
+            snapshot['datasets'][name] = {'rows': rows, 'chunks': chunks}
+            if schema is not None:
+                snapshot['datasets'][name]['schema'] = base64.b64encode(schema.serialize().to_pybytes()).decode()
+
+        snapshot['stats'] = {'chunks_written': int(written), 'chunks_reused': int(reused),
+                             'bytes_written': bytes_written, 'seconds': time.perf_counter() - start}
+        write_atomic(os.path.join(backup_dir, SNAPSHOT_DIR, f"{snapshot['id']}.json"),
+                     lambda path: write_json(path, snapshot))
+    prune_snapshots(backup_dir, keep)
+    return snapshot
+
+
+# Function to read the manifests of all snapshots, oldest first
+def read_snapshots(backup_dir):
+    snapshot_dir = os.path.join(backup_dir, SNAPSHOT_DIR)
+    if not os.path.isdir(snapshot_dir):
+        return []
+    snapshots = []
+    for file_name in sorted(os.listdir(snapshot_dir)):
+        if file_name.endswith('.json'):
+            # Skip manifests pruned since the listing
+            try:
+                with open(os.path.join(snapshot_dir, file_name)) as f:
+                    snapshots.append(json.load(f))
+            except FileNotFoundError:
+                continue
+    return snapshots
+
+
+# Function to list the snapshots as a table, newest first
+def list_snapshots(backup_dir):
+    return pd.DataFrame([{
+        'snapshot': snapshot['id'],
+        'created': pd.Timestamp(snapshot['created']),
+        **{f'{name} rows': dataset['rows'] for name, dataset in snapshot['datasets'].items()
+           if name in DATASET_NAMES},
+        'new chunks': snapshot['stats']['chunks_written'],
+        'written MB': snapshot['stats']['bytes_written'] / 1024 / 1024
+    } for snapshot in reversed(read_snapshots(backup_dir))])
+
+
+# Function to drop all but the newest `keep` snapshots and the chunks only they
+# used; returns the number of chunks removed (None when skipped because
+# snapshots are being written or restored)
+def prune_snapshots(backup_dir, keep=KEEP_SNAPSHOTS):
+    with file_lock(os.path.join(backup_dir, CHUNK_LOCK_FILE), blocking=False) as locked:
+        if not locked:
+            return None
+        snapshots = read_snapshots(backup_dir)
+        if len(snapshots) <= keep:
+            return 0
+        for snapshot in snapshots[:-keep]:
+            os.remove(os.path.join(backup_dir, SNAPSHOT_DIR, f"{snapshot['id']}.json"))
+
+        live = {digest for snapshot in snapshots[-keep:]
+                for dataset in snapshot['datasets'].values() for digest in dataset['chunks']}
+        chunk_root = os.path.join(backup_dir, CHUNK_DIR)
+        removed = 0
+        for prefix in os.listdir(chunk_root):
+            for file_name in os.listdir(os.path.join(chunk_root, prefix)):
+                if file_name.split('.')[0] not in live:
+                    os.remove(os.path.join(chunk_root, prefix, file_name))
+                    removed += 1
+        return removed
+
+
+# Function to check whether an automatic backup is due under a schedule
+def backup_due(backup_dir, schedule, now=None):
+    snapshots = read_snapshots(backup_dir)
+    if not snapshots:
+        return True
+    last = datetime.fromisoformat(snapshots[-1]['created'])
+    return (now or datetime.now()) - last >= BACKUP_INTERVALS[schedule]
+
+
+# Function to read one dataset of a snapshot back as an Arrow table. The
+# schema comes from the manifest, or from the chunks for older manifests; a
+# chunk of an empty piece holds no batches.
+def read_dataset(backup_dir, dataset):
+    schema = pa.ipc.read_schema(pa.py_buffer(base64.b64decode(dataset['schema']))) if 'schema' in dataset else None
+    batches = []
+    for digest in dataset['chunks']:
+        reader = pa.ipc.open_stream(pa.memory_map(chunk_path(backup_dir, digest)))
+        schema = schema or reader.schema
+        batches.extend(reader.read_all().to_batches())
+    return pa.Table.from_batches(batches, schema=schema or pa.schema([]))
+
+
+# Function to publish a snapshot (default: the newest) into a shared directory; returns the version
+def restore_snapshot(backup_dir, shared_dir=DEFAULT_SHARED_DIR, snapshot_id=None):
+    snapshots = read_snapshots(backup_dir)
+    if snapshot_id is not None:
+        snapshots = [snapshot for snapshot in snapshots if snapshot['id'] == snapshot_id]
+    if not snapshots:
+        raise FileNotFoundError(f"Snapshot {snapshot_id} not found in {backup_dir}" if snapshot_id
+                                else f"No snapshots in {backup_dir}")
+    snapshot = snapshots[-1]
+
+    with file_lock(os.path.join(backup_dir, CHUNK_LOCK_FILE), shared=True):
+        # The snapshot may have been pruned since its manifest was read
+        if not os.path.exists(os.path.join(backup_dir, SNAPSHOT_DIR, f"{snapshot['id']}.json")):
+            raise FileNotFoundError(f"Snapshot {snapshot['id']} was pruned from {backup_dir}")
+        # Memory-mapped chunks stay readable once the lock is released, even if pruned
+        tables = {name: read_dataset(backup_dir, dataset) for name, dataset in snapshot['datasets'].items()}
+    updates = tables.pop('ticket_updates', None)
+    if updates is not None and updates.num_rows:
+        tickets = overlay_updates(tables['tickets'].to_pandas(), updates.to_pandas())
+        tables['tickets'] = pa.Table.from_pandas(tickets, preserve_index=False)
+    return publish_datasets(shared_dir, tables)
+
+
+# Function to build the backup sources of a partitioned data directory: one piece per partition file
+def partitioned_sources(data_dir):
+    return {name: (pq.read_table(path) for path in list_partitions(data_dir, name)) for name in DATASET_NAMES}
+
+
+class BackupRunner:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.scheduler = None
+        self.last = None
+        self.error = None
+
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    # Run a backup in the background (no-op while one is running); returns whether it started.
+    # With a schedule it is an automatic backup, skipped if it is no longer due.
+    def start(self, backup_dir, datasets, schedule=None):
+        with self.lock:
+            if self.running():
+                return False
+            self.thread = threading.Thread(target=self.run, args=(backup_dir, datasets, schedule),
+                                           name='backup', daemon=True)
+            self.thread.start()
+            return True
+
+    # Start the thread taking the automatic backups (once per runner); it calls
+    # settings() and sources() for the current settings and backup sources
+    def schedule(self, settings, sources):
+        with self.lock:
+            if self.scheduler is not None:
+                return
+            self.scheduler = threading.Thread(target=self.run_schedule, args=(settings, sources),
+                                              name='backup-scheduler', daemon=True)
+            self.scheduler.start()
+
+    def run_schedule(self, settings, sources):
+        while True:
+            try:
+                current = settings()
+                if (current['automatic_backups'] and not self.running()
+                        and backup_due(current['backup_location'], current['backup_schedule'])):
+                    self.start(current['backup_location'], sources(), current['backup_schedule'])
+            except Exception:
+                logging.getLogger(__name__).exception("Automatic backup check failed")
+            time.sleep(SCHEDULE_INTERVAL)
+
+    def run(self, backup_dir, datasets, schedule=None):
+        try:
+            os.makedirs(backup_dir, exist_ok=True)
+            with file_lock(os.path.join(backup_dir, BACKUP_LOCK_FILE)):
+                # Another process may have taken the automatic backup meanwhile
+                if schedule is not None and not backup_due(backup_dir, schedule):
+                    return
+                self.last = create_snapshot(backup_dir, datasets)
+            self.error = None
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+
+    def wait(self, timeout=None):
+        thread = self.thread
+        if thread is not None:
+            thread.join(timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up and restore the admin dashboard datasets")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    backup_parser = subparsers.add_parser('backup', help="Write a snapshot")
+    backup_parser.add_argument('--dir', required=True, help="Backup directory")
+    source = backup_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--data-dir', help="Back up a partitioned data directory")
+    source.add_argument('--shared-dir', help="Back up the version published in a shared directory")
+    backup_parser.add_argument('--ticket-db', default=None,
+                               help="Ticket database (default: the dashboard's database for this dataset)")
+
+    list_parser = subparsers.add_parser('list', help="List snapshots")
+    list_parser.add_argument('--dir', required=True, help="Backup directory")
+
+    restore_parser = subparsers.add_parser('restore', help="Publish a snapshot into a shared directory")
+    restore_parser.add_argument('--dir', required=True, help="Backup directory")
+    restore_parser.add_argument('--to', default=DEFAULT_SHARED_DIR, help="Shared directory (default: %(default)s)")
+    restore_parser.add_argument('--snapshot', default=None, help="Snapshot id (default: newest)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == 'backup':
+        if args.data_dir:
+            datasets = partitioned_sources(args.data_dir)
+            sales_df = load_partitions(args.data_dir, 'sales', columns=['date', 'revenue'])
+            user_df = load_partitions(args.data_dir, 'users', columns=['join_date'])
+            ticket_df = load_partitions(args.data_dir, 'tickets',
+                                        columns=['ticket_id', 'status', 'created_date', 'resolved_date'])
+            key = partitions_key(args.data_dir)
+        else:
+            manifest = read_manifest(args.shared_dir)
+            if manifest is None:
+                parser.error(f"nothing published in {args.shared_dir}")
+            datasets = attach_datasets(args.shared_dir, manifest)
+            datasets.pop('rollups', None)
+            sales_df, user_df, ticket_df = datasets['sales'], datasets['users'], datasets['tickets']
+            key = dataset_key(user_df, ticket_df)
+
+        # Rollups are built with the ticket status changes applied, as the dashboard serves them
+        updates = read_updates(args.ticket_db or ticket_db_path(key))
+        datasets['rollups'] = rollup_to_frame(build_dashboard_rollups(sales_df, user_df,
+                                                                      overlay_updates(ticket_df, updates)))
+        datasets['ticket_updates'] = updates
+        snapshot = create_snapshot(args.dir, datasets)
+        stats = snapshot['stats']
+        print(f"Snapshot {snapshot['id']}: {stats['chunks_written']} new chunks "
+              f"({stats['bytes_written'] / 1024 / 1024:,.1f} MB), {stats['chunks_reused']} reused")
+    elif args.command == 'list':
+        print(list_snapshots(args.dir).to_string(index=False))
+    else:
+        version = restore_snapshot(args.dir, args.to, args.snapshot)
+        print(f"Published version {version} to {args.to}")
+    print(f"Finished in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+# Bitmap secondary indexes for low-cardinality columns.
+# Each category value gets a packed bitset (one bit per row), so multiselect
+# filters become bitwise AND/OR over small uint8 arrays and KPI counts are
+# popcounts instead of boolean-mask scans over the full frame.
+
+# Number of set bits for every possible byte value
+POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+# Function to build a bitmap index for every low-cardinality column of a frame
+def build_bitmap_index(df, max_cardinality=64):
+    index = {'n_rows': len(df), 'columns': {}}
+
+    for column in df.columns:
+        series = df[column]
+        if not (series.dtype == object or isinstance(series.dtype, pd.CategoricalDtype)
+                or pd.api.types.is_bool_dtype(series) or pd.api.types.is_string_dtype(series)):
+            continue
+
+        codes, uniques = pd.factorize(series)
+        if len(uniques) > max_cardinality:
+            continue
+
+        index['columns'][column] = {
+            value: np.packbits(codes == code)
+            for code, value in enumerate(uniques)
+        }
+
+    return index
+
+
+# Function to turn a boolean mask into a bitmap compatible with the index
+def bitmap_from_mask(mask):
+    return np.packbits(np.asarray(mask, dtype=bool))
+
+
+# Function to get an all-rows / no-rows bitmap for an index
+def bitmap_all(index):
+    return bitmap_from_mask(np.ones(index['n_rows'], dtype=bool))
+
+
+def bitmap_none(index):
+    return np.zeros((index['n_rows'] + 7) // 8, dtype=np.uint8)
+
+
+# Function to combine bitmaps
+def bitmap_and(*bitmaps):
+    result = bitmaps[0].copy()
+    for bitmap in bitmaps[1:]:
+        np.bitwise_and(result, bitmap, out=result)
+    return result
+
+
+def bitmap_or(*bitmaps):
+    result = bitmaps[0].copy()
+    for bitmap in bitmaps[1:]:
+        np.bitwise_or(result, bitmap, out=result)
+    return result
+
+
+# Function to get the bitmap of rows whose column value is in `values`
+def bitmap_isin(index, column, values):
+    column_bitmaps = index['columns'][column]
+    selected = [column_bitmaps[value] for value in values if value in column_bitmaps]
+    if not selected:
+        return bitmap_none(index)
+    return bitmap_or(*selected)
+
+
+# Function to apply several multiselect filters at once.
+# Empty selections are ignored, matching the "no filter" behaviour of the pages.
+def bitmap_filter(index, filters, base=None):
+    bitmaps = [base] if base is not None else []
+    for column, values in filters.items():
+        if values is not None and len(values) > 0:
+            bitmaps.append(bitmap_isin(index, column, values))
+    if not bitmaps:
+        return bitmap_all(index)
+    return bitmap_and(*bitmaps)
+
+
+# Function to count rows in a bitmap without materializing them
+def bitmap_count(bitmap):
+    return int(POPCOUNT_TABLE[bitmap].sum(dtype=np.int64))
+
+
+# Function to count rows per value of an indexed column, optionally within a bitmap
+def bitmap_value_counts(index, column, within=None):
+    counts = {}
+    for value, bitmap in index['columns'][column].items():
+        counts[value] = bitmap_count(bitmap if within is None else bitmap_and(bitmap, within))
+    return pd.Series(counts, name='count').sort_values(ascending=False)
+
+
+# Function to get the row positions selected by a bitmap
+def bitmap_rows(index, bitmap):
+    return np.flatnonzero(np.unpackbits(bitmap, count=index['n_rows']))
+
+
+# Function to list the values of an indexed column (same order as Series.unique())
+def bitmap_values(index, column):
+    return list(index['columns'][column].keys())
+
+
+# Function to move rows of an indexed column to new values. A new index is
+# returned: only the bitmaps of the values involved are copied, the others are
+# shared with the old index, so readers holding it are not affected.
+def update_bitmap_index(index, column, rows, old_values, new_values):
+    rows = np.asarray(rows, dtype=np.int64)
+    old_values = np.asarray(old_values, dtype=object)
+    new_values = np.asarray(new_values, dtype=object)
+    byte = rows >> 3
+    bit = (0x80 >> (rows & 7)).astype(np.uint8)
+
+    bitmaps = dict(index['columns'][column])
+    for value in set(old_values) | set(new_values):
+        bitmap = bitmaps[value].copy() if value in bitmaps else bitmap_none(index)
+        leaving = old_values == value
+        joining = new_values == value
+        np.bitwise_and.at(bitmap, byte[leaving], ~bit[leaving])
+        np.bitwise_or.at(bitmap, byte[joining], bit[joining])
+        bitmaps[value] = bitmap
+    return {**index, 'columns': {**index['columns'], column: bitmaps}}
@@ -0,0 +1,373 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+import data_generators
+from partitioned_data import load_partitions, partitions_key
+from shared_data import read_manifest, attach_datasets, attach_dataset, dataset_key
+from user_analytics import build_user_analytics
+from timeseries_rollups import build_dashboard_rollups, rollup_to_frame, rollup_from_frame
+from revenue_anomalies import build_revenue_anomalies
+from stats_engine import summarize_frame
+from view_cache import ViewCache
+from table_render import to_arrow
+from sales_aggregates import SALES_COLUMNS, scan_sales, scan_sales_dimensions, sales_columns
+from bitmap_index import build_bitmap_index
+from join_engine import build_entity_joins, join_rows, ticket_breakdown, revenue_breakdown
+from ticket_store import TicketWriter, TicketStore, ticket_db_path, prune_ticket_dbs, read_updates
+from backup_store import BackupRunner, partitioned_sources
+from event_log import EventLog, DEFAULT_EVENT_DIR, RETENTION_PERIODS, dataset_events, prune_event_logs
+from resource_governor import ResourceGovernor, governed, TIER_VIEWS, TIER_DERIVED, TIER_DATASETS
+
+# Data layer of the admin dashboard (Site-test.py).
+# The cached loaders live in an importable module rather than in the script,
+# so they are the same function objects in every rerun and can be warmed by
+# serve.py before the first session connects. Everything here is cached with
+# st.cache_resource: frames and indexes are shared read-only by all sessions.
+# Loaders whose entries can be rebuilt are wrapped with governed(), so the
+# cache byte budget from the Settings page can clear them (resource_governor.py).
+# The generated datasets are not: without a seed they could not be rebuilt.
+
+# Directory of month-partitioned Parquet datasets written by partitioned_data.py.
+# When set, the dashboard reads it instead of generating data in memory.
+DATA_DIR = os.environ.get('DASHBOARD_DATA_DIR')
+
+# Shared directory published by shared_data.py. When set, every server process
+# memory-maps the same copy of the datasets instead of loading its own.
+SHARED_DIR = os.environ.get('DASHBOARD_SHARED_DIR')
+
+# Out-of-core mode: sales history is never loaded as a single frame; the
+# Dashboard and Sales Analytics pages stream the partitions in batches instead
+OUT_OF_CORE = bool(DATA_DIR) and not SHARED_DIR and os.environ.get('DASHBOARD_OUT_OF_CORE') == '1'
+
+# Sidebar date ranges (the first one is the default)
+DATE_RANGES = {
+    "Last 7 days": 7,
+    "Last 30 days": 30,
+    "Last 90 days": 90,
+    "All time": 365
+}
+
+
+# Function to get the start of a date range, at minute resolution so the
+# filtered views can be shared between reruns and sessions
+def range_start(period_days, now=None):
+    start = (now or datetime.now()) - timedelta(days=period_days)
+    return start.replace(second=0, microsecond=0)
+
+
+# Function to generate random sales data (vectorized, see data_generators.py)
+@st.cache_resource
+def generate_sales_data(days=90, seed=None, num_users=1000):
+    return data_generators.generate_sales_data(days, seed=seed, num_users=num_users)
+
+
+# Function to generate random user data (vectorized, see data_generators.py)
+@st.cache_resource
+def generate_user_data(num_users=1000, seed=None):
+    return data_generators.generate_user_data(num_users, seed=seed)
+
+
+# Function to generate issue tickets (vectorized, see data_generators.py)
+@st.cache_resource
+def generate_tickets(num_tickets=200, seed=None, num_users=1000):
+    return data_generators.generate_tickets(num_tickets, seed=seed, num_users=num_users)
+
+
+# Function to read the partitioned sales and tickets, skipping months before start_date
+@governed('Partitioned datasets', TIER_DATASETS)
+@st.cache_resource(max_entries=4)
+def load_partitioned_datasets(data_dir, start_date):
+    return (load_partitions(data_dir, 'sales', start_date) if not OUT_OF_CORE else None,
+            load_partitions(data_dir, 'tickets', start_date))
+
+
+# Function to read every partition of the users: users are a dimension, not
+# events, so the user counts must not depend on the date range
+@governed('Partitioned users', TIER_DATASETS)
+@st.cache_resource(max_entries=2)
+def load_partitioned_users(data_dir):
+    return load_partitions(data_dir, 'users')
+
+
+# Function to attach one published version of the shared datasets
+@governed('Shared datasets', TIER_DATASETS)
+@st.cache_resource(max_entries=2)
+def load_shared_datasets(shared_dir, manifest):
+    datasets = attach_datasets(shared_dir, manifest)
+    return datasets['sales'], datasets['users'], datasets['tickets']
+
+
+# Load data (cached); returns the frames and a key identifying their version
+def load_datasets(start_date):
+    if SHARED_DIR:
+        manifest = read_manifest(SHARED_DIR)
+        if manifest is None:
+            st.error(f"No datasets published in {SHARED_DIR} yet. Start shared_data.py first.")
+            st.stop()
+        return load_shared_datasets(SHARED_DIR, manifest), ('shared', manifest['version'])
+    if DATA_DIR:
+        sales_df, ticket_df = load_partitioned_datasets(DATA_DIR, start_date)
+        return (sales_df, load_partitioned_users(DATA_DIR), ticket_df), (DATA_DIR, start_date)
+    return (generate_sales_data(), generate_user_data(), generate_tickets()), None
+
+
+# Build bitmap indexes for the categorical columns (cached across reruns)
+@governed('Bitmap indexes', TIER_DERIVED)
+@st.cache_resource(max_entries=12)
+def load_bitmap_index(name, data_version, n_rows, _df):
+    return build_bitmap_index(_df)
+
+
+# Build the user cohort / active-user analytics (cached across reruns)
+@governed('User analytics', TIER_DERIVED)
+@st.cache_resource(max_entries=4)
+def load_user_analytics(data_version, n_rows, _user_df):
+    return build_user_analytics(_user_df)
+
+
+# Per-column summary statistics (computed once per dataset version)
+@governed('Column statistics', TIER_VIEWS)
+@st.cache_resource(max_entries=12)
+def load_column_stats(name, data_version, n_rows, _df):
+    return summarize_frame(_df)
+
+
+# Daily rollups (prefix sums) behind the KPI deltas and sparklines
+@governed('Daily rollups', TIER_DERIVED)
+@st.cache_resource(max_entries=4)
+def load_rollups(data_version, _sales_df, _user_df, _ticket_df):
+    return build_dashboard_rollups(_sales_df, _user_df, _ticket_df)
+
+
+# Function to build the rollups over the full partitioned history: the loaded
+# sales and tickets are pruned to the selected range, but deltas also need the previous one
+@governed('Daily rollups (partitioned)', TIER_DERIVED)
+@st.cache_resource(max_entries=2)
+def load_partitioned_rollups(data_dir):
+    return build_dashboard_rollups(
+        load_partitions(data_dir, 'sales', columns=['date', 'revenue']),
+        load_partitioned_users(data_dir),
+        load_partitions(data_dir, 'tickets', columns=['created_date', 'resolved_date']))
+
+
+# Rollups published with the shared datasets (restored from a backup snapshot)
+@governed('Daily rollups (shared)', TIER_DERIVED)
+@st.cache_resource(max_entries=2)
+def load_shared_rollups(shared_dir, file_name):
+    return rollup_from_frame(attach_dataset(os.path.join(shared_dir, file_name)))
+
+
+# Function to get the rollups for the loaded datasets
+def get_rollups(data_version, sales_df, user_df, ticket_df):
+    if DATA_DIR and not SHARED_DIR:
+        return load_partitioned_rollups(DATA_DIR)
+    if SHARED_DIR:
+        manifest = read_manifest(SHARED_DIR)
+        if manifest and ('shared', manifest['version']) == data_version and 'rollups' in manifest['files']:
+            return load_shared_rollups(SHARED_DIR, manifest['files']['rollups'])
+    return load_rollups(data_version, sales_df, user_df, ticket_df)
+
+
+# Revenue baselines and anomaly flags per product x region
+@governed('Revenue anomalies', TIER_DERIVED)
+@st.cache_resource(max_entries=4)
+def load_revenue_anomalies(data_version, _sales_df):
+    return build_revenue_anomalies([_sales_df])
+
+
+# Function to build the revenue anomalies over the full partitioned history,
+# streamed in batches so out-of-core mode never holds the sales rows
+@governed('Revenue anomalies (partitioned)', TIER_DERIVED)
+@st.cache_resource(max_entries=2)
+def load_partitioned_revenue_anomalies(data_dir):
+    return build_revenue_anomalies(scan_sales(data_dir, None))
+
+
+# Function to get the revenue anomalies for the loaded datasets
+def get_revenue_anomalies(data_version, sales_df):
+    if DATA_DIR and not SHARED_DIR:
+        return load_partitioned_revenue_anomalies(DATA_DIR)
+    return load_revenue_anomalies(data_version, sales_df)
+
+
+# Surrogate-key joins of tickets and sales to the users, built once per dataset version
+@governed('Entity joins', TIER_DERIVED)
+@st.cache_resource(max_entries=4)
+def load_entity_joins(data_version, _user_df, _ticket_df, _sales_df):
+    return build_entity_joins(_user_df, _ticket_df, _sales_df)
+
+
+# Ticket volume and resolution time per user attribute, per ticket snapshot
+@governed('Ticket breakdowns', TIER_VIEWS)
+@st.cache_resource(max_entries=16)
+def load_ticket_breakdown(ticket_version, dimension, _joins, _ticket_df):
+    return ticket_breakdown(_joins['users'], dimension, _ticket_df, _joins['tickets'])
+
+
+# Revenue per user attribute for one sales view: the filtered rows in memory,
+# or the filtered partitions streamed in out-of-core mode. None when the sales
+# carry no user_id to join on (data generated before sales were linked to users).
+@governed('Revenue breakdowns', TIER_VIEWS)
+@st.cache_resource(max_entries=32)
+def load_revenue_breakdown(data_version, dimension, view, _joins, _sales_df, _sales_rows):
+    user_join = _joins['users']
+    if _sales_df is None:
+        if 'user_id' not in sales_columns(DATA_DIR):
+            return None
+        start_date, products, regions = view
+        batches = ((join_rows(user_join, batch['user_id']), batch['revenue'].to_numpy())
+                   for batch in scan_sales(DATA_DIR, start_date, products, regions,
+                                           columns=SALES_COLUMNS + ['user_id']))
+        return revenue_breakdown(user_join, dimension, batches)
+    if _joins['sales'] is None:
+        return None
+    return revenue_breakdown(user_join, dimension,
+                             [(_joins['sales'][_sales_rows], _sales_df['revenue'].to_numpy()[_sales_rows])])
+
+
+# Filtered views (row positions / bitmaps) shared by all sessions
+@st.cache_resource
+def get_view_cache():
+    return ViewCache()
+
+
+# Arrow table for a table view, built once per (dataset version, view)
+@governed('Table views', TIER_VIEWS)
+@st.cache_resource(max_entries=64)
+def load_table_view(name, data_version, view, _df):
+    return to_arrow(_df)
+
+
+# Append-only activity / event log of a dataset (key from load_dataset_key),
+# shared by the server processes; the resource governor applies retention to
+# it. The logs of earlier datasets that no process has open are removed.
+@st.cache_resource
+def get_event_log(key):
+    event_log = EventLog(os.path.join(DEFAULT_EVENT_DIR, key))
+    get_resource_governor().add_event_log(event_log)
+    prune_event_logs(DEFAULT_EVENT_DIR)
+    return event_log
+
+
+# Function to get the event log of the datasets, seeding a new log with their
+# sign-ups and ticket events (within the current retention period)
+@st.cache_resource(max_entries=4)
+def load_event_log(data_version, key, _user_df, _ticket_df):
+    event_log = get_event_log(key)
+    if len(event_log) == 0:
+        events = dataset_events(_user_df, _ticket_df)
+        event_log.seed(events[events['time'] <= datetime.now()])
+        event_log.apply_retention(RETENTION_PERIODS.get(get_resource_governor().settings['retention_period']))
+    return event_log
+
+
+# Function to get the key of the loaded users and tickets, under which the
+# ticket status changes are stored (partitioned data: from the partition files,
+# since the loaded tickets are pruned to the date range)
+@st.cache_resource(max_entries=4)
+def load_dataset_key(data_version, _user_df, _ticket_df):
+    if DATA_DIR and not SHARED_DIR:
+        return partitions_key(DATA_DIR)
+    return dataset_key(_user_df, _ticket_df)
+
+
+# Writer thread of a ticket database (one per database and server process);
+# the databases of earlier datasets that no process has open are removed
+@st.cache_resource
+def get_ticket_writer(db_path, key):
+    writer = TicketWriter(db_path, get_event_log(key))
+    prune_ticket_dbs()
+    return writer
+
+
+# Ticket frame, index and rollups with the persisted status changes applied.
+# Views of a superseded snapshot are dropped from the view cache on publish.
+@st.cache_resource(max_entries=4)
+def load_ticket_store(data_version, key, _ticket_df, _ticket_index, _rollups):
+    store = TicketStore(get_ticket_writer(ticket_db_path(key), key), _ticket_df, _ticket_index, _rollups)
+    view_cache = get_view_cache()
+    store.on_publish.append(lambda old, new: view_cache.invalidate(('tickets', data_version, old)))
+    return store
+
+
+# Settings-driven budgets, session timeout and retention (one per server process)
+@st.cache_resource
+def get_resource_governor():
+    return ResourceGovernor(get_view_cache())
+
+
+# Background snapshot backups (one runner per server process); its scheduler
+# takes the automatic backups with the settings of the resource governor
+@st.cache_resource
+def get_backup_runner():
+    # Cached functions warn about the missing script context outside a session
+    logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').addFilter(
+        lambda record: threading.current_thread().name != 'backup-scheduler')
+    runner = BackupRunner()
+    governor = get_resource_governor()
+    runner.schedule(lambda: governor.settings, current_backup_sources)
+    return runner
+
+
+# Function to collect what a backup snapshot holds: the full datasets (every
+# partition in partitioned mode), the rollups and the ticket status changes
+def backup_sources(key, sales_df, user_df, ticket_df, rollups):
+    if DATA_DIR and not SHARED_DIR:
+        datasets = partitioned_sources(DATA_DIR)
+    else:
+        datasets = {'sales': sales_df, 'users': user_df, 'tickets': ticket_df}
+    datasets['rollups'] = rollup_to_frame(rollups)
+    datasets['ticket_updates'] = read_updates(ticket_db_path(key))
+    return datasets
+
+
+# Function to collect the backup sources of the datasets as a first page
+# view loads them, with the ticket status changes applied (automatic backups)
+def current_backup_sources():
+    start_date = range_start(next(iter(DATE_RANGES.values()))).date()
+    (sales_df, user_df, ticket_df), data_version = load_datasets(start_date)
+    key = load_dataset_key(data_version, user_df, ticket_df)
+    rollups = get_rollups(data_version, sales_df, user_df, ticket_df)
+    ticket_snapshot = load_ticket_store(data_version, key, ticket_df,
+                                        load_bitmap_index('tickets', data_version, len(ticket_df), ticket_df),
+                                        rollups).current()
+    return backup_sources(key, sales_df, user_df, ticket_snapshot['frame'], ticket_snapshot['rollups'])
+
+
+# Function to start a backup to the configured location right away; returns whether it started
+def start_backup(settings, key, sales_df, user_df, ticket_df, rollups):
+    return get_backup_runner().start(settings['backup_location'],
+                                     backup_sources(key, sales_df, user_df, ticket_df, rollups))
+
+
+# Function to list products and regions of the partitioned sales (out-of-core mode)
+@governed('Sales dimensions', TIER_VIEWS)
+@st.cache_data
+def load_sales_dimensions(data_dir):
+    return scan_sales_dimensions(data_dir)
+
+
+# Function to warm the caches the first page view needs: the datasets of the
+# default date range, their indexes, the user analytics, the rollups, the
+# revenue anomalies, the entity joins, the ticket store and the event log,
+# and start the resource governor and the backup scheduler
+def prewarm():
+    start_date = range_start(next(iter(DATE_RANGES.values()))).date()
+    (sales_df, user_df, ticket_df), data_version = load_datasets(start_date)
+    load_bitmap_index('users', data_version, len(user_df), user_df)
+    if sales_df is not None:
+        load_bitmap_index('sales', data_version, len(sales_df), sales_df)
+    load_user_analytics(data_version, len(user_df), user_df)
+    rollups = get_rollups(data_version, sales_df, user_df, ticket_df)
+    key = load_dataset_key(data_version, user_df, ticket_df)
+    load_ticket_store(data_version, key, ticket_df,
+                      load_bitmap_index('tickets', data_version, len(ticket_df), ticket_df), rollups)
+    get_revenue_anomalies(data_version, sales_df)
+    load_entity_joins(data_version, user_df, ticket_df, sales_df)
+    load_event_log(data_version, key, user_df, ticket_df)
+    get_resource_governor()
+    get_backup_runner()
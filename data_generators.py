@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+# Vectorized dataset generators for the admin dashboard.
+# Every column is drawn with a single np.random.Generator call, so generating
+# millions of rows costs a handful of array operations instead of a Python loop.
+# Passing the same seed reproduces the same frame.
+
+PRODUCTS = ['Product A', 'Product B', 'Product C', 'Product D', 'Product E']
+REGIONS = ['North', 'South', 'East', 'West', 'Central']
+COUNTRIES = ['USA', 'Canada', 'UK', 'Germany', 'France', 'Australia', 'Japan', 'Brazil', 'India', 'China']
+SUBSCRIPTIONS = ['Free', 'Basic', 'Premium', 'Enterprise']
+ACTIVITY_LEVELS = ['High', 'Medium', 'Low']
+TICKET_STATUSES = ['Open', 'In Progress', 'Closed', 'Resolved']
+TICKET_PRIORITIES = ['Low', 'Medium', 'High', 'Critical']
+TICKET_CATEGORIES = ['Bug', 'Feature Request', 'Question', 'Technical Issue', 'Billing']
+
+# Popularity, price and regional volume factors used by the sales generator
+PRODUCT_FACTORS = np.array([1.5, 0.7, 1.2, 0.9, 1.1])
+PRODUCT_PRICES = np.array([50, 75, 100, 120, 200])
+REGION_FACTORS = np.array([1.1, 0.9, 1.3, 1.2, 0.8])
+
+# Login count ranges (inclusive) for each activity level, in ACTIVITY_LEVELS order
+LOGIN_COUNT_RANGES = np.array([
+    [50, 200],  # High
+    [15, 50],   # Medium
+    [1, 15]     # Low
+])
+
+
+# Function to build "<prefix><number><suffix>" string columns without a per-row f-string.
+# Small value ranges (agents, referenced users) are formatted once and looked up by code.
+def format_ids(prefix, numbers, suffix=''):
+    numbers = np.asarray(numbers)
+    if len(numbers) == 0:
+        return np.array([], dtype=object)
+
+    low, high = numbers.min(), numbers.max()
+    if high - low + 1 <= len(numbers) // 4:
+        labels = format_ids(prefix, np.arange(low, high + 1), suffix)
+        return labels[numbers - low]
+
+    return np.char.add(np.char.add(prefix, numbers.astype(np.str_)), suffix).astype(object)
+
+
+# Function to pick labels for random codes
+def choose(rng, labels, size):
+    return np.asarray(labels, dtype=object)[rng.integers(0, len(labels), size)]
+
+
+# Function to generate random sales data: one row per day x product x region.
+# Either the last `days` days, or an explicit [start_date, end_date] range.
+# With num_users, every row also gets the account that booked it (user_id),
+# drawn last so the other columns stay the same for a seed.
+def generate_sales_data(days=90, seed=None, now=None, start_date=None, end_date=None, num_users=None):
+    rng = np.random.default_rng(seed)
+    if end_date is None:
+        end_date = now if now is not None else datetime.now()
+    if start_date is None:
+        start_date = end_date - timedelta(days=days)
+
+    date_range = pd.date_range(start=start_date, end=end_date, freq='D')
+    n_products, n_regions = len(PRODUCTS), len(REGIONS)
+    num_rows = len(date_range) * n_products * n_regions
+
+    # Row layout matches the nested date -> product -> region loop
+    date_idx = np.repeat(np.arange(len(date_range)), n_products * n_regions)
+    product_idx = np.tile(np.repeat(np.arange(n_products), n_regions), len(date_range))
+    region_idx = np.tile(np.arange(n_regions), len(date_range) * n_products)
+
+    # Seasonality, product popularity and regional volume
+    base_quantity = rng.integers(5, 51, num_rows)
+    day_factor = 1 + 0.3 * np.sin(date_range.day_of_year.to_numpy() / 30)
+    quantity = (base_quantity * day_factor[date_idx] * PRODUCT_FACTORS[product_idx]
+                * REGION_FACTORS[region_idx]).astype(np.int64)
+    price = PRODUCT_PRICES[product_idx]
+
+    sales = pd.DataFrame({
+        'date': date_range[date_idx],
+        'product': np.asarray(PRODUCTS, dtype=object)[product_idx],
+        'region': np.asarray(REGIONS, dtype=object)[region_idx],
+        'quantity': quantity,
+        'price': price,
+        'revenue': quantity * price
+    })
+    if num_users is not None:
+        sales['user_id'] = format_ids('USER', rng.integers(1000, 1000 + num_users, num_rows))
+    return sales
+
+
+# Function to generate random user data
+def generate_user_data(num_users=1000, seed=None, id_offset=0, now=None):
+    rng = np.random.default_rng(seed)
+    end_date = now if now is not None else datetime.now()
+    start_date = end_date - timedelta(days=365)
+    span_days = (end_date - start_date).days
+
+    # Join date and a last login somewhere between joining and today
+    join_offset = rng.integers(0, span_days + 1, num_users)
+    login_offset = rng.integers(0, span_days - join_offset + 1)
+    join_date = pd.Timestamp(start_date) + pd.to_timedelta(join_offset, unit='D')
+    last_login = join_date + pd.to_timedelta(login_offset, unit='D')
+
+    # Login count depends on activity level: one masked draw for all users
+    activity_codes = rng.integers(0, len(ACTIVITY_LEVELS), num_users)
+    login_range = LOGIN_COUNT_RANGES[activity_codes]
+    login_count = rng.integers(login_range[:, 0], login_range[:, 1] + 1)
+
+    user_numbers = np.arange(id_offset, id_offset + num_users)
+
+    return pd.DataFrame({
+        'user_id': format_ids('USER', user_numbers + 1000),
+        'join_date': join_date,
+        'last_login': last_login,
+        'name': format_ids('User ', user_numbers + 1),
+        'email': format_ids('user', user_numbers + 1, '@example.com'),
+        'country': choose(rng, COUNTRIES, num_users),
+        'subscription': choose(rng, SUBSCRIPTIONS, num_users),
+        'activity_level': np.asarray(ACTIVITY_LEVELS, dtype=object)[activity_codes],
+        'login_count': login_count,
+        'completed_profile': rng.integers(0, 2, num_users).astype(bool),
+        'notifications_enabled': rng.integers(0, 2, num_users).astype(bool)
+    })
+
+
+# Function to generate issue tickets, each raised by one of `num_users` users
+def generate_tickets(num_tickets=200, seed=None, id_offset=0, now=None, num_users=1000):
+    rng = np.random.default_rng(seed)
+    start_date = (now if now is not None else datetime.now()) - timedelta(days=30)
+
+    created_date = pd.Timestamp(start_date) + pd.to_timedelta(rng.integers(0, 31, num_tickets), unit='D')
+
+    status_codes = rng.integers(0, len(TICKET_STATUSES), num_tickets)
+    status = np.asarray(TICKET_STATUSES, dtype=object)[status_codes]
+
+    # Only closed/resolved tickets get a resolution date, the rest stay NaT
+    resolved_date = created_date + pd.to_timedelta(rng.integers(1, 6, num_tickets), unit='D')
+    is_done = np.isin(status, ['Closed', 'Resolved'])
+    resolved_date = resolved_date.where(is_done)
+
+    ticket_numbers = np.arange(id_offset, id_offset + num_tickets)
+
+    return pd.DataFrame({
+        'ticket_id': format_ids('TCK-', ticket_numbers + 1000),
+        'created_date': created_date,
+        'resolved_date': resolved_date,
+        'status': status,
+        'title': format_ids('Issue ', ticket_numbers + 1),
+        'category': choose(rng, TICKET_CATEGORIES, num_tickets),
+        'priority': choose(rng, TICKET_PRIORITIES, num_tickets),
+        'assigned_to': format_ids('Agent ', rng.integers(1, 11, num_tickets)),
+        'user_id': format_ids('USER', rng.integers(1000, 1000 + num_users, num_tickets))
+    })
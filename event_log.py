@@ -0,0 +1,426 @@
+import io
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from shared_data import file_lock, hold_in_use, remove_unused, write_atomic, write_json
+
+# Append-only event log behind "Recent Activities" and the ticket activity logs.
+# Events (time, kind, entity, user, action) are kept in time-ordered segment
+# files: Arrow IPC files, zstd-compressed, written in blocks of BLOCK_ROWS
+# rows. Segments are immutable once written; new events go to a tail that is
+# journaled (one JSON line per event) and sealed into a segment when it holds
+# SEGMENT_ROWS events.
+#
+# The manifest (index.json) is a sparse index: the time range of every block
+# of every segment. Each segment also has an entity filter - one bitset per
+# block with the hash buckets of the entities (ticket / user ids) in it. Reads
+# memory-map the segment and decompress only the blocks whose time range and
+# entity filter can match, so "latest N events" touches the newest blocks and
+# a per-ticket scan touches the few blocks mentioning that ticket. Retention
+# drops whole segments older than the cutoff, and the expired tail events.
+#
+# Several server processes can share one log directory. Appends, sealing and
+# retention run under a file lock (log.lock) and start from the index and tail
+# as they are on disk, so no process overwrites what another one wrote. Every
+# read checks whether index.json or tail.jsonl changed (a stat of each) and
+# picks up the other processes' events: the new tail lines only while the
+# tail grows, a full reload after it was replaced. Each open EventLog holds
+# the directory in use (a shared lock on in-use.lock); prune_event_logs()
+# removes the log directories under a root that no process has open.
+#
+# Layout:
+#   <dir>/index.json
+#   <dir>/tail.jsonl
+#   <dir>/log.lock
+#   <dir>/in-use.lock
+#   <dir>/events.00000001.arrow
+#   <dir>/events.00000001.entities.npy
+
+DEFAULT_EVENT_DIR = os.environ.get('DASHBOARD_EVENT_DIR',
+                                   os.path.join(tempfile.gettempdir(), 'admin-dashboard-events'))
+INDEX_FILE = 'index.json'
+TAIL_FILE = 'tail.jsonl'
+LOCK_FILE = 'log.lock'
+IN_USE_FILE = 'in-use.lock'
+SEGMENT_ROWS = 65536
+BLOCK_ROWS = 4096
+ENTITY_BUCKETS = 65536
+EVENT_COLUMNS = ['time', 'kind', 'entity', 'user', 'action']
+
+# Settings "Data Retention Period" in days (None keeps everything)
+RETENTION_PERIODS = {
+    "30 days": 30,
+    "90 days": 90,
+    "1 year": 365,
+    "Forever": None
+}
+
+EVENT_SCHEMA = pa.schema([
+    ('time', pa.timestamp('us')),
+    ('kind', pa.string()),
+    ('entity', pa.string()),
+    ('user', pa.string()),
+    ('action', pa.string())
+])
+
+
+# Function to bring events (DataFrame or list of dicts) to the log's columns and types
+def to_events(events):
+    events = pd.DataFrame(events, columns=EVENT_COLUMNS)
+    events['time'] = pd.to_datetime(events['time']).astype('datetime64[us]')
+    for column in EVENT_COLUMNS[1:]:
+        events[column] = events[column].fillna('').astype(str).astype(object)
+    return events
+
+
+# Function to get the hash bucket of every entity
+def entity_buckets(entities):
+    return (pd.util.hash_array(np.asarray(entities, dtype=object)) % ENTITY_BUCKETS).astype(np.int64)
+
+
+# Function to get the block time range in microseconds (for the manifest)
+def time_bounds(times):
+    values = np.asarray(times, dtype='datetime64[us]').astype(np.int64)
+    return [int(values.min()), int(values.max())]
+
+
+def to_micros(value):
+    return int(np.datetime64(pd.Timestamp(value).to_datetime64(), 'us').astype(np.int64))
+
+
+# Function to parse journaled tail lines into events
+def read_tail_lines(data):
+    if not data.strip():
+        return to_events([])
+    return to_events(pd.read_json(io.BytesIO(data), lines=True, dtype=False, convert_dates=['time']))
+
+
+# Function to identify a version of a file (None when it does not exist)
+def file_state(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class EventLog:
+    def __init__(self, directory=DEFAULT_EVENT_DIR, segment_rows=SEGMENT_ROWS, block_rows=BLOCK_ROWS):
+        self.directory = directory
+        self.segment_rows = segment_rows
+        self.block_rows = block_rows
+        self.lock = threading.Lock()
+        self.readers = {}
+        self.index = {'next_segment': 1, 'segments': []}
+        self.index_state = None
+        self.tail = to_events([])
+        # File identity and bytes of the tail read so far
+        self.tail_state = None
+        self.tail_offset = 0
+        self.in_use = hold_in_use(os.path.join(directory, IN_USE_FILE))
+        with self.lock:
+            self.sync()
+
+    def __len__(self):
+        with self.lock:
+            self.sync()
+            return sum(segment['rows'] for segment in self.index['segments']) + len(self.tail)
+
+    # Function to check whether another process changed the index or tail since they were read
+    def changed(self):
+        return (file_state(os.path.join(self.directory, INDEX_FILE)) != self.index_state
+                or file_state(os.path.join(self.directory, TAIL_FILE)) != self.tail_state)
+
+    # Function to bring the index and tail up to date before a read; the file
+    # lock is taken only when something changed, so a read never sees a
+    # segment both sealed and still in the tail
+    def sync(self):
+        if self.changed():
+            with file_lock(os.path.join(self.directory, LOCK_FILE)):
+                self.refresh()
+
+    # Function to re-read the index and tail as written by any process (both locks held)
+    def refresh(self):
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        index_state = file_state(index_path)
+        if index_state != self.index_state:
+            try:
+                with open(index_path) as f:
+                    self.index = json.load(f)
+            except FileNotFoundError:
+                self.index = {'next_segment': 1, 'segments': []}
+            self.index_state = index_state
+            # Retention may have removed segments
+            live = {segment['name'] for segment in self.index['segments']}
+            self.readers = {name: reader for name, reader in self.readers.items() if name in live}
+
+        try:
+            f = open(os.path.join(self.directory, TAIL_FILE), 'rb')
+        except FileNotFoundError:
+            self.tail, self.tail_state, self.tail_offset = to_events([]), None, 0
+            return
+        with f:
+            stat = os.fstat(f.fileno())
+            tail_state = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if tail_state == self.tail_state:
+                return
+            # The tail is appended to in place and replaced as a whole when sealed
+            grown = self.tail_state is not None and tail_state[0] == self.tail_state[0] and \
+                stat.st_size >= self.tail_offset
+            offset = self.tail_offset if grown else 0
+            f.seek(offset)
+            data = f.read(stat.st_size - offset)
+        data = data[:data.rfind(b'\n') + 1]
+        events = read_tail_lines(data)
+        self.tail = pd.concat([self.tail, events], ignore_index=True) if grown else events
+        self.tail_state = tail_state
+        self.tail_offset = offset + len(data)
+
+    # Append events; the tail is sealed into segments once it is large enough
+    def append(self, events):
+        events = to_events(events)
+        if events.empty:
+            return
+        with self.lock, file_lock(os.path.join(self.directory, LOCK_FILE)):
+            self.refresh()
+            self.write_events(events)
+
+    # Append events only if the log is empty (seeding; one process wins)
+    def seed(self, events):
+        events = to_events(events)
+        with self.lock, file_lock(os.path.join(self.directory, LOCK_FILE)):
+            self.refresh()
+            if self.index['segments'] or len(self.tail) or events.empty:
+                return False
+            self.write_events(events)
+            return True
+
+    def write_events(self, events):
+        tail = pd.concat([self.tail, events], ignore_index=True)
+        if len(tail) < self.segment_rows:
+            with open(os.path.join(self.directory, TAIL_FILE), 'a') as f:
+                f.write(events.to_json(orient='records', lines=True, date_format='iso', date_unit='us'))
+                f.flush()
+                os.fsync(f.fileno())
+            # Our own lines need not be read back
+            self.tail = tail
+            self.tail_state = file_state(os.path.join(self.directory, TAIL_FILE))
+            self.tail_offset = self.tail_state[1]
+            return
+
+        tail = tail.sort_values('time', kind='stable', ignore_index=True)
+        n_sealed = len(tail) - len(tail) % self.segment_rows
+        for start in range(0, n_sealed, self.segment_rows):
+            self.write_segment(tail.iloc[start:start + self.segment_rows])
+        self.write_index()
+        self.replace_tail(tail.iloc[n_sealed:].reset_index(drop=True))
+
+    # Seal the whole tail into a segment (e.g. before a backup or shutdown)
+    def flush(self):
+        with self.lock, file_lock(os.path.join(self.directory, LOCK_FILE)):
+            self.refresh()
+            if self.tail.empty:
+                return
+            self.write_segment(self.tail.sort_values('time', kind='stable', ignore_index=True))
+            self.write_index()
+            self.replace_tail(to_events([]))
+
+    def replace_tail(self, tail):
+        path = os.path.join(self.directory, TAIL_FILE)
+        write_atomic(path, lambda tmp_path: tail.to_json(tmp_path, orient='records', lines=True, date_format='iso',
+                                                         date_unit='us')
+                     if len(tail) else open(tmp_path, 'w').close())
+        self.tail = tail
+        self.tail_state = file_state(path)
+        self.tail_offset = self.tail_state[1]
+
+    # Function to write one sorted chunk of events as a segment (blocks + entity filter)
+    def write_segment(self, events):
+        number = self.index['next_segment']
+        name = f'events.{number:08d}'
+        table = pa.Table.from_pandas(events, schema=EVENT_SCHEMA, preserve_index=False)
+
+        options = pa.ipc.IpcWriteOptions(compression='zstd')
+        with pa.OSFile(os.path.join(self.directory, f'{name}.arrow'), 'wb') as sink:
+            with pa.ipc.new_file(sink, EVENT_SCHEMA, options=options) as writer:
+                for batch in table.to_batches(max_chunksize=self.block_rows):
+                    writer.write_batch(batch)
+
+        starts = range(0, len(events), self.block_rows)
+        buckets = entity_buckets(events['entity'])
+        filters = np.zeros((len(starts), ENTITY_BUCKETS), dtype=bool)
+        filters[np.arange(len(events)) // self.block_rows, buckets] = True
+        np.save(os.path.join(self.directory, f'{name}.entities.npy'), np.packbits(filters, axis=1))
+
+        self.index['segments'].append({
+            'name': name,
+            'rows': len(events),
+            'time_range': time_bounds(events['time']),
+            'blocks': [time_bounds(events['time'].iloc[start:start + self.block_rows]) for start in starts]
+        })
+        self.index['next_segment'] = number + 1
+
+    def write_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        write_atomic(path, lambda tmp_path: write_json(tmp_path, self.index))
+        self.index_state = file_state(path)
+
+    # Memory-mapped reader and entity filter of a segment (opened once)
+    def reader(self, segment):
+        name = segment['name']
+        if name not in self.readers:
+            source = pa.memory_map(os.path.join(self.directory, f'{name}.arrow'))
+            filters = np.load(os.path.join(self.directory, f'{name}.entities.npy'), mmap_mode='r')
+            self.readers[name] = (pa.ipc.open_file(source), filters)
+        return self.readers[name]
+
+    def read_block(self, segment, block):
+        reader, _ = self.reader(segment)
+        return reader.get_batch(block).to_pandas()
+
+    # Function to get the newest `n` events, optionally of one kind
+    def latest(self, n, kind=None):
+        with self.lock:
+            self.sync()
+            segments = list(self.index['segments'])
+            tail = self.tail
+        parts = [tail if kind is None else tail[tail['kind'] == kind]]
+        found = len(parts[0])
+        threshold = np.sort(parts[0]['time'].to_numpy())[-n] if found >= n else None
+
+        # Newest blocks first; stop once no remaining block can beat the n-th newest event
+        blocks = [(time_max, segment, block)
+                  for segment in segments
+                  for block, (_, time_max) in enumerate(segment['blocks'])]
+        blocks.sort(key=lambda item: item[0], reverse=True)
+        for time_max, segment, block in blocks:
+            if threshold is not None and time_max < to_micros(threshold):
+                break
+            events = self.read_block(segment, block)
+            if kind is not None:
+                events = events[events['kind'] == kind]
+            parts.append(events)
+            found += len(events)
+            if found >= n:
+                times = np.concatenate([part['time'].to_numpy() for part in parts])
+                threshold = np.sort(times)[-n]
+
+        events = pd.concat(parts, ignore_index=True)
+        return events.sort_values('time', ascending=False, kind='stable').head(n).reset_index(drop=True)
+
+    # Function to get the events of a time range, optionally of one entity / kind, oldest first
+    def scan(self, start=None, end=None, entity=None, kind=None):
+        lo = to_micros(start) if start is not None else None
+        hi = to_micros(end) if end is not None else None
+        bucket = entity_buckets([entity])[0] if entity is not None else None
+        with self.lock:
+            self.sync()
+            segments = list(self.index['segments'])
+            tail = self.tail
+
+        parts = [tail]
+        for segment in segments:
+            segment_min, segment_max = segment['time_range']
+            if (lo is not None and segment_max < lo) or (hi is not None and segment_min > hi):
+                continue
+            _, filters = self.reader(segment)
+            for block, (block_min, block_max) in enumerate(segment['blocks']):
+                if (lo is not None and block_max < lo) or (hi is not None and block_min > hi):
+                    continue
+                if bucket is not None and not (filters[block, bucket >> 3] >> (7 - (bucket & 7))) & 1:
+                    continue
+                parts.append(self.read_block(segment, block))
+
+        events = pd.concat(parts, ignore_index=True)
+        mask = np.ones(len(events), dtype=bool)
+        if start is not None:
+            mask &= (events['time'] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (events['time'] <= pd.Timestamp(end)).to_numpy()
+        if entity is not None:
+            mask &= (events['entity'] == entity).to_numpy()
+        if kind is not None:
+            mask &= (events['kind'] == kind).to_numpy()
+        return events[mask].sort_values('time', kind='stable').reset_index(drop=True)
+
+    # Function to drop the segments and tail events older than the retention
+    # period; returns the number of events dropped
+    def apply_retention(self, days, now=None):
+        if days is None:
+            return 0
+        cutoff = (now or datetime.now()) - timedelta(days=days)
+        with self.lock, file_lock(os.path.join(self.directory, LOCK_FILE)):
+            self.refresh()
+            expired = [segment for segment in self.index['segments']
+                       if segment['time_range'][1] < to_micros(cutoff)]
+            if expired:
+                self.index['segments'] = [segment for segment in self.index['segments'] if segment not in expired]
+                self.write_index()
+                for segment in expired:
+                    self.readers.pop(segment['name'], None)
+                    for suffix in ['.arrow', '.entities.npy']:
+                        os.remove(os.path.join(self.directory, segment['name'] + suffix))
+
+            keep = (self.tail['time'] >= pd.Timestamp(cutoff)).to_numpy()
+            n_tail = int((~keep).sum())
+            if n_tail:
+                self.replace_tail(self.tail[keep].reset_index(drop=True))
+        return sum(segment['rows'] for segment in expired) + n_tail
+
+    def stats(self):
+        with self.lock:
+            self.sync()
+            segments = list(self.index['segments'])
+            tail_rows = len(self.tail)
+        disk_bytes = sum(os.path.getsize(os.path.join(self.directory, segment['name'] + suffix))
+                         for segment in segments for suffix in ['.arrow', '.entities.npy'])
+        return {'segments': len(segments), 'events': sum(segment['rows'] for segment in segments) + tail_rows,
+                'tail': tail_rows, 'disk_bytes': disk_bytes}
+
+
+# Function to remove the event log directories under root (one per dataset
+# key) that no EventLog holds open; returns the directories removed
+def prune_event_logs(root=DEFAULT_EVENT_DIR):
+    removed = []
+    for name in sorted(os.listdir(root)) if os.path.isdir(root) else []:
+        directory = os.path.join(root, name)
+        if not any(os.path.exists(os.path.join(directory, f)) for f in (INDEX_FILE, TAIL_FILE, LOCK_FILE)):
+            continue
+        if remove_unused(os.path.join(directory, IN_USE_FILE), [directory]):
+            removed.append(directory)
+    return removed
+
+
+# Function to derive events from the datasets (user sign-ups, tickets created / resolved),
+# used to seed an empty log
+def dataset_events(user_df, ticket_df):
+    users = pd.DataFrame({
+        'time': user_df['join_date'],
+        'kind': 'user',
+        'entity': user_df['user_id'],
+        'user': 'System',
+        'action': 'New user registration: ' + user_df['name'].astype(str)
+    })
+    created = pd.DataFrame({
+        'time': ticket_df['created_date'],
+        'kind': 'ticket',
+        'entity': ticket_df['ticket_id'],
+        'user': ticket_df['user_id'],
+        'action': 'Ticket created'
+    })
+    resolved_df = ticket_df[ticket_df['resolved_date'].notna()]
+    resolved = pd.DataFrame({
+        'time': resolved_df['resolved_date'],
+        'kind': 'ticket',
+        'entity': resolved_df['ticket_id'],
+        'user': resolved_df['assigned_to'],
+        'action': 'Ticket resolved'
+    })
+    return pd.concat([users, created, resolved], ignore_index=True)
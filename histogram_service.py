@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from stats_engine import summary_quantile
+
+# Histogram binning for the Data Explorer.
+# Bin edges come from the column summaries of stats_engine (min/max/IQR), so
+# choosing a bin rule never touches raw rows; counting is a single bincount
+# over all selected columns at once. Both the Matplotlib and the interactive
+# chart render the same precomputed counts.
+
+BIN_RULES = ["Fixed (20 bins)", "Freedman-Diaconis", "Sturges"]
+MAX_BINS = 500
+
+
+# Function to choose the number of bins for one column summary
+def bin_count(summary, rule="Fixed (20 bins)"):
+    n = summary['count']
+    if n < 2 or summary['max'] <= summary['min']:
+        return 1
+
+    if rule == "Sturges":
+        bins = int(np.ceil(np.log2(n))) + 1
+    elif rule == "Freedman-Diaconis":
+        iqr = summary_quantile(summary, 0.75) - summary_quantile(summary, 0.25)
+        width = 2 * iqr / np.cbrt(n)
+        bins = int(np.ceil((summary['max'] - summary['min']) / width)) if width > 0 else 20
+    else:
+        bins = 20
+    return int(np.clip(bins, 1, MAX_BINS))
+
+
+# Function to compute the bin edges of every column
+def histogram_edges(summaries, columns, rule="Fixed (20 bins)"):
+    return {col: np.linspace(summaries[col]['min'], summaries[col]['max'], bin_count(summaries[col], rule) + 1)
+            for col in columns}
+
+
+# Function to count values per bin for several columns in one vectorized pass.
+# `data` maps column name to values (a DataFrame or a dict of arrays both work);
+# counts are returned as int64 arrays and can be summed across chunks.
+def histogram_counts(data, edges):
+    columns = list(edges)
+    offsets = np.cumsum([0] + [len(edges[col]) - 1 for col in columns])
+
+    bin_ids = []
+    for i, col in enumerate(columns):
+        values = np.asarray(data[col], dtype=np.float64)
+        values = values[~np.isnan(values)]
+        col_edges = edges[col]
+        n_bins = len(col_edges) - 1
+        span = max(col_edges[-1] - col_edges[0], 1e-12)
+        # The last bin is closed on the right, like np.histogram
+        bins = np.clip(((values - col_edges[0]) / span * n_bins).astype(np.int64), 0, n_bins - 1)
+        bin_ids.append(bins + offsets[i])
+
+    counts = np.bincount(np.concatenate(bin_ids) if bin_ids else np.array([], dtype=np.int64),
+                         minlength=offsets[-1])
+    return {col: counts[offsets[i]:offsets[i + 1]] for i, col in enumerate(columns)}
+
+
+# Function to compute histograms for all columns: {column: (counts, edges)}
+def compute_histograms(data, summaries, columns, rule="Fixed (20 bins)"):
+    edges = histogram_edges(summaries, columns, rule)
+    counts = histogram_counts(data, edges)
+    return {col: (counts[col], edges[col]) for col in columns}
+
+
+# Function to flatten histograms into a long frame for st.bar_chart
+def histogram_chart_data(histograms):
+    frames = []
+    for col, (counts, edges) in histograms.items():
+        centers = (edges[:-1] + edges[1:]) / 2
+        frames.append(pd.DataFrame({'bin': np.round(centers, 3), 'count': counts, 'column': col}))
+    return pd.concat(frames, ignore_index=True)
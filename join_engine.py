@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from view_cache import compact_rows
+
+# Join engine behind the cross-entity breakdowns (tickets and sales by user
+# attributes such as subscription tier and country).
+# Users are the dimension side. Their string ids ("USER1042") are parsed once
+# into integer surrogate keys and a key -> row mapping is built over them:
+# a direct-address array when the keys are dense (the generated ids are), or
+# the sorted keys with their rows, probed with searchsorted (sort-merge join).
+# Ids that are not <prefix><number> fall back to a hash join on the strings.
+#
+# Joining a fact table (tickets, sales) maps every fact row to a user row in
+# one vectorized pass (-1 when there is no such user). The user attributes are
+# factorized to small integer codes, so a breakdown is a bincount over
+# codes[user_rows] instead of a string-key merge of the full tables.
+
+USER_KEY_PREFIX = 'USER'
+JOIN_DIMENSIONS = ['subscription', 'country']
+
+# Direct addressing while the key range is at most this many times the number of keys
+DENSE_FACTOR = 4
+
+# Label of the fact rows whose user is not in the user table
+UNKNOWN_LABEL = 'Unknown'
+
+
+# Function to parse "<prefix><number>" ids into integer keys (-1 where an id does not parse)
+def surrogate_keys(ids, prefix=USER_KEY_PREFIX):
+    # Missing ids (None / NaN) become nulls, which do not parse
+    ids = pa.array(np.asarray(ids, dtype=object), type=pa.string(), from_pandas=True)
+    digits = pc.utf8_slice_codeunits(ids, len(prefix))
+    valid = pc.fill_null(pc.and_(pc.starts_with(ids, prefix), pc.utf8_is_digit(digits)), False)
+    keys = pc.cast(pc.if_else(valid, digits, '-1'), pa.int64())
+    return keys.to_numpy(zero_copy_only=False)
+
+
+# Function to build the key -> row mapping of a dimension table; the first
+# row of a duplicated key wins, as in the hash join
+def build_key_index(keys):
+    if len(keys) == 0:
+        return {'kind': 'sorted', 'keys': keys, 'rows': compact_rows([], 0)}
+    low, high = int(keys.min()), int(keys.max())
+    if high - low + 1 <= DENSE_FACTOR * len(keys):
+        rows = np.full(high - low + 1, -1, dtype=compact_rows([], len(keys)).dtype)
+        # Repeated indices keep the last value assigned: assign last row first
+        rows[keys[::-1] - low] = np.arange(len(keys) - 1, -1, -1)
+        return {'kind': 'dense', 'low': low, 'rows': rows}
+    order = np.argsort(keys, kind='stable')
+    return {'kind': 'sorted', 'keys': keys[order], 'rows': compact_rows(order, len(keys))}
+
+
+# Function to look up the rows of fact keys (-1 where there is no match)
+def lookup_rows(key_index, keys):
+    rows = key_index['rows']
+    if key_index['kind'] == 'dense':
+        offsets = keys - key_index['low']
+        found = (offsets >= 0) & (offsets < len(rows))
+        result = np.full(len(keys), -1, dtype=rows.dtype)
+        result[found] = rows[offsets[found]]
+        return result
+
+    if len(rows) == 0:
+        return np.full(len(keys), -1, dtype=rows.dtype)
+    positions = np.minimum(np.searchsorted(key_index['keys'], keys), len(rows) - 1)
+    return np.where(key_index['keys'][positions] == keys, rows[positions], -1).astype(rows.dtype)
+
+
+# Function to build the join side of the user table: key -> row mapping and
+# the factorized attributes to break facts down by
+def build_user_join(user_df, dimensions=JOIN_DIMENSIONS):
+    keys = surrogate_keys(user_df['user_id'])
+    user_join = {'n_rows': len(user_df), 'key_index': None, 'id_index': None, 'dimensions': {}}
+    if (keys >= 0).all():
+        user_join['key_index'] = build_key_index(keys)
+    else:
+        # Hash join on the ids; the first row of a duplicated id wins
+        ids = pd.Index(user_df['user_id'])
+        first = ~ids.duplicated()
+        user_join['id_index'] = (ids[first], compact_rows(np.flatnonzero(first), len(user_df)))
+
+    for column in dimensions:
+        codes, labels = pd.factorize(user_df[column], sort=True)
+        user_join['dimensions'][column] = {'codes': codes.astype(np.int16 if len(labels) < 2 ** 15 else np.int64),
+                                           'labels': np.asarray(labels, dtype=object)}
+    return user_join
+
+
+# Function to join fact rows to users by their user ids; returns the user row of every fact row
+def join_rows(user_join, ids):
+    if user_join['key_index'] is not None:
+        return lookup_rows(user_join['key_index'], surrogate_keys(ids))
+    index, rows = user_join['id_index']
+    positions = index.get_indexer(ids)
+    return np.where(positions >= 0, rows[positions], -1)
+
+
+# Function to join tickets and sales (when they carry a user_id) to the users
+def build_entity_joins(user_df, ticket_df, sales_df=None, dimensions=JOIN_DIMENSIONS):
+    user_join = build_user_join(user_df, dimensions)
+    return {
+        'users': user_join,
+        'tickets': join_rows(user_join, ticket_df['user_id']),
+        'sales': join_rows(user_join, sales_df['user_id'])
+        if sales_df is not None and 'user_id' in sales_df.columns else None
+    }
+
+
+# Function to sum weights (or count rows) per dimension code; the last slot
+# holds the rows without a matching user
+def group_totals(user_join, dimension, user_rows, weights=None):
+    dimension = user_join['dimensions'][dimension]
+    n_labels = len(dimension['labels'])
+    codes = np.full(len(user_rows), n_labels, dtype=np.int64)
+    matched = user_rows >= 0
+    codes[matched] = dimension['codes'][user_rows[matched]]
+    codes[codes < 0] = n_labels
+    return np.bincount(codes, weights=weights, minlength=n_labels + 1)
+
+
+# Function to turn per-code totals into a frame with one row per dimension value
+def breakdown_frame(user_join, dimension, totals):
+    labels = np.append(user_join['dimensions'][dimension]['labels'], UNKNOWN_LABEL)
+    frame = pd.DataFrame({dimension: labels, **totals})
+    counts = frame[next(iter(totals))].to_numpy()
+    # The unknown row is only shown when some facts did not join
+    keep = np.ones(len(frame), dtype=bool)
+    keep[-1] = counts[-1] > 0
+    return frame[keep].reset_index(drop=True)
+
+
+# Function to get ticket volume and resolution time per user attribute
+def ticket_breakdown(user_join, dimension, ticket_df, ticket_user_rows):
+    is_resolved = ticket_df['resolved_date'].notna().to_numpy()
+    hours = ((ticket_df['resolved_date'] - ticket_df['created_date']).dt.total_seconds() / 3600).to_numpy()
+    resolved_rows = ticket_user_rows[is_resolved]
+
+    tickets = group_totals(user_join, dimension, ticket_user_rows).astype(np.int64)
+    resolved = group_totals(user_join, dimension, resolved_rows).astype(np.int64)
+    resolution_hours = group_totals(user_join, dimension, resolved_rows, hours[is_resolved])
+    avg_hours = resolution_hours / np.where(resolved > 0, resolved, np.nan)
+
+    return breakdown_frame(user_join, dimension, {
+        'tickets': tickets,
+        'open': tickets - resolved,
+        'resolved': resolved,
+        'avg_resolution_hours': avg_hours
+    })
+
+
+# Function to get revenue per user attribute from (user rows, revenue) batches,
+# so in-memory rows and streamed partitions share the same code
+def revenue_breakdown(user_join, dimension, batches):
+    revenue = np.zeros(len(user_join['dimensions'][dimension]['labels']) + 1)
+    orders = np.zeros_like(revenue)
+    for user_rows, batch_revenue in batches:
+        revenue += group_totals(user_join, dimension, user_rows, np.asarray(batch_revenue, dtype=np.float64))
+        orders += group_totals(user_join, dimension, user_rows)
+    return breakdown_frame(user_join, dimension, {'revenue': revenue, 'orders': orders.astype(np.int64)})
@@ -0,0 +1,387 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from data_generators import REGIONS, PRODUCTS, SUBSCRIPTIONS, ACTIVITY_LEVELS, TICKET_STATUSES, TICKET_PRIORITIES
+
+# The websocket client is only needed here, not by the dashboard itself
+try:
+    import websockets
+except ImportError:
+    sys.exit("loadtest.py needs the websockets package: pip install websockets")
+
+# Load test for the admin dashboard (Site-test.py).
+# Starts a local Streamlit server (through serve.py) and drives it with N
+# concurrent headless sessions speaking the browser's websocket protocol: each
+# session replays a scripted navigation / filter sequence, sending the same
+# widget states the frontend would, with a random think time between steps.
+# AppTest cannot be used for this: it runs one script at a time per process.
+#
+# Reported: rerun latency percentiles (request to script finished, and to the
+# first element), throughput, errors, and - from /proc on Linux - server CPU
+# and resident memory per session. Each run is saved as JSON together with
+# the git revision and the configuration (under RESULTS_DIR, outside the
+# repository, unless --out is given); --compare prints the change against an
+# earlier result, so capacity regressions show up between commits.
+#
+# Requires the websockets package (pip install websockets).
+#
+# Usage:
+#   python loadtest.py --sessions 100 --duration 60
+#   python loadtest.py --sessions 100 --duration 60 --compare <RESULTS_DIR>/<earlier run>.json
+#   DASHBOARD_DATA_DIR=data python loadtest.py --sessions 200 --no-prewarm
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.environ.get('DASHBOARD_LOADTEST_DIR',
+                             os.path.join(tempfile.gettempdir(), 'admin-dashboard-loadtest'))
+
+# Scripted user journeys: (widget type, label, value) steps, replayed in a loop
+SCENARIOS = {
+    'executive': [
+        ('radio', 'Navigation', 'Dashboard'),
+        ('selectbox', 'Date Range', 'Last 30 days'),
+        ('radio', 'Rolling average', '7 days'),
+        ('selectbox', 'Date Range', 'Last 90 days'),
+        ('radio', 'Rolling average', '30 days'),
+        ('selectbox', 'Date Range', 'Last 7 days'),
+    ],
+    'sales_analyst': [
+        ('radio', 'Navigation', 'Sales Analytics'),
+        ('selectbox', 'Group By', 'Week'),
+        ('multiselect', 'Select Regions', REGIONS[:2]),
+        ('multiselect', 'Select Products', PRODUCTS[1:4]),
+        ('selectbox', 'Date Range', 'Last 90 days'),
+        ('selectbox', 'Group By', 'Month'),
+        ('multiselect', 'Select Regions', REGIONS),
+    ],
+    'user_admin': [
+        ('radio', 'Navigation', 'User Management'),
+        ('multiselect', 'Subscription Type', SUBSCRIPTIONS[2:]),
+        ('multiselect', 'Activity Level', ACTIVITY_LEVELS[:1]),
+        ('number_input', 'Page', 2),
+        ('text_input', 'Search Users', 'User 1'),
+        ('text_input', 'Search Users', ''),
+        ('multiselect', 'Subscription Type', []),
+    ],
+    'support_agent': [
+        ('radio', 'Navigation', 'Support Tickets'),
+        ('multiselect', 'Status', TICKET_STATUSES[:2]),
+        ('multiselect', 'Priority', TICKET_PRIORITIES[2:]),
+        ('number_input', 'Page', 2),
+        ('text_input', 'Enter Ticket ID to View Details', 'TCK-1005'),
+        ('multiselect', 'Status', []),
+        ('selectbox', 'Date Range', 'Last 30 days'),
+    ],
+}
+
+
+# Function to set one widget value in a WidgetState (as the frontend encodes it)
+def widget_state(widget_type, widget_id, value):
+    ws = WidgetState()
+    ws.id = widget_id
+    if widget_type in ('radio', 'selectbox', 'text_input'):
+        ws.string_value = value
+    elif widget_type == 'multiselect':
+        ws.string_array_value.data[:] = value
+    elif widget_type == 'number_input':
+        ws.double_value = value
+    else:
+        raise ValueError(f"Unsupported widget type: {widget_type}")
+    return ws
+
+
+class Session:
+    def __init__(self, url, scenario, rng, think_time):
+        self.url = url
+        self.scenario = scenario
+        self.rng = rng
+        self.think_time = think_time
+        self.widgets = {}
+        self.states = {}
+        self.samples = []
+        self.errors = 0
+
+    # Send a rerun with the current widget states and wait for the script to finish
+    async def rerun(self, ws, step):
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+
+        start = time.perf_counter()
+        first_element = None
+        widgets = {}
+        await ws.send(msg.SerializeToString())
+        while True:
+            forward_msg = ForwardMsg()
+            forward_msg.ParseFromString(await ws.recv())
+            msg_type = forward_msg.WhichOneof('type')
+            if msg_type == 'script_finished':
+                break
+            if msg_type != 'delta' or forward_msg.delta.WhichOneof('type') != 'new_element':
+                continue
+
+            element = forward_msg.delta.new_element
+            element_type = element.WhichOneof('type')
+            if first_element is None:
+                first_element = time.perf_counter() - start
+            if element_type == 'exception':
+                self.errors += 1
+            elif element_type in ('radio', 'selectbox', 'multiselect', 'number_input', 'text_input'):
+                widget = getattr(element, element_type)
+                widgets[element_type, widget.label] = widget.id
+
+        self.widgets = widgets
+        self.samples.append({
+            'step': step,
+            'latency': time.perf_counter() - start,
+            'first_element': first_element if first_element is not None else np.nan,
+            'finished_at': time.time()
+        })
+
+    # Replay the scenario until the deadline
+    async def run(self, deadline):
+        async with websockets.connect(self.url, subprotocols=['streamlit'], max_size=None) as ws:
+            await self.rerun(ws, 'initial load')
+            while time.time() < deadline:
+                for widget_type, label, value in self.scenario:
+                    if time.time() >= deadline:
+                        return
+                    await asyncio.sleep(self.rng.exponential(self.think_time))
+                    widget_id = self.widgets.get((widget_type, label))
+                    if widget_id is None:
+                        self.errors += 1
+                        continue
+                    self.states[widget_id] = widget_state(widget_type, widget_id, value)
+                    await self.rerun(ws, f'{label} = {value}')
+
+
+# Function to read CPU seconds and resident memory (bytes) of a process from /proc
+def process_usage(pid):
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open(f'/proc/{pid}/statm') as f:
+            rss_pages = int(f.read().split()[1])
+    except (FileNotFoundError, IndexError):
+        return None
+    ticks = os.sysconf('SC_CLK_TCK')
+    return {'cpu_seconds': (int(fields[11]) + int(fields[12])) / ticks,
+            'rss_bytes': rss_pages * os.sysconf('SC_PAGE_SIZE')}
+
+
+# Function to find a free local port
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+# Function to start a Streamlit server for the app and wait until it is healthy
+def start_server(app, port, prewarm=True, timeout=120):
+    args = [sys.executable, os.path.join(APP_DIR, 'serve.py'), app,
+            '--server.headless', 'true', '--server.port', str(port),
+            '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false']
+    if not prewarm:
+        args.append('--no-prewarm')
+    server = subprocess.Popen(args, cwd=APP_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://localhost:{port}/_stcore/health', timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"Streamlit server did not start on port {port}")
+
+
+# Function to run N concurrent sessions and sample the server while they run
+async def run_sessions(url, sessions, duration, think_time, seed, pid=None, ramp_up=5.0):
+    master = np.random.default_rng(seed)
+    names = list(SCENARIOS)
+    clients = [Session(url, SCENARIOS[names[i % len(names)]], np.random.default_rng(master.integers(2 ** 32)),
+                       think_time)
+               for i in range(sessions)]
+
+    usage = []
+
+    async def sample():
+        while True:
+            if pid is not None and (current := process_usage(pid)) is not None:
+                usage.append(current)
+            await asyncio.sleep(0.5)
+
+    async def start(i, client, deadline):
+        # Spread the connects over the ramp-up period
+        await asyncio.sleep(ramp_up * i / max(sessions, 1))
+        await client.run(deadline)
+
+    sampler = asyncio.create_task(sample())
+    start_time = time.time()
+    deadline = start_time + ramp_up + duration
+    results = await asyncio.gather(*(start(i, client, deadline) for i, client in enumerate(clients)),
+                                   return_exceptions=True)
+    sampler.cancel()
+    failures = [str(result) for result in results if isinstance(result, Exception)]
+    return clients, usage, start_time, failures
+
+
+# Function to summarize latencies and server usage
+def summarize(clients, usage, baseline, start_time, duration, ramp_up, failures):
+    samples = [sample for client in clients for sample in client.samples]
+    latencies = np.array([sample['latency'] for sample in samples])
+    first = np.array([sample['first_element'] for sample in samples])
+    # Throughput over the steady-state window (after every session has connected)
+    steady = [sample for sample in samples if sample['finished_at'] >= start_time + ramp_up]
+
+    def percentiles(values):
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return {}
+        return {f'p{q}': float(np.percentile(values, q)) for q in (50, 90, 95, 99)} | {'max': float(values.max())}
+
+    summary = {
+        'reruns': len(samples),
+        'errors': sum(client.errors for client in clients) + len(failures),
+        'failed_sessions': len(failures),
+        'throughput_per_s': len(steady) / duration if duration else 0.0,
+        'latency_s': percentiles(latencies),
+        'first_element_s': percentiles(first),
+        'latency_by_step_p95_s': {}
+    }
+    by_step = {}
+    for sample in samples:
+        by_step.setdefault(sample['step'].split(' = ')[0], []).append(sample['latency'])
+    summary['latency_by_step_p95_s'] = {step: float(np.percentile(values, 95))
+                                        for step, values in sorted(by_step.items())}
+
+    if usage and baseline:
+        peak_rss = max(u['rss_bytes'] for u in usage)
+        cpu = usage[-1]['cpu_seconds'] - usage[0]['cpu_seconds']
+        wall = max(len(usage) - 1, 1) * 0.5
+        summary['server'] = {
+            'baseline_rss_mb': baseline['rss_bytes'] / 2 ** 20,
+            'peak_rss_mb': peak_rss / 2 ** 20,
+            'rss_per_session_mb': (peak_rss - baseline['rss_bytes']) / 2 ** 20 / len(clients),
+            'cpu_utilization': cpu / wall,
+            'cpu_ms_per_rerun': cpu * 1000 / len(samples) if samples else 0.0
+        }
+    return summary
+
+
+# Function to describe the tree the run measured
+def git_revision():
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=APP_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return revision + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+# Function to flatten nested metrics into {'a.b': value}
+def flatten(metrics, prefix=''):
+    flat = {}
+    for key, value in metrics.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{key}.'))
+        elif isinstance(value, (int, float)):
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+# Function to print a comparison with an earlier result
+def compare(result, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    if baseline['config'] != result['config']:
+        print("Warning: the runs used different configurations")
+    old, new = flatten(baseline['summary']), flatten(result['summary'])
+    print(f"\n{'metric':<44} {baseline['revision']:>12} {result['revision']:>12} {'change':>8}")
+    for key in sorted(set(old) & set(new)):
+        change = f"{(new[key] - old[key]) / old[key] * 100:+.1f}%" if old[key] else ""
+        print(f"{key:<44} {old[key]:>12.4g} {new[key]:>12.4g} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the admin dashboard with concurrent sessions")
+    parser.add_argument('--app', default='Site-test.py')
+    parser.add_argument('--sessions', type=int, default=50, help="Concurrent sessions")
+    parser.add_argument('--duration', type=float, default=60, help="Measured seconds (after ramp-up)")
+    parser.add_argument('--ramp-up', type=float, default=5, help="Seconds over which sessions connect")
+    parser.add_argument('--think-time', type=float, default=1.0, help="Mean seconds between interactions")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--url', help="Test a running server (ws://host:port/_stcore/stream) instead")
+    parser.add_argument('--pid', type=int, help="Server process to sample when using --url")
+    parser.add_argument('--no-prewarm', action='store_true', help="Start the server without prewarming")
+    parser.add_argument('--compare', help="Earlier result JSON to compare with")
+    parser.add_argument('--out', help=f"Result file (default: {RESULTS_DIR}/<revision>-<time>.json)")
+    args = parser.parse_args()
+
+    server = None
+    pid = args.pid
+    url = args.url
+    if url is None:
+        port = free_port()
+        server = start_server(args.app, port, prewarm=not args.no_prewarm)
+        pid = server.pid
+        url = f'ws://localhost:{port}/_stcore/stream'
+
+    try:
+        # One warm-up session loads the data, so the baseline memory excludes it
+        asyncio.run(run_sessions(url, 1, 0, 0, args.seed, ramp_up=0))
+        baseline = process_usage(pid) if pid else None
+        clients, usage, start_time, failures = asyncio.run(run_sessions(
+            url, args.sessions, args.duration, args.think_time, args.seed, pid, args.ramp_up))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    result = {
+        'revision': git_revision(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'config': {
+            'app': args.app,
+            'sessions': args.sessions,
+            'duration': args.duration,
+            'ramp_up': args.ramp_up,
+            'think_time': args.think_time,
+            'seed': args.seed,
+            'prewarm': not args.no_prewarm,
+            'data': {key: os.environ[key] for key in sorted(os.environ) if key.startswith('DASHBOARD_')}
+        },
+        'summary': summarize(clients, usage, baseline, start_time, args.duration, args.ramp_up, failures)
+    }
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{result['revision']}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    print(json.dumps(result['summary'], indent=2))
+    if failures:
+        print(f"{len(failures)} sessions failed, first error: {failures[0]}")
+    print(f"Saved {out}")
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import argparse
+import hashlib
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import data_generators
+
+# Scale-out generator for the admin dashboard datasets.
+# The key space is split into tasks (month ranges for sales, ID ranges for
+# users and tickets) that run in a process pool. Every task gets its own RNG
+# stream derived from (seed, dataset, task number), so the output does not
+# depend on the number of workers. Results are written as month-partitioned
+# Parquet files:
+#
+#   <out>/sales/month=2024-01/part-00000.parquet
+#   <out>/users/month=2024-01/part-00003.parquet
+#   <out>/tickets/month=2024-02/part-00001.parquet
+#
+# Usage:
+#   python partitioned_data.py --out data --days 3650 --users 10000000 --tickets 2000000 --workers 8
+
+DATASET_IDS = {'sales': 0, 'users': 1, 'tickets': 2}
+
+# Column used to pick the month partition of each row
+PARTITION_COLUMNS = {'sales': 'date', 'users': 'join_date', 'tickets': 'created_date'}
+
+
+# Function to derive an independent, reproducible RNG stream for one task
+def task_seed(seed, dataset, task_no):
+    return np.random.SeedSequence([seed, DATASET_IDS[dataset], task_no])
+
+
+# Function to write one generated frame into its month partitions
+def write_partitions(df, out_dir, dataset, task_no):
+    months = df[PARTITION_COLUMNS[dataset]].dt.strftime('%Y-%m')
+    written = 0
+    for month, part in df.groupby(months, sort=True):
+        part_dir = os.path.join(out_dir, dataset, f'month={month}')
+        os.makedirs(part_dir, exist_ok=True)
+        part.reset_index(drop=True).to_parquet(os.path.join(part_dir, f'part-{task_no:05d}.parquet'), index=False)
+        written += len(part)
+    return written
+
+
+# Function run in a worker process for a single task
+def run_task(task):
+    out_dir, dataset, task_no, seed, now, args = task
+    rng_seed = task_seed(seed, dataset, task_no)
+
+    if dataset == 'sales':
+        start_date, end_date, num_users = args
+        df = data_generators.generate_sales_data(seed=rng_seed, start_date=start_date, end_date=end_date,
+                                                 num_users=num_users)
+    elif dataset == 'users':
+        id_offset, count, _ = args
+        df = data_generators.generate_user_data(count, seed=rng_seed, id_offset=id_offset, now=now)
+    else:
+        id_offset, count, num_users = args
+        df = data_generators.generate_tickets(count, seed=rng_seed, id_offset=id_offset, now=now,
+                                              num_users=num_users)
+
+    return dataset, write_partitions(df, out_dir, dataset, task_no)
+
+
+# Function to split the key space of every dataset into tasks
+def plan_tasks(out_dir, days, num_users, num_tickets, chunk_size, seed, now):
+    tasks = []
+
+    # Sales: one task per calendar month of the date range
+    dates = pd.date_range(start=now - timedelta(days=days), end=now, freq='D')
+    for task_no, (_, month_dates) in enumerate(dates.to_series().groupby(dates.to_period('M'))):
+        tasks.append((out_dir, 'sales', task_no, seed, now, (month_dates.iloc[0], month_dates.iloc[-1], num_users)))
+
+    # Users and tickets: contiguous ID ranges of `chunk_size` rows
+    for dataset, total in [('users', num_users), ('tickets', num_tickets)]:
+        for task_no, id_offset in enumerate(range(0, total, chunk_size)):
+            tasks.append((out_dir, dataset, task_no, seed, now,
+                          (id_offset, min(chunk_size, total - id_offset), num_users)))
+
+    return tasks
+
+
+# Function to generate all datasets into `out_dir` using a process pool
+def generate_partitioned(out_dir, days=365, num_users=1000, num_tickets=200,
+                         chunk_size=1_000_000, workers=None, seed=0, now=None):
+    now = now if now is not None else datetime.now()
+    tasks = plan_tasks(out_dir, days, num_users, num_tickets, chunk_size, seed, now)
+
+    # Regenerating into an existing directory replaces the datasets, so no
+    # months of an earlier, longer range are left behind
+    for dataset in DATASET_IDS:
+        shutil.rmtree(os.path.join(out_dir, dataset), ignore_errors=True)
+
+    rows = {dataset: 0 for dataset in DATASET_IDS}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for dataset, written in pool.map(run_task, tasks):
+            rows[dataset] += written
+    return rows
+
+
+# Function to list the month partitions of a dataset that overlap a date range
+def list_partitions(data_dir, dataset, start_date=None, end_date=None):
+    dataset_dir = os.path.join(data_dir, dataset)
+    if not os.path.isdir(dataset_dir):
+        return []
+
+    start_month = pd.Timestamp(start_date).to_period('M') if start_date is not None else None
+    end_month = pd.Timestamp(end_date).to_period('M') if end_date is not None else None
+
+    files = []
+    for name in sorted(os.listdir(dataset_dir)):
+        if not name.startswith('month='):
+            continue
+        month = pd.Period(name[len('month='):], freq='M')
+        if (start_month is not None and month < start_month) or (end_month is not None and month > end_month):
+            continue
+        part_dir = os.path.join(dataset_dir, name)
+        files.extend(os.path.join(part_dir, f) for f in sorted(os.listdir(part_dir)) if f.endswith('.parquet'))
+    return files
+
+
+# Function to get a short key identifying the users and tickets of a data
+# directory (partition paths, sizes and modification times), without reading
+# them; it changes when the data is regenerated (see shared_data.dataset_key)
+def partitions_key(data_dir):
+    stats = [(os.path.relpath(path, data_dir), os.path.getsize(path), os.path.getmtime(path))
+             for dataset in ['users', 'tickets'] for path in list_partitions(data_dir, dataset)]
+    return hashlib.sha256(repr(stats).encode()).hexdigest()[:16]
+
+
+# Function to read a dataset, touching only the partitions inside the date range
+def load_partitions(data_dir, dataset, start_date=None, end_date=None, columns=None):
+    files = list_partitions(data_dir, dataset, start_date, end_date)
+    if not files:
+        return pd.DataFrame(columns=columns)
+    return pd.concat([pd.read_parquet(f, columns=columns) for f in files], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate partitioned admin dashboard datasets")
+    parser.add_argument('--out', required=True, help="Output directory")
+    parser.add_argument('--days', type=int, default=365, help="Days of sales history")
+    parser.add_argument('--users', type=int, default=1000, help="Number of users")
+    parser.add_argument('--tickets', type=int, default=200, help="Number of tickets")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000, help="Rows per user/ticket task")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--seed', type=int, default=0, help="Base random seed")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = generate_partitioned(args.out, args.days, args.users, args.tickets,
+                                args.chunk_size, args.workers, args.seed)
+    elapsed = time.perf_counter() - start
+
+    for dataset, count in rows.items():
+        print(f"{dataset}: {count:,} rows")
+    print(f"Finished in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
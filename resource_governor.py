@@ -0,0 +1,312 @@
+import inspect
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from shared_data import write_atomic, write_json
+from event_log import RETENTION_PERIODS
+
+# Resource governance for long-running dashboard servers.
+# The Settings page values are persisted to a JSON file and drive three
+# limits, enforced by a background thread (and on every new cache entry):
+#
+#  * Cache byte budget: the cached loaders of dashboard_data.py are wrapped
+#    with governed(), which records the size of every entry they create.
+#    When the total exceeds the budget, entries are cleared least-valuable
+#    first - table views and summaries, then indexes and aggregates, then
+#    whole datasets - in LRU order within each tier. Entries used in the last
+#    RECENT_USE_SECONDS are the working set and are never cleared. The view
+#    cache has its own budget (ViewCache.resize).
+#  * Session timeout: sessions idle for longer than the timeout get their
+#    session state cleared and are told so on their next rerun.
+#  * Retention: the events older than the retention period are dropped from
+#    the event log of every dataset (add_event_log) every RETENTION_INTERVAL
+#    seconds and whenever settings are saved.
+
+DEFAULT_SETTINGS_PATH = os.environ.get('DASHBOARD_SETTINGS',
+                                       os.path.join(tempfile.gettempdir(), 'admin-dashboard-settings.json'))
+DEFAULT_SETTINGS = {
+    'theme': 'Light',
+    'date_format': 'MM/DD/YYYY',
+    'time_zone': 'UTC',
+    'language': 'English',
+    'session_timeout_minutes': 30,
+    'enable_analytics': True,
+    'retention_period': '30 days',
+    'backup_schedule': 'Daily',
+    'backup_location': os.path.join(tempfile.gettempdir(), 'admin-dashboard-backups'),
+    'automatic_backups': False,
+    'cache_budget_mb': 1024,
+    'view_cache_mb': 64
+}
+MAINTENANCE_INTERVAL = 30
+RETENTION_INTERVAL = 3600
+RECENT_USE_SECONDS = 60
+
+# Eviction tiers: lower tiers are cheaper to rebuild and are cleared first
+TIER_VIEWS = 0
+TIER_DERIVED = 1
+TIER_DATASETS = 2
+TIER_NAMES = {TIER_VIEWS: 'Views', TIER_DERIVED: 'Indexes & aggregates', TIER_DATASETS: 'Datasets'}
+
+
+# Function to read the persisted settings (defaults for anything missing)
+def load_settings(path=DEFAULT_SETTINGS_PATH):
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        saved = {}
+    return {**DEFAULT_SETTINGS, **{key: value for key, value in saved.items() if key in DEFAULT_SETTINGS}}
+
+
+def save_settings(settings, path=DEFAULT_SETTINGS_PATH):
+    write_atomic(path, lambda tmp_path: write_json(tmp_path, settings))
+
+
+# Function to estimate the memory held by a cached value
+def nbytes(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(index=True, deep=True)))
+    if isinstance(value, pd.Index):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (np.ndarray, pa.Table, pa.RecordBatch, pa.Array, pa.ChunkedArray)):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sum(nbytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+# Function to get the resident set size of this process (None where /proc is missing)
+def process_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+class CacheBudget:
+    def __init__(self, max_bytes=DEFAULT_SETTINGS['cache_budget_mb'] * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.caches = {}
+        self.bytes = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    # Decorator for a st.cache_resource / st.cache_data function: records the
+    # size of every entry so it can be cleared when over budget
+    def track(self, name, tier):
+        def decorate(cached_func):
+            parameters = list(inspect.signature(cached_func).parameters)
+            # Unhashed (underscore) arguments do not take part in the cache key
+            hidden = {parameter for parameter in parameters if parameter.startswith('_')}
+            max_entries = getattr(getattr(cached_func, '_info', None), 'max_entries', None)
+            self.caches[name] = {'func': cached_func, 'tier': tier, 'max_entries': max_entries}
+
+            def governed_func(*args, **kwargs):
+                value = cached_func(*args, **kwargs)
+                clear_args = tuple(None if i < len(parameters) and parameters[i] in hidden else arg
+                                   for i, arg in enumerate(args))
+                clear_kwargs = {key: None if key in hidden else arg for key, arg in kwargs.items()}
+                key = (name, repr(clear_args), repr(sorted(clear_kwargs.items())))
+                self.touch(key, name, tier, value, clear_args, clear_kwargs)
+                return value
+
+            governed_func.clear = cached_func.clear
+            governed_func.__wrapped__ = cached_func
+            return governed_func
+        return decorate
+
+    # Record a use of an entry; new entries are sized and may push others out
+    def touch(self, key, name, tier, value, clear_args, clear_kwargs):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry['last_used'] = time.monotonic()
+                self.entries.move_to_end(key)
+                return
+        size = nbytes(value)
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = {'name': name, 'tier': tier, 'bytes': size, 'last_used': time.monotonic(),
+                                 'clear_args': clear_args, 'clear_kwargs': clear_kwargs}
+            self.bytes += size
+
+            # The cache itself drops its least recently used entry past max_entries
+            max_entries = self.caches[name]['max_entries']
+            if max_entries:
+                keys = [entry_key for entry_key, entry in self.entries.items() if entry['name'] == name]
+                for entry_key in keys[:max(len(keys) - max_entries, 0)]:
+                    self.bytes -= self.entries.pop(entry_key)['bytes']
+        self.enforce()
+
+    # Clear entries until the budget is met; returns the number cleared
+    def enforce(self):
+        with self.lock:
+            if self.bytes <= self.max_bytes:
+                return 0
+            cutoff = time.monotonic() - RECENT_USE_SECONDS
+            candidates = sorted(((entry['tier'], position, key) for position, (key, entry)
+                                 in enumerate(self.entries.items()) if entry['last_used'] < cutoff))
+            victims = []
+            excess = self.bytes - self.max_bytes
+            for _, _, key in candidates:
+                if excess <= 0:
+                    break
+                entry = self.entries.pop(key)
+                self.bytes -= entry['bytes']
+                excess -= entry['bytes']
+                victims.append(entry)
+            self.evictions += len(victims)
+
+        for entry in victims:
+            self.caches[entry['name']]['func'].clear(*entry['clear_args'], **entry['clear_kwargs'])
+        return len(victims)
+
+    def resize(self, max_bytes):
+        self.max_bytes = max_bytes
+        return self.enforce()
+
+    # Function to report entries and bytes per cache
+    def report(self):
+        with self.lock:
+            entries = list(self.entries.values())
+        rows = {name: {'cache': name, 'tier': TIER_NAMES[cache['tier']], 'entries': 0, 'bytes': 0}
+                for name, cache in self.caches.items()}
+        for entry in entries:
+            rows[entry['name']]['entries'] += 1
+            rows[entry['name']]['bytes'] += entry['bytes']
+        return pd.DataFrame(list(rows.values()), columns=['cache', 'tier', 'entries', 'bytes'])
+
+
+# Cache budget shared by every governed loader of the process
+CACHE_BUDGET = CacheBudget()
+governed = CACHE_BUDGET.track
+
+
+class ResourceGovernor:
+    def __init__(self, view_cache, cache_budget=CACHE_BUDGET, settings_path=DEFAULT_SETTINGS_PATH):
+        self.view_cache = view_cache
+        self.event_logs = []
+        self.cache_budget = cache_budget
+        self.settings_path = settings_path
+        self.settings = load_settings(settings_path)
+        self.sessions = {}
+        self.expired = {}
+        self.expired_sessions = 0
+        self.last_retention = 0.0
+        self.lock = threading.Lock()
+        self.apply()
+        self.thread = threading.Thread(target=self.run, name='resource-governor', daemon=True)
+        self.thread.start()
+
+    # Save new settings and enforce them right away
+    def save(self, settings):
+        self.settings = {**self.settings, **settings}
+        save_settings(self.settings, self.settings_path)
+        self.apply()
+        return self.apply_retention()
+
+    def apply(self):
+        self.view_cache.resize(self.settings['view_cache_mb'] * 1024 * 1024)
+        self.cache_budget.resize(self.settings['cache_budget_mb'] * 1024 * 1024)
+
+    # Put an event log under the retention setting (one log per dataset)
+    def add_event_log(self, event_log):
+        with self.lock:
+            self.event_logs.append(event_log)
+        event_log.apply_retention(RETENTION_PERIODS.get(self.settings['retention_period']))
+
+    def apply_retention(self):
+        self.last_retention = time.monotonic()
+        with self.lock:
+            event_logs = list(self.event_logs)
+        return sum(event_log.apply_retention(RETENTION_PERIODS.get(self.settings['retention_period']))
+                   for event_log in event_logs)
+
+    # Record activity of the current session; True if its state was cleared for inactivity
+    def touch_session(self):
+        ctx = get_script_run_ctx()
+        if ctx is None:
+            return False
+        with self.lock:
+            self.sessions[ctx.session_id] = (time.monotonic(), ctx.session_state)
+            return self.expired.pop(ctx.session_id, None) is not None
+
+    # Clear the state of sessions idle for longer than the timeout
+    def sweep_sessions(self):
+        now = time.monotonic()
+        timeout = self.settings['session_timeout_minutes'] * 60
+        with self.lock:
+            idle = [(session_id, state) for session_id, (last_seen, state) in self.sessions.items()
+                    if now - last_seen > timeout]
+            for session_id, _ in idle:
+                del self.sessions[session_id]
+                self.expired[session_id] = now
+            # Sessions that never came back are forgotten after a day
+            self.expired = {session_id: since for session_id, since in self.expired.items()
+                            if now - since < 24 * 3600}
+            self.expired_sessions += len(idle)
+        for _, state in idle:
+            for key in list(state.filtered_state):
+                del state[key]
+        return len(idle)
+
+    def maintain(self):
+        self.sweep_sessions()
+        self.cache_budget.enforce()
+        if time.monotonic() - self.last_retention > RETENTION_INTERVAL:
+            self.apply_retention()
+
+    def run(self):
+        while True:
+            time.sleep(MAINTENANCE_INTERVAL)
+            try:
+                self.maintain()
+            except Exception:
+                logging.getLogger(__name__).exception("Resource maintenance failed")
+
+    # Function to report the memory held per cache (governed loaders, view cache, event log)
+    def memory_report(self):
+        report = self.cache_budget.report()
+        view_stats = self.view_cache.stats()
+        with self.lock:
+            event_logs = list(self.event_logs)
+        extra = pd.DataFrame([
+            {'cache': 'Filtered views', 'tier': 'Views', 'entries': view_stats['entries'],
+             'bytes': view_stats['bytes']},
+            {'cache': 'Event log tail', 'tier': 'Event log',
+             'entries': sum(event_log.stats()['tail'] for event_log in event_logs),
+             'bytes': sum(nbytes(event_log.tail) for event_log in event_logs)}
+        ])
+        report = pd.concat([report, extra], ignore_index=True)
+        report['MB'] = report.pop('bytes') / 1024 / 1024
+        return report.sort_values('MB', ascending=False).reset_index(drop=True)
+
+    def stats(self):
+        with self.lock:
+            sessions = len(self.sessions)
+        return {
+            'sessions': sessions,
+            'expired_sessions': self.expired_sessions,
+            'cache_bytes': self.cache_budget.bytes,
+            'cache_max_bytes': self.cache_budget.max_bytes,
+            'cache_evictions': self.cache_budget.evictions,
+            'rss': process_rss()
+        }
+
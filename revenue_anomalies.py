@@ -0,0 +1,261 @@
+import numpy as np
+import pandas as pd
+
+# Anomaly and trend detection over daily revenue per product x region.
+# All series live in one (series x day) matrix, so every statistic is a
+# vectorized NumPy expression over all series at once - there is no Python
+# loop per series, only one per *new* day for the EWMA recurrence.
+#
+# For each series and day the expected revenue is
+#     seasonal baseline (least-squares fit of a linear trend plus yearly
+#     harmonics, shared design matrix -> one lstsq for all series)
+#   + EWMA of the deseasonalized residual up to the previous day,
+# and the deviation is scored against the rolling standard deviation of the
+# residual over the trailing WINDOW days. Days with |z| > Z_THRESHOLD are
+# flagged. New rows are folded in with add_revenue(), which also updates the
+# normal-equation sums of the baseline fit (X'X gains the days added to the
+# range, X'y the revenue added on the batch's days); the trend is measured
+# from a fixed origin day, so the sums stay valid when the range grows.
+# refresh_anomalies() then solves the small (features x features) system and
+# recomputes the rolling statistics, EWMA and flags only from the earliest
+# day that changed - results for earlier days are kept as they were. The
+# residual those use is taken against the new fit: the rolling window reads
+# the WINDOW days before, and the EWMA is rerun from EWMA_WARMUP days before,
+# where the weight of anything earlier has decayed below (1 - EWMA_ALPHA) **
+# EWMA_WARMUP (< 1e-9). So the days that changed match a from-scratch build of
+# the same rows, and neither step touches the full history.
+
+WINDOW = 28
+EWMA_ALPHA = 0.3
+EWMA_WARMUP = 64
+Z_THRESHOLD = 3.0
+MIN_HISTORY = 14
+SEASONAL_HARMONICS = 2
+N_FEATURES = 2 + 2 * SEASONAL_HARMONICS
+STAT_ARRAYS = ['seasonal', 'rolling_mean', 'rolling_std', 'ewma', 'expected', 'zscore']
+
+
+# Function to create an empty anomaly state
+def empty_revenue_series():
+    state = {
+        'start': None,
+        'origin': None,
+        'keys': pd.MultiIndex.from_arrays([[], []], names=['product', 'region']),
+        'revenue': np.zeros((0, 0)),
+        'anomaly': np.zeros((0, 0), dtype=bool),
+        'trend': np.zeros(0),
+        'xtx': np.zeros((N_FEATURES, N_FEATURES)),
+        'xty': np.zeros((N_FEATURES, 0)),
+        'dirty_from': None
+    }
+    state.update({name: np.zeros((0, 0), dtype=np.float32) for name in STAT_ARRAYS})
+    return state
+
+
+# Function to pad a (series x day) array to a new shape
+def grow(values, n_series, n_days, offset, fill):
+    grown = np.full((n_series, n_days), fill, dtype=values.dtype)
+    grown[:values.shape[0], offset:offset + values.shape[1]] = values
+    return grown
+
+
+# Function to fold a batch of sales rows (date, product, region, revenue) into the state
+def add_revenue(state, sales):
+    days = np.asarray(pd.to_datetime(sales['date'])).astype('datetime64[D]')
+    revenue = np.asarray(sales['revenue'], dtype=np.float64)
+    if len(days) == 0:
+        return state
+
+    # Series ids, appending product x region pairs seen for the first time
+    batch_keys = pd.MultiIndex.from_arrays([np.asarray(sales['product']), np.asarray(sales['region'])],
+                                           names=['product', 'region'])
+    keys = state['keys']
+    new_keys = batch_keys[keys.get_indexer(batch_keys) < 0].unique()
+    if len(new_keys):
+        keys = keys.append(new_keys).set_names(['product', 'region'])
+    series = keys.get_indexer(batch_keys)
+
+    # Day range covering the old state and the batch
+    old_start = state['start']
+    old_days = state['revenue'].shape[1]
+    start = days.min() if old_start is None else min(days.min(), old_start)
+    end = days.max() if old_start is None else max(days.max(), old_start + old_days - 1)
+    n_days = int((end - start).astype(np.int64)) + 1
+    offset = 0 if old_start is None else int((old_start - start).astype(np.int64))
+
+    n_series = len(keys)
+    day_index = (days - start).astype(np.int64)
+    added = np.bincount(series * n_days + day_index, weights=revenue,
+                        minlength=n_series * n_days).reshape(n_series, n_days)
+
+    # Normal-equation sums: X'X over the days added before / after the old
+    # range, X'y over the revenue added on the batch's days
+    origin = start if state['origin'] is None else state['origin']
+    xtx = state['xtx'].copy()
+    for first, count in [(0, offset), (offset + old_days, n_days - offset - old_days)]:
+        if count > 0:
+            features = seasonal_features(origin, start + np.arange(first, first + count))
+            xtx += features.T @ features
+    xty = np.concatenate([state['xty'], np.zeros((N_FEATURES, n_series - state['xty'].shape[1]))], axis=1)
+    touched = np.unique(day_index)
+    xty += seasonal_features(origin, start + touched).T @ added[:, touched].T
+
+    new_state = {
+        'start': start,
+        'origin': origin,
+        'keys': keys,
+        'revenue': grow(state['revenue'], n_series, n_days, offset, 0.0) + added,
+        'anomaly': grow(state['anomaly'], n_series, n_days, offset, False),
+        'trend': np.concatenate([state['trend'], np.full(n_series - len(state['trend']), np.nan)]),
+        'xtx': xtx,
+        'xty': xty
+    }
+    new_state.update({name: grow(state[name], n_series, n_days, offset, np.nan) for name in STAT_ARRAYS})
+
+    # Earlier start or new series: everything is recomputed; otherwise from the first touched day
+    dirty_from = int(day_index.min())
+    if offset or len(new_keys):
+        dirty_from = 0
+    if state['dirty_from'] is not None:
+        dirty_from = min(dirty_from, state['dirty_from'] + offset)
+    new_state['dirty_from'] = dirty_from
+    return new_state
+
+
+# Function to build the seasonal design rows of the given days: intercept,
+# linear trend (in years since the origin day) and yearly harmonics
+def seasonal_features(origin, days):
+    days = np.asarray(days, dtype='datetime64[D]')
+    t = (days - origin).astype(np.float64) / 365.25
+    day_of_year = pd.DatetimeIndex(days).day_of_year.to_numpy()
+    columns = [np.ones(len(days)), t]
+    for k in range(1, SEASONAL_HARMONICS + 1):
+        angle = 2 * np.pi * k * day_of_year / 365.25
+        columns += [np.sin(angle), np.cos(angle)]
+    return np.column_stack(columns)
+
+
+# Function to recompute baselines and anomaly flags for the days that changed
+def refresh_anomalies(state):
+    d0 = state['dirty_from']
+    if d0 is None:
+        return state
+    state = dict(state)
+    y = state['revenue']
+    n_series, n_days = y.shape
+
+    # Seasonal baseline: solve the normal equations for all series at once,
+    # evaluated only from the first day the rolling window and the EWMA need
+    coef, *_ = np.linalg.lstsq(state['xtx'], state['xty'], rcond=None)
+    state['trend'] = coef[1] / 365.25
+    lo = max(d0 - max(WINDOW, EWMA_WARMUP), 0)
+    baseline = (seasonal_features(state['origin'], state['start'] + np.arange(lo, n_days)) @ coef).T
+    seasonal = baseline[:, d0 - lo:]
+
+    # Rolling mean / std of the residual over the WINDOW days before each day
+    residual = y[:, lo:] - baseline
+    prefix = np.concatenate([np.zeros((n_series, 1)), np.cumsum(residual, axis=1)], axis=1)
+    prefix_sq = np.concatenate([np.zeros((n_series, 1)), np.cumsum(residual ** 2, axis=1)], axis=1)
+    ends = np.arange(d0, n_days) - lo
+    starts = np.maximum(ends - WINDOW, 0)
+    count = ends - starts
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (prefix[:, ends] - prefix[:, starts]) / count
+        var = (prefix_sq[:, ends] - prefix_sq[:, starts]) / count - mean ** 2
+    std = np.sqrt(np.maximum(var, 0))
+
+    # EWMA of the residual under the new fit, warmed up from day lo
+    ewma = np.empty((n_series, n_days - d0))
+    expected_residual = np.empty_like(ewma)
+    previous = residual[:, 0]
+    for d in range(lo, n_days):
+        if d >= d0:
+            expected_residual[:, d - d0] = previous
+        previous = EWMA_ALPHA * residual[:, d - lo] + (1 - EWMA_ALPHA) * previous
+        if d >= d0:
+            ewma[:, d - d0] = previous
+
+    expected = seasonal + expected_residual
+    with np.errstate(invalid='ignore', divide='ignore'):
+        zscore = np.where(std > 1e-9, (y[:, d0:] - expected) / std, 0.0)
+    zscore[:, count < MIN_HISTORY] = np.nan
+
+    for name, values in [('seasonal', seasonal), ('rolling_mean', seasonal + mean),
+                         ('rolling_std', std), ('ewma', seasonal + ewma),
+                         ('expected', expected), ('zscore', zscore)]:
+        state[name] = state[name].copy()
+        state[name][:, d0:] = values
+    state['anomaly'] = state['anomaly'].copy()
+    state['anomaly'][:, d0:] = np.abs(np.nan_to_num(zscore)) > Z_THRESHOLD
+    state['dirty_from'] = None
+    return state
+
+
+# Function to build the state from an iterable of sales batches
+def build_revenue_anomalies(batches):
+    state = empty_revenue_series()
+    for batch in batches:
+        if len(batch):
+            state = add_revenue(state, batch)
+    return refresh_anomalies(state)
+
+
+# Function to get the day positions and the series mask of a query
+def selection(state, since=None, products=None, regions=None):
+    n_days = state['revenue'].shape[1]
+    first_day = 0
+    if since is not None and state['start'] is not None:
+        first_day = int(np.clip((np.datetime64(pd.Timestamp(since).date(), 'D') - state['start']).astype(np.int64),
+                                0, n_days))
+    keys = state['keys']
+    series_mask = np.ones(len(keys), dtype=bool)
+    if products is not None:
+        series_mask &= np.asarray(keys.get_level_values('product').isin(products))
+    if regions is not None:
+        series_mask &= np.asarray(keys.get_level_values('region').isin(regions))
+    return first_day, series_mask
+
+
+# Function to list the flagged (series, day) cells, newest first
+def anomaly_table(state, since=None, products=None, regions=None):
+    first_day, series_mask = selection(state, since, products, regions)
+    flagged = state['anomaly'][:, first_day:] & series_mask[:, None]
+    series, days = np.nonzero(flagged)
+    days = days + first_day
+
+    table = pd.DataFrame({
+        'date': pd.to_datetime(state['start'] + days) if state['start'] is not None else pd.Series(dtype='datetime64[ns]'),
+        'product': state['keys'].get_level_values('product')[series],
+        'region': state['keys'].get_level_values('region')[series],
+        'revenue': state['revenue'][series, days],
+        'expected': state['expected'][series, days].astype(np.float64),
+        'zscore': state['zscore'][series, days].astype(np.float64)
+    })
+    order = np.lexsort((-np.abs(table['zscore'].to_numpy()), -days))
+    return table.iloc[order].reset_index(drop=True)
+
+
+# Function to get the fitted trend of every series, in revenue per day
+def trend_table(state, products=None, regions=None):
+    _, series_mask = selection(state, None, products, regions)
+    keys = state['keys'][series_mask]
+    return pd.DataFrame({
+        'product': keys.get_level_values('product'),
+        'region': keys.get_level_values('region'),
+        'trend_per_day': state['trend'][series_mask]
+    }).sort_values('trend_per_day', ascending=False).reset_index(drop=True)
+
+
+# Function to place anomalies on a chart line. `line_data` holds the plotted
+# points (time_col, revenue and the `by` columns); one marker is returned per
+# point that has anomalies, labelled with the flagged series.
+def anomaly_markers(anomalies, line_data, time_col='date', by=()):
+    by = list(by)
+    labels = anomalies.assign(label=[
+        f"{product} / {region}: ${revenue:,.0f} vs ${expected:,.0f} expected ({zscore:+.1f}σ)"
+        for product, region, revenue, expected, zscore in anomalies[
+            ['product', 'region', 'revenue', 'expected', 'zscore']].itertuples(index=False)
+    ])
+    labels = labels.groupby(['date'] + by)['label'].agg('<br>'.join).reset_index()
+    line = line_data.assign(date_key=pd.to_datetime(line_data[time_col]).dt.normalize())
+    return line.merge(labels.rename(columns={'date': 'date_key'}), on=['date_key'] + by)
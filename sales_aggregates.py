@@ -0,0 +1,124 @@
+import pandas as pd
+import pyarrow.parquet as pq
+
+from partitioned_data import list_partitions
+
+# Sales aggregates for the Dashboard and Sales Analytics pages.
+# Aggregation is split into a per-batch step and a merge step, so the same code
+# serves an in-memory frame (a single batch) and an out-of-core scan over
+# month-partitioned Parquet files, where peak memory is bounded by the batch
+# size and the number of groups rather than by the length of the history.
+
+SALES_COLUMNS = ['date', 'product', 'region', 'quantity', 'revenue']
+
+# Number of batch partials collected before they are merged
+MERGE_EVERY = 64
+
+
+# Function to get the time bucket of each row for the selected grouping
+def time_buckets(dates, group_by):
+    if group_by == "Week":
+        iso = dates.dt.isocalendar()
+        return (iso['year'].astype(str) + '-W' + iso['week'].astype(str)).rename('week_label')
+    if group_by == "Month":
+        return dates.dt.strftime('%Y-%m').rename('month')
+    return dates.rename('date')
+
+
+# Function to compute the partial aggregates of one batch
+def partial_aggregates(df, group_by="Day"):
+    buckets = time_buckets(df['date'], group_by)
+    return {
+        'revenue': df['revenue'].sum(),
+        'rows': len(df),
+        'time_product': df.groupby([buckets, df['product']])['revenue'].sum(),
+        'product_region': df.groupby(['product', 'region'])[['quantity', 'revenue']].sum()
+    }
+
+
+# Function to merge a list of partial aggregates: the group tables are
+# concatenated and re-grouped once, not once per batch
+def merge_aggregates(parts):
+    if not parts:
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    return {
+        'revenue': sum(part['revenue'] for part in parts),
+        'rows': sum(part['rows'] for part in parts),
+        'time_product': pd.concat([part['time_product'] for part in parts]).groupby(level=[0, 1]).sum(),
+        'product_region': pd.concat([part['product_region'] for part in parts]).groupby(level=[0, 1]).sum()
+    }
+
+
+# Function to turn merged aggregates into the frames the pages render
+def finalize_aggregates(acc, group_by="Day"):
+    time_col = {'Week': 'week_label', 'Month': 'month'}.get(group_by, 'date')
+    if acc is None:
+        acc = partial_aggregates(pd.DataFrame({
+            'date': pd.Series(dtype='datetime64[ns]'), 'product': pd.Series(dtype=object),
+            'region': pd.Series(dtype=object), 'quantity': pd.Series(dtype='int64'),
+            'revenue': pd.Series(dtype='int64')
+        }), group_by)
+
+    product_region = acc['product_region'].reset_index()
+    grouped_data = acc['time_product'].reset_index()
+    grouped_data.columns = [time_col, 'product', 'revenue']
+
+    return {
+        'time_col': time_col,
+        'total_revenue': acc['revenue'],
+        'avg_order': acc['revenue'] / acc['rows'] if acc['rows'] else float('nan'),
+        'grouped_data': grouped_data,
+        'daily_revenue': grouped_data.groupby(time_col)['revenue'].sum().reset_index(),
+        'product_revenue': product_region.groupby('product')['revenue'].sum().reset_index(),
+        'region_revenue': product_region.groupby('region')['revenue'].sum().reset_index(),
+        'agg_data': product_region.sort_values('revenue', ascending=False)
+    }
+
+
+# Function to aggregate an iterable of sales batches. Partials are merged
+# MERGE_EVERY at a time, so a long scan neither re-groups the accumulated
+# result on every batch nor holds the partials of every batch.
+def aggregate_sales(batches, group_by="Day"):
+    parts = []
+    for batch in batches:
+        if len(batch):
+            parts.append(partial_aggregates(batch, group_by))
+            if len(parts) == MERGE_EVERY:
+                parts = [merge_aggregates(parts)]
+    return finalize_aggregates(merge_aggregates(parts), group_by)
+
+
+# Function to stream filtered sales batches from the partitioned files.
+# Partitions before start_date are never opened (start_date None reads the
+# full history); only `columns` (SALES_COLUMNS by default) are read.
+def scan_sales(data_dir, start_date, products=None, regions=None, batch_size=262144, columns=SALES_COLUMNS):
+    for path in list_partitions(data_dir, 'sales', start_date):
+        parquet_file = pq.ParquetFile(path)
+        for record_batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            batch = record_batch.to_pandas()
+            mask = batch['date'] >= start_date if start_date is not None else pd.Series(True, index=batch.index)
+            if products is not None:
+                mask &= batch['product'].isin(products)
+            if regions is not None:
+                mask &= batch['region'].isin(regions)
+            yield batch[mask]
+
+
+# Function to list the columns of the partitioned sales (from the first file's schema)
+def sales_columns(data_dir):
+    paths = list_partitions(data_dir, 'sales')
+    return pq.read_schema(paths[0]).names if paths else []
+
+
+# Function to list the distinct products and regions without loading full rows
+def scan_sales_dimensions(data_dir, batch_size=262144):
+    products, regions = set(), set()
+    for path in list_partitions(data_dir, 'sales'):
+        parquet_file = pq.ParquetFile(path)
+        for record_batch in parquet_file.iter_batches(batch_size=batch_size, columns=['product', 'region']):
+            batch = record_batch.to_pandas()
+            products.update(batch['product'].unique())
+            regions.update(batch['region'].unique())
+    return sorted(products), sorted(regions)
@@ -0,0 +1,68 @@
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+
+# Launcher that prewarms an app before its first session connects.
+# `streamlit run` only imports the charting libraries and loads the datasets
+# when the first browser session executes the script. serve.py starts the
+# Streamlit server in this process and, in a background thread, imports them
+# and fills the st.cache_resource caches of dashboard_data.py, which every
+# session then shares. A session arriving before prewarming finishes waits on
+# the same cache entry instead of computing it a second time.
+#
+# Usage:
+#   python serve.py Site-test.py [--no-prewarm] [streamlit options, e.g. --server.port 8502]
+
+
+# Function to warm the imports and caches the first page view of an app needs
+def prewarm(app):
+    if os.path.basename(app) == 'Testing.py':
+        import matplotlib.pyplot
+        return
+
+    import plotly.express
+    import plotly.graph_objects
+    import dashboard_data
+    dashboard_data.prewarm()
+
+
+# Function to prewarm in a background thread, so the server starts listening at once
+def start_prewarm(app):
+    def run():
+        # Cached functions warn about the missing script context outside a session
+        logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').addFilter(
+            lambda record: threading.current_thread().name != 'prewarm')
+        start = time.perf_counter()
+        try:
+            prewarm(app)
+        except Exception as e:
+            print(f"Prewarm of {app} failed: {e}", file=sys.stderr)
+            return
+        print(f"Prewarmed {app} in {time.perf_counter() - start:.2f}s")
+
+    thread = threading.Thread(target=run, name='prewarm', daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a dashboard app with prewarmed caches")
+    parser.add_argument('app', nargs='?', default='Site-test.py', help="Streamlit script (default: %(default)s)")
+    parser.add_argument('--no-prewarm', action='store_true', help="Start the server without prewarming")
+    args, streamlit_args = parser.parse_known_args()
+
+    # The app's modules must resolve the same way they do under `streamlit run`
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.app)))
+    if not args.no_prewarm:
+        start_prewarm(args.app)
+
+    from streamlit.web import cli as stcli
+    sys.argv = ['streamlit', 'run', args.app] + streamlit_args
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import data_generators
+from partitioned_data import load_partitions
+
+# Shared-memory data plane for multi-process deployments.
+# One loader process publishes the datasets as Arrow IPC files in a shared
+# directory (tmpfs /dev/shm by default, so the files live in RAM). Every
+# Streamlit server process memory-maps them and builds pandas frames whose
+# numeric, datetime and string columns point straight into the mapping, so
+# the host keeps a single copy of the data however many servers run.
+#
+# Publishing is versioned: files are written as <name>.v<version>.arrow and a
+# manifest is swapped in atomically with os.replace. Publishers (the loader,
+# a backup restore from any server) hold PUBLISH_LOCK_FILE while they claim
+# the next version and write it, so two never share a version number and the
+# manifest never moves back to an older one. Readers pick up the new
+# version on their next rerun; files of older versions are removed after
+# `keep_versions` publishes (processes still mapping them keep working, the
+# memory is released when the last mapping goes away).
+#
+# Usage:
+#   python shared_data.py --users 1000000 --tickets 200000 --refresh-minutes 60
+#   DASHBOARD_SHARED_DIR=/dev/shm/admin-dashboard streamlit run Site-test.py
+
+DEFAULT_SHARED_DIR = ('/dev/shm/admin-dashboard' if os.path.isdir('/dev/shm')
+                      else os.path.join(tempfile.gettempdir(), 'admin-dashboard'))
+MANIFEST_FILE = 'manifest.json'
+PUBLISH_LOCK_FILE = 'publish.lock'
+DATASET_FILE_PATTERN = re.compile(r'^(\w+)\.v(\d+)\.arrow$')
+
+# String columns stay Arrow-backed when converted to pandas (no copy)
+try:
+    ARROW_STRING_DTYPE = pd.StringDtype('pyarrow', na_value=np.nan)
+except TypeError:
+    ARROW_STRING_DTYPE = pd.StringDtype('pyarrow')
+
+
+# Function to read the current manifest (None if nothing was published yet)
+def read_manifest(shared_dir):
+    try:
+        with open(os.path.join(shared_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+# Function to hold a lock on `path` (created if missing) for the duration of a
+# with-block; works across processes and threads. Shared locks exclude only an
+# exclusive one. With blocking=False it yields whether the lock was taken.
+@contextmanager
+def file_lock(path, shared=False, blocking=True):
+    with open(path, 'a') as f:
+        try:
+            fcntl.flock(f, (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# Function to mark a store (ticket database, event log) as in use: a shared
+# lock on `path` held for as long as the returned file stays open, that is,
+# until the process exits. Retries if remove_unused() deleted the file while
+# we waited for the lock, so the lock is always on the current file.
+def hold_in_use(path):
+    while True:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        f = open(path, 'a')
+        fcntl.flock(f, fcntl.LOCK_SH)
+        try:
+            if os.stat(path).st_ino == os.fstat(f.fileno()).st_ino:
+                return f
+        except FileNotFoundError:
+            pass
+        f.close()
+
+
+# Function to remove the files / directories of a store that no process holds
+# in use (see hold_in_use), along with its lock file; returns whether it did
+def remove_unused(lock_path, paths):
+    with file_lock(lock_path, blocking=False) as unused:
+        if not unused:
+            return False
+        for path in paths:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+        if os.path.exists(lock_path):
+            os.remove(lock_path)
+    return True
+
+
+# Function to write a file atomically: readers see the old or the new content
+def write_atomic(path, write):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_json(path, value):
+    with open(path, 'w') as f:
+        json.dump(value, f)
+
+
+# Function to write one frame (or Arrow table) as an Arrow IPC file
+def write_arrow_file(path, df):
+    table = df if isinstance(df, pa.Table) else pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+# Function to publish a new version of the datasets ({name: DataFrame or Arrow table})
+def publish_datasets(shared_dir, datasets, keep_versions=2):
+    os.makedirs(shared_dir, exist_ok=True)
+    with file_lock(os.path.join(shared_dir, PUBLISH_LOCK_FILE)):
+        # The next version is above the manifest and above any files left by
+        # a publisher that died before swapping its manifest in
+        manifest = read_manifest(shared_dir)
+        versions = [int(match.group(2)) for match in map(DATASET_FILE_PATTERN.match, os.listdir(shared_dir))
+                    if match]
+        version = max([manifest['version'] if manifest else 0, *versions]) + 1
+
+        files = {}
+        for name, df in datasets.items():
+            file_name = f'{name}.v{version}.arrow'
+            write_atomic(os.path.join(shared_dir, file_name), lambda path: write_arrow_file(path, df))
+            files[name] = file_name
+
+        new_manifest = {'version': version, 'published_at': time.time(), 'files': files,
+                        'rows': {name: len(df) for name, df in datasets.items()}}
+        write_atomic(os.path.join(shared_dir, MANIFEST_FILE), lambda path: write_json(path, new_manifest))
+
+        # Drop files of versions that are no longer kept
+        for file_name in os.listdir(shared_dir):
+            match = DATASET_FILE_PATTERN.match(file_name)
+            if match and int(match.group(2)) <= version - keep_versions:
+                os.remove(os.path.join(shared_dir, file_name))
+    return version
+
+
+# Function to memory-map one published dataset as a pandas frame
+def attach_dataset(path):
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return table.to_pandas(split_blocks=True, types_mapper={
+        pa.string(): ARROW_STRING_DTYPE,
+        pa.large_string(): ARROW_STRING_DTYPE
+    }.get)
+
+
+# Function to attach every dataset of a manifest
+def attach_datasets(shared_dir, manifest):
+    return {name: attach_dataset(os.path.join(shared_dir, file_name))
+            for name, file_name in manifest['files'].items()}
+
+
+# Function to get a short key identifying the users and tickets of a dataset
+# (their ids, dates and the user of each ticket). State kept next to a dataset -
+# ticket status changes, the event log - is stored under this key, so an
+# unseeded regeneration that reuses the ids does not inherit it.
+def dataset_key(user_df, ticket_df):
+    digest = hashlib.sha256()
+    for df, columns in [(user_df, ['user_id', 'join_date']), (ticket_df, ['ticket_id', 'created_date', 'user_id'])]:
+        digest.update(pd.util.hash_pandas_object(df[columns], index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+# Function to build the datasets the dashboard serves
+def build_datasets(args, seed):
+    if args.data_dir:
+        return {
+            'sales': load_partitions(args.data_dir, 'sales'),
+            'users': load_partitions(args.data_dir, 'users'),
+            'tickets': load_partitions(args.data_dir, 'tickets')
+        }
+    return {
+        'sales': data_generators.generate_sales_data(args.days, seed=seed, num_users=args.users),
+        'users': data_generators.generate_user_data(args.users, seed=seed),
+        'tickets': data_generators.generate_tickets(args.tickets, seed=seed, num_users=args.users)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish admin dashboard datasets to shared memory")
+    parser.add_argument('--dir', default=DEFAULT_SHARED_DIR, help="Shared directory (default: %(default)s)")
+    parser.add_argument('--data-dir', help="Read partitioned datasets from here instead of generating them")
+    parser.add_argument('--days', type=int, default=90, help="Days of sales history")
+    parser.add_argument('--users', type=int, default=1000, help="Number of users")
+    parser.add_argument('--tickets', type=int, default=200, help="Number of tickets")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed")
+    parser.add_argument('--refresh-minutes', type=float, default=0,
+                        help="Republish periodically (0 = publish once and exit)")
+    args = parser.parse_args()
+
+    refresh = 0
+    while True:
+        start = time.perf_counter()
+        seed = None if args.seed is None else args.seed + refresh
+        version = publish_datasets(args.dir, build_datasets(args, seed))
+        print(f"Published version {version} to {args.dir} in {time.perf_counter() - start:.1f}s")
+
+        if args.refresh_minutes <= 0:
+            break
+        refresh += 1
+        time.sleep(args.refresh_minutes * 60)
+
+
+if __name__ == "__main__":
+    main()
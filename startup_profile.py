@@ -0,0 +1,122 @@
+import argparse
+import ast
+import os
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+# Startup profile of the Streamlit apps.
+# Two measurements per app, each in a fresh interpreter:
+#   - an `-X importtime` breakdown of the app's top-level imports, summed per
+#     top-level package (streamlit itself is loaded by the server before any
+#     session, so it is listed but not part of the target);
+#   - time to first paint: the first script run of the default page with
+#     AppTest, cold and after serve.py's prewarm hook. AppTest returns when the
+#     whole page has rendered, so this is an upper bound for the first paint.
+# The exit status is non-zero when a cold or prewarmed first paint misses the
+# target, so the script can gate changes to the boot path.
+#
+# Usage:
+#   python startup_profile.py [Site-test.py Testing.py] [--runs 3] [--top 12]
+
+TTFP_TARGETS = {
+    'Site-test.py': {'cold': 1.5, 'prewarmed': 0.75},
+    'Testing.py': {'cold': 2.0, 'prewarmed': 1.0}
+}
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# Function to list the modules an app imports at module level
+def top_level_imports(app):
+    tree = ast.parse(open(os.path.join(APP_DIR, app), encoding='utf-8').read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return modules
+
+
+# Function to run `python -X importtime` on the app's imports and sum the
+# self time per top-level package (seconds)
+def import_profile(app):
+    code = '\n'.join(f'import {module}' for module in top_level_imports(app))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=APP_DIR, capture_output=True, text=True, check=True)
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        rows.append({'package': name.strip().split('.')[0], 'seconds': int(self_us) / 1e6})
+    return pd.DataFrame(rows).groupby('package')['seconds'].sum().sort_values(ascending=False)
+
+
+# Function to time the first run of an app in this (fresh) interpreter
+def first_paint(app, prewarmed):
+    from streamlit.testing.v1 import AppTest
+    sys.path.insert(0, APP_DIR)
+    if prewarmed:
+        from serve import prewarm
+        prewarm(app)
+
+    start = time.perf_counter()
+    at = AppTest.from_file(os.path.join(APP_DIR, app), default_timeout=300).run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"{app} raised: {at.exception[0].message}")
+    return elapsed
+
+
+# Function to measure the first paint of an app in a fresh interpreter
+def measure_first_paint(app, prewarmed):
+    args = [sys.executable, __file__, '--child', app] + (['--prewarmed'] if prewarmed else [])
+    result = subprocess.run(args, cwd=APP_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the startup of the dashboard apps")
+    parser.add_argument('apps', nargs='*', default=list(TTFP_TARGETS))
+    parser.add_argument('--runs', type=int, default=3, help="First-paint runs per app (median is reported)")
+    parser.add_argument('--top', type=int, default=12, help="Packages shown in the import breakdown")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--prewarmed', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(first_paint(args.child, args.prewarmed))
+        return
+
+    missed = []
+    for app in args.apps:
+        print(f"== {app}")
+        profile = import_profile(app)
+        print(f"Import time {profile.sum():.2f}s, by package:")
+        for package, seconds in profile.head(args.top).items():
+            print(f"  {package:<24} {seconds:7.3f}s")
+
+        targets = TTFP_TARGETS.get(app, {})
+        for mode, prewarmed in [('cold', False), ('prewarmed', True)]:
+            seconds = pd.Series([measure_first_paint(app, prewarmed) for _ in range(args.runs)]).median()
+            target = targets.get(mode)
+            status = "" if target is None else ("ok" if seconds <= target else "MISSED")
+            print(f"Time to first paint ({mode}): {seconds:.2f}s"
+                  + (f" (target {target:g}s, {status})" if target is not None else ""))
+            if status == "MISSED":
+                missed.append(f"{app} {mode}")
+
+    if missed:
+        print(f"Targets missed: {', '.join(missed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
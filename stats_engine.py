@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+# Mergeable summary statistics for numeric columns.
+# A column summary holds Welford moments (count, mean, M2), min/max, a missing
+# value count and a quantile sketch. Summaries of two batches merge exactly
+# (Chan et al. parallel update), so statistics are computed once per dataset
+# version and folded forward when rows are appended, instead of re-running
+# describe() over the full frame on every rerun.
+#
+# The sketch is a DDSketch-style log-bucketed histogram: every bucket covers
+# values within a relative error of `SKETCH_ACCURACY`, and merging two
+# sketches is adding bucket counts.
+
+SKETCH_ACCURACY = 0.01
+SKETCH_GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+SKETCH_LOG_GAMMA = np.log(SKETCH_GAMMA)
+SKETCH_MIN_VALUE = 1e-9  # magnitudes below this are counted as zero
+
+DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+# Function to count values per log bucket (keys are bucket indexes)
+def bucket_counts(magnitudes):
+    if len(magnitudes) == 0:
+        return pd.Series(dtype='int64')
+    keys = np.ceil(np.log(magnitudes) / SKETCH_LOG_GAMMA).astype(np.int64)
+    keys, counts = np.unique(keys, return_counts=True)
+    return pd.Series(counts, index=keys)
+
+
+# Function to summarize a batch of values of one column
+def column_summary(values):
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    values = values[~missing]
+    count = len(values)
+    mean = values.mean() if count else 0.0
+
+    return {
+        'count': count,
+        'mean': mean,
+        'm2': ((values - mean) ** 2).sum() if count else 0.0,
+        'min': values.min() if count else np.inf,
+        'max': values.max() if count else -np.inf,
+        'missing': int(missing.sum()),
+        'positive': bucket_counts(values[values >= SKETCH_MIN_VALUE]),
+        'negative': bucket_counts(-values[values <= -SKETCH_MIN_VALUE]),
+        'zero': int((np.abs(values) < SKETCH_MIN_VALUE).sum())
+    }
+
+
+# Function to merge two column summaries
+def merge_summaries(a, b):
+    count = a['count'] + b['count']
+    if count == 0:
+        return dict(a, missing=a['missing'] + b['missing'])
+
+    delta = b['mean'] - a['mean']
+    return {
+        'count': count,
+        'mean': a['mean'] + delta * b['count'] / count,
+        'm2': a['m2'] + b['m2'] + delta ** 2 * a['count'] * b['count'] / count,
+        'min': min(a['min'], b['min']),
+        'max': max(a['max'], b['max']),
+        'missing': a['missing'] + b['missing'],
+        'positive': a['positive'].add(b['positive'], fill_value=0).astype('int64'),
+        'negative': a['negative'].add(b['negative'], fill_value=0).astype('int64'),
+        'zero': a['zero'] + b['zero']
+    }
+
+
+# Function to read an approximate quantile from a summary's sketch
+def summary_quantile(summary, q):
+    if summary['count'] == 0:
+        return np.nan
+
+    # Buckets in ascending value order: negatives (largest magnitude first), zero, positives
+    negative = summary['negative'].sort_index(ascending=False)
+    positive = summary['positive'].sort_index()
+    values = np.concatenate([
+        -2 * SKETCH_GAMMA ** negative.index.to_numpy() / (SKETCH_GAMMA + 1),
+        [0.0],
+        2 * SKETCH_GAMMA ** positive.index.to_numpy() / (SKETCH_GAMMA + 1)
+    ])
+    counts = np.concatenate([negative.to_numpy(), [summary['zero']], positive.to_numpy()])
+
+    rank = q * (summary['count'] - 1)
+    bucket = np.searchsorted(np.cumsum(counts), rank, side='right')
+    return float(np.clip(values[min(bucket, len(values) - 1)], summary['min'], summary['max']))
+
+
+# Function to summarize every numeric column of a frame
+def summarize_frame(df, columns=None):
+    if columns is None:
+        columns = df.select_dtypes(include='number').columns
+    return {col: column_summary(df[col].to_numpy(dtype=np.float64, na_value=np.nan)) for col in columns}
+
+
+# Function to fold newly appended rows into existing frame summaries
+def update_frame_summaries(summaries, new_rows):
+    new_summaries = summarize_frame(new_rows, list(summaries))
+    return {col: merge_summaries(summaries[col], new_summaries[col]) for col in summaries}
+
+
+# Function to render frame summaries like DataFrame.describe()
+def describe_summaries(summaries):
+    table = {}
+    for col, summary in summaries.items():
+        count = summary['count']
+        table[col] = [
+            count,
+            summary['mean'] if count else np.nan,
+            np.sqrt(summary['m2'] / (count - 1)) if count > 1 else np.nan,
+            summary['min'] if count else np.nan,
+            summary_quantile(summary, 0.25),
+            summary_quantile(summary, 0.5),
+            summary_quantile(summary, 0.75),
+            summary['max'] if count else np.nan
+        ]
+    return pd.DataFrame(table, index=DESCRIBE_INDEX)
+
+
+# Function to count missing values across frame summaries
+def missing_values(summaries):
+    return sum(summary['missing'] for summary in summaries.values())
@@ -0,0 +1,23 @@
+import pyarrow as pa
+
+# Arrow helpers for the tables sent to the browser.
+# Streamlit ships dataframes to the frontend as Arrow; building the Arrow
+# table ourselves lets the apps cache it per (dataset version, view) instead
+# of converting the pandas frame again on every rerun. Only the visible page
+# of a large table is converted, and numeric columns stay numeric: number
+# formatting happens client side through column configs.
+
+
+# Function to convert a frame (or a column subset) to an Arrow table
+def to_arrow(df, columns=None):
+    if columns is not None:
+        df = df[columns]
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+# Function to get the rows of one page of a frame or of an array of row positions
+def page_rows(rows, page_number, page_size):
+    start = max(page_number - 1, 0) * page_size
+    if hasattr(rows, 'iloc'):
+        rows = rows.iloc
+    return rows[start:start + page_size]
@@ -0,0 +1,111 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from backup_store import CHUNK_LOCK_FILE, create_snapshot, prune_snapshots, read_snapshots, restore_snapshot
+from data_generators import generate_sales_data, generate_tickets, generate_user_data
+from shared_data import attach_datasets, file_lock, read_manifest
+from ticket_store import updates_frame
+
+NOW = datetime(2024, 6, 30)
+
+
+@pytest.fixture(scope='module')
+def datasets():
+    return {
+        'sales': generate_sales_data(days=20, seed=51, now=NOW, num_users=50),
+        'users': generate_user_data(50, seed=51, now=NOW),
+        'tickets': generate_tickets(30, seed=51, now=NOW, num_users=50)
+    }
+
+
+def restore(backup_dir, shared_dir, snapshot_id=None):
+    restore_snapshot(str(backup_dir), str(shared_dir), snapshot_id)
+    return attach_datasets(str(shared_dir), read_manifest(str(shared_dir)))
+
+
+def assert_restored(restored, df):
+    pd.testing.assert_frame_equal(restored.astype(df.dtypes.to_dict()), df, check_dtype=False)
+
+
+def test_round_trip_with_empty_tables(tmp_path, datasets):
+    # No status changes yet: ticket_updates is empty, as in a fresh dashboard
+    snapshot = create_snapshot(str(tmp_path / 'backups'), {
+        **datasets,
+        'ticket_updates': updates_frame([]),
+        'empty_partitions': []
+    }, chunk_rows=16)
+    assert snapshot['datasets']['ticket_updates']['rows'] == 0
+    assert snapshot['datasets']['empty_partitions']['chunks'] == []
+
+    restored = restore(tmp_path / 'backups', tmp_path / 'shared')
+    for name, df in datasets.items():
+        assert_restored(restored[name], df)
+    assert 'ticket_updates' not in restored
+    assert restored['empty_partitions'].empty
+
+
+def test_status_changes_are_applied_on_restore(tmp_path, datasets):
+    tickets = datasets['tickets']
+    changed = tickets['ticket_id'].iloc[3]
+    create_snapshot(str(tmp_path / 'backups'), {
+        **datasets,
+        'ticket_updates': updates_frame([(changed, 'Closed', '2024-06-29 10:00:00')])
+    })
+
+    restored = restore(tmp_path / 'backups', tmp_path / 'shared')['tickets'].set_index('ticket_id')
+    assert restored.loc[changed, 'status'] == 'Closed'
+    assert restored.loc[changed, 'resolved_date'] == pd.Timestamp('2024-06-29 10:00:00')
+    others = tickets[tickets['ticket_id'] != changed].set_index('ticket_id')
+    assert (restored.loc[others.index, 'status'] == others['status'].astype(str)).all()
+
+
+def test_unchanged_data_reuses_chunks(tmp_path, datasets):
+    backup_dir = str(tmp_path / 'backups')
+    first = create_snapshot(backup_dir, datasets, chunk_rows=16)
+    sales = datasets['sales']
+    second = create_snapshot(backup_dir, {**datasets, 'sales': [sales.iloc[:32], sales.iloc[32:]]}, chunk_rows=16)
+    assert first['stats']['chunks_written'] > 0
+    assert second['stats']['chunks_written'] == 0
+    assert_restored(restore(backup_dir, tmp_path / 'shared', first['id'])['sales'], sales)
+
+
+def test_prune_keeps_the_newest_snapshots_and_their_chunks(tmp_path, datasets):
+    backup_dir = str(tmp_path / 'backups')
+    for days in range(3, 6):
+        create_snapshot(backup_dir, {'sales': datasets['sales'].iloc[:days * 10]}, keep=2, chunk_rows=16)
+    snapshots = read_snapshots(backup_dir)
+    assert len(snapshots) == 2
+    assert_restored(restore(backup_dir, tmp_path / 'shared')['sales'], datasets['sales'].iloc[:50])
+    assert_restored(restore(backup_dir, tmp_path / 'shared', snapshots[0]['id'])['sales'],
+                    datasets['sales'].iloc[:40])
+
+
+def test_prune_is_skipped_while_a_snapshot_is_in_flight(tmp_path, datasets):
+    backup_dir = str(tmp_path / 'backups')
+    for _ in range(3):
+        create_snapshot(backup_dir, {'users': datasets['users']})
+    with file_lock(os.path.join(backup_dir, CHUNK_LOCK_FILE), shared=True):
+        assert prune_snapshots(backup_dir, keep=1) is None
+    assert len(read_snapshots(backup_dir)) == 3
+    assert prune_snapshots(backup_dir, keep=1) == 0
+    assert len(read_snapshots(backup_dir)) == 1
+
+
+def test_file_lock_modes(tmp_path):
+    path = str(tmp_path / 'test.lock')
+    with file_lock(path, shared=True) as first, file_lock(path, shared=True, blocking=False) as second:
+        assert first and second
+        with file_lock(path, blocking=False) as exclusive:
+            assert not exclusive
+    with file_lock(path, blocking=False) as exclusive:
+        assert exclusive
+        with file_lock(path, shared=True, blocking=False) as shared:
+            assert not shared
+
+
+def test_restore_without_snapshots(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        restore_snapshot(str(tmp_path / 'backups'), str(tmp_path / 'shared'))
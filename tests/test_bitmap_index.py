@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bitmap_index import (bitmap_count, bitmap_filter, bitmap_from_mask, bitmap_rows, bitmap_value_counts,
+                          bitmap_values, build_bitmap_index, update_bitmap_index)
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(21)
+    # 1003 rows, so the last bitmap byte is only partly used
+    return pd.DataFrame({
+        'product': rng.choice(['Laptop', 'Phone', 'Tablet'], 1003),
+        'region': pd.Categorical(rng.choice(['North', 'South', None], 1003)),
+        'active': rng.integers(0, 2, 1003).astype(bool),
+        'user_id': [f'USER{i}' for i in range(1003)],
+        'revenue': rng.integers(10, 500, 1003)
+    })
+
+
+def test_indexes_only_low_cardinality_columns(frame):
+    index = build_bitmap_index(frame)
+    assert set(index['columns']) == {'product', 'region', 'active'}
+    assert bitmap_values(index, 'product') == list(frame['product'].unique())
+
+
+@pytest.mark.parametrize('filters', [
+    {'product': ['Laptop']},
+    {'product': ['Laptop', 'Tablet'], 'region': ['North']},
+    {'product': ['Phone'], 'region': ['South'], 'active': [True]},
+    {'product': [], 'region': None},
+    {'product': ['Watch']}
+])
+def test_filter_matches_mask(frame, filters):
+    index = build_bitmap_index(frame)
+    mask = np.ones(len(frame), dtype=bool)
+    for column, values in filters.items():
+        if values:
+            mask &= frame[column].isin(values).to_numpy()
+
+    bitmap = bitmap_filter(index, filters)
+    assert bitmap_count(bitmap) == mask.sum()
+    np.testing.assert_array_equal(bitmap_rows(index, bitmap), np.flatnonzero(mask))
+
+
+def test_filter_within_base_bitmap(frame):
+    index = build_bitmap_index(frame)
+    base = frame['revenue'] > 250
+    bitmap = bitmap_filter(index, {'product': ['Phone']}, base=bitmap_from_mask(base))
+    assert bitmap_count(bitmap) == (base & (frame['product'] == 'Phone')).sum()
+
+
+def test_value_counts_skip_missing_values(frame):
+    index = build_bitmap_index(frame)
+    counts = bitmap_value_counts(index, 'region')
+    expected = frame['region'].value_counts()
+    assert counts.to_dict() == expected.to_dict()
+    assert counts.sum() == frame['region'].notna().sum()
+
+
+def test_update_moves_rows_between_values(frame):
+    index = build_bitmap_index(frame)
+    rows = np.array([0, 7, 8, 1002])
+    old_values = frame['product'].to_numpy()[rows]
+    updated = update_bitmap_index(index, 'product', rows, old_values, ['Watch'] * len(rows))
+
+    moved = frame['product'].copy()
+    moved.iloc[rows] = 'Watch'
+    for value in moved.unique():
+        np.testing.assert_array_equal(bitmap_rows(updated, updated['columns']['product'][value]),
+                                      np.flatnonzero(moved == value))
+    # The old index is left as it was
+    assert 'Watch' not in index['columns']['product']
+    assert bitmap_count(bitmap_filter(index, {'product': ['Laptop', 'Phone', 'Tablet']})) == len(frame)
+
+
+def test_empty_frame():
+    index = build_bitmap_index(pd.DataFrame({'product': pd.Series([], dtype=object)}))
+    assert bitmap_count(bitmap_filter(index, {'product': ['Laptop']})) == 0
+    assert bitmap_count(bitmap_filter(index, {})) == 0
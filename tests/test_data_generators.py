@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_generators import (PRODUCTS, REGIONS, TICKET_STATUSES, format_ids, generate_sales_data,
+                             generate_tickets, generate_user_data)
+
+NOW = datetime(2024, 6, 30)
+
+
+@pytest.mark.parametrize('numbers', [np.arange(5, 15), np.array([3, 3, 3, 4] * 50), np.array([], dtype=np.int64)],
+                         ids=['direct', 'lookup', 'empty'])
+def test_format_ids_matches_fstrings(numbers):
+    assert list(format_ids('USER', numbers, '!')) == [f'USER{n}!' for n in numbers]
+
+
+@pytest.mark.parametrize('generate', [
+    lambda seed: generate_sales_data(days=30, seed=seed, now=NOW, num_users=100),
+    lambda seed: generate_user_data(500, seed=seed, now=NOW),
+    lambda seed: generate_tickets(300, seed=seed, now=NOW)
+], ids=['sales', 'users', 'tickets'])
+def test_same_seed_same_frame(generate):
+    pd.testing.assert_frame_equal(generate(5), generate(5))
+    assert not generate(5).equals(generate(6))
+
+
+def test_sales_rows_cover_every_day_product_and_region():
+    sales = generate_sales_data(days=30, seed=1, now=NOW)
+    assert len(sales) == 31 * len(PRODUCTS) * len(REGIONS)
+    assert not sales.duplicated(['date', 'product', 'region']).any()
+    assert (sales['revenue'] == sales['quantity'] * sales['price']).all()
+    assert 'user_id' not in sales.columns
+
+    # The user ids are drawn last: the other columns do not change
+    with_users = generate_sales_data(days=30, seed=1, now=NOW, num_users=10)
+    pd.testing.assert_frame_equal(with_users.drop(columns='user_id'), sales)
+    assert set(with_users['user_id']) <= {f'USER{n}' for n in range(1000, 1010)}
+
+
+def test_users_are_consistent():
+    users = generate_user_data(1000, seed=2, id_offset=200, now=NOW)
+    assert users['user_id'].tolist() == [f'USER{n}' for n in range(1200, 2200)]
+    assert users['name'].iloc[0] == 'User 201'
+    assert (users['last_login'] >= users['join_date']).all()
+    assert users['last_login'].max() <= pd.Timestamp(NOW)
+    assert users['login_count'].min() >= 1
+
+
+def test_only_done_tickets_have_a_resolution_date():
+    tickets = generate_tickets(1000, seed=3, now=NOW, num_users=20)
+    done = tickets['status'].isin(['Closed', 'Resolved'])
+    assert set(tickets['status']) <= set(TICKET_STATUSES)
+    assert tickets.loc[done, 'resolved_date'].notna().all()
+    assert tickets.loc[~done, 'resolved_date'].isna().all()
+    assert (tickets.loc[done, 'resolved_date'] > tickets.loc[done, 'created_date']).all()
+    assert set(tickets['user_id']) <= {f'USER{n}' for n in range(1000, 1020)}
+
+
+def test_zero_rows():
+    assert generate_user_data(0, seed=4, now=NOW).empty
+    assert generate_tickets(0, seed=4, now=NOW).empty
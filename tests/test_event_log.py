@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from event_log import EventLog, prune_event_logs
+
+
+def make_events(n, prefix='TCK', start='2024-06-01'):
+    times = pd.Timestamp(start) + pd.to_timedelta(range(n), unit='min')
+    return [{'time': time, 'kind': 'ticket', 'entity': f'{prefix}-{i % 25}', 'user': 'Admin',
+             'action': f'Event {i}'} for i, time in enumerate(times)]
+
+
+@pytest.mark.parametrize('n_events', [10, 150])
+def test_append_and_reopen(tmp_path, n_events):
+    log = EventLog(str(tmp_path), segment_rows=64, block_rows=16)
+    for start in range(0, n_events, 7):
+        log.append(make_events(n_events)[start:start + 7])
+    assert len(log) == n_events
+
+    reopened = EventLog(str(tmp_path), segment_rows=64, block_rows=16)
+    assert len(reopened) == n_events
+    assert reopened.stats()['segments'] == n_events // 64
+    pd.testing.assert_frame_equal(reopened.scan(), log.scan())
+    assert reopened.scan()['action'].tolist() == [f'Event {i}' for i in range(n_events)]
+
+    latest = reopened.latest(5)
+    assert latest['action'].tolist() == [f'Event {i}' for i in range(n_events - 1, n_events - 6, -1)]
+    entity = reopened.scan(entity='TCK-3')
+    assert entity['action'].tolist() == [f'Event {i}' for i in range(3, n_events, 25)]
+
+
+def test_logs_sharing_a_directory_see_each_other(tmp_path):
+    # Two logs on one directory, as in two server processes
+    first = EventLog(str(tmp_path), segment_rows=50, block_rows=16)
+    second = EventLog(str(tmp_path), segment_rows=50, block_rows=16)
+    for i in range(120):
+        (first if i % 2 else second).append(make_events(120)[i:i + 1])
+
+    for log in [first, second]:
+        assert len(log) == 120
+        assert log.scan()['action'].tolist() == [f'Event {i}' for i in range(120)]
+
+
+def test_seed_only_fills_an_empty_log(tmp_path):
+    log = EventLog(str(tmp_path))
+    assert log.seed(make_events(5))
+    assert not EventLog(str(tmp_path)).seed(make_events(5))
+    assert len(log) == 5
+
+
+def test_retention_drops_old_segments_and_tail(tmp_path):
+    log = EventLog(str(tmp_path), segment_rows=64, block_rows=16)
+    log.append(make_events(100, start='2024-01-01'))
+    log.append(make_events(10, prefix='NEW', start='2024-06-01'))
+    assert log.stats()['segments'] == 1
+
+    assert log.apply_retention(30, now=datetime(2024, 6, 10)) == 100
+    assert set(EventLog(str(tmp_path)).scan()['entity'].str[:3]) == {'NEW'}
+    assert log.apply_retention(None) == 0
+
+
+def test_prune_removes_only_logs_no_process_holds(tmp_path):
+    old = EventLog(str(tmp_path / 'old'))
+    old.append(make_events(5))
+    current = EventLog(str(tmp_path / 'new'))
+    current.append(make_events(5))
+    (tmp_path / 'unrelated').mkdir()
+
+    assert prune_event_logs(str(tmp_path)) == []
+
+    # The process of the old dataset exits
+    old.in_use.close()
+    assert prune_event_logs(str(tmp_path)) == [str(tmp_path / 'old')]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['new', 'unrelated']
+    assert len(EventLog(str(tmp_path / 'new'))) == 5
+    assert prune_event_logs(str(tmp_path / 'missing')) == []
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from histogram_service import BIN_RULES, compute_histograms, histogram_counts, histogram_edges
+from stats_engine import summarize_frame
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(11)
+    values = rng.normal(50, 15, 20000)
+    values[rng.integers(0, len(values), 300)] = np.nan
+    return pd.DataFrame({
+        'normal': values,
+        'skewed': rng.lognormal(3, 1, 20000),
+        'integers': rng.integers(-40, 60, 20000).astype(np.float64)
+    })
+
+
+@pytest.mark.parametrize('rule', BIN_RULES)
+def test_histogram_matches_numpy(frame, rule):
+    summaries = summarize_frame(frame)
+    histograms = compute_histograms(frame, summaries, list(frame.columns), rule)
+    for column, (counts, edges) in histograms.items():
+        values = frame[column].dropna().to_numpy()
+        expected, _ = np.histogram(values, bins=edges)
+        np.testing.assert_array_equal(counts, expected)
+        assert counts.sum() == len(values)
+
+
+def test_histogram_counts_add_up_across_chunks(frame):
+    columns = list(frame.columns)
+    edges = histogram_edges(summarize_frame(frame), columns, "Freedman-Diaconis")
+    whole = histogram_counts(frame, edges)
+    chunks = [histogram_counts(frame.iloc[start:start + 3000], edges) for start in range(0, len(frame), 3000)]
+    for column in columns:
+        np.testing.assert_array_equal(sum(chunk[column] for chunk in chunks), whole[column])
+
+
+def test_constant_and_empty_columns():
+    frame = pd.DataFrame({'constant': np.full(10, 3.0), 'empty': np.full(10, np.nan)})
+    histograms = compute_histograms(frame, summarize_frame(frame), ['constant'])
+    counts, edges = histograms['constant']
+    assert counts.tolist() == [10] and len(edges) == 2
+    assert histogram_counts(frame, {'empty': np.linspace(0, 1, 5)})['empty'].sum() == 0
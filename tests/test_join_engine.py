@@ -0,0 +1,100 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_generators import generate_sales_data, generate_tickets, generate_user_data
+from join_engine import (UNKNOWN_LABEL, build_entity_joins, build_key_index, build_user_join, join_rows,
+                         lookup_rows, revenue_breakdown, ticket_breakdown)
+
+NOW = datetime(2024, 6, 30)
+
+
+# Function to compute a breakdown the slow way: a left merge and a groupby
+def merged_breakdown(user_df, facts, dimension, aggregations):
+    merged = facts.merge(user_df[['user_id', dimension]].drop_duplicates('user_id'), on='user_id', how='left')
+    merged[dimension] = merged[dimension].fillna(UNKNOWN_LABEL)
+    return merged.groupby(dimension).agg(**aggregations).reset_index()
+
+
+def assert_breakdown_equal(result, expected, dimension):
+    pd.testing.assert_frame_equal(result.sort_values(dimension).reset_index(drop=True),
+                                  expected.sort_values(dimension).reset_index(drop=True)[result.columns],
+                                  check_dtype=False)
+
+
+# Users with dense generated ids, sparse ids (sorted join) and ids that do not parse (hash join)
+def user_tables():
+    dense = generate_user_data(num_users=300, seed=1, now=NOW)
+    sparse = dense.assign(user_id=[f'USER{1000 + 97 * i}' for i in range(len(dense))])
+    named = dense.assign(user_id=[f'user-{i:04d}' for i in range(len(dense))])
+    return {'dense': dense, 'sparse': sparse, 'named': named}
+
+
+@pytest.mark.parametrize('layout', ['dense', 'sparse', 'named'])
+@pytest.mark.parametrize('dimension', ['subscription', 'country'])
+def test_ticket_breakdown_matches_merge(layout, dimension):
+    user_df = user_tables()[layout]
+    ticket_df = generate_tickets(num_tickets=2000, seed=2, now=NOW, num_users=400)
+    # Map the ticket users onto this layout's ids, leaving some without a user
+    ids = np.append(user_df['user_id'].to_numpy(), ['USER999999', 'nobody', None])
+    ticket_df['user_id'] = np.random.default_rng(3).choice(ids, len(ticket_df))
+
+    joins = build_entity_joins(user_df, ticket_df)
+    result = ticket_breakdown(joins['users'], dimension, ticket_df, joins['tickets'])
+
+    ticket_df = ticket_df.assign(
+        is_resolved=ticket_df['resolved_date'].notna(),
+        hours=(ticket_df['resolved_date'] - ticket_df['created_date']).dt.total_seconds() / 3600)
+    expected = merged_breakdown(user_df, ticket_df, dimension, {
+        'tickets': ('ticket_id', 'size'),
+        'resolved': ('is_resolved', 'sum'),
+        'avg_resolution_hours': ('hours', 'mean')
+    })
+    expected['open'] = expected['tickets'] - expected['resolved']
+    assert_breakdown_equal(result, expected, dimension)
+    assert (result[dimension] == UNKNOWN_LABEL).any()
+
+
+def test_revenue_breakdown_matches_merge():
+    user_df = generate_user_data(num_users=500, seed=4, now=NOW)
+    ticket_df = generate_tickets(num_tickets=10, seed=5, now=NOW, num_users=500)
+    sales_df = generate_sales_data(days=60, seed=6, now=NOW, num_users=600)
+
+    joins = build_entity_joins(user_df, ticket_df, sales_df)
+    # Two batches, as when the sales are streamed from partitions
+    half = len(sales_df) // 2
+    batches = [(joins['sales'][:half], sales_df['revenue'].to_numpy()[:half]),
+               (joins['sales'][half:], sales_df['revenue'].to_numpy()[half:])]
+    result = revenue_breakdown(joins['users'], 'country', batches)
+
+    expected = merged_breakdown(user_df, sales_df, 'country', {
+        'revenue': ('revenue', 'sum'),
+        'orders': ('revenue', 'size')
+    })
+    assert_breakdown_equal(result, expected, 'country')
+
+
+def test_sales_without_user_ids_are_not_joined():
+    user_df = generate_user_data(num_users=50, seed=7, now=NOW)
+    ticket_df = generate_tickets(num_tickets=20, seed=8, now=NOW, num_users=50)
+    joins = build_entity_joins(user_df, ticket_df, generate_sales_data(days=5, seed=9, now=NOW))
+    assert joins['sales'] is None
+    assert (joins['tickets'] >= 0).all()
+
+
+@pytest.mark.parametrize('keys', [[5, 7, 5, 6, 7, 5], [5, 700, 5, 60, 700, 5]], ids=['dense', 'sorted'])
+def test_duplicate_keys_resolve_to_the_first_row(keys):
+    key_index = build_key_index(np.array(keys))
+    assert key_index['kind'] == ('dense' if max(keys) < 10 else 'sorted')
+    lookup = np.array(sorted(set(keys)) + [4, 8])
+    assert lookup_rows(key_index, lookup).tolist() == [keys.index(key) if key in keys else -1 for key in lookup]
+
+
+@pytest.mark.parametrize('layout', ['dense', 'sparse', 'named'])
+def test_duplicate_user_ids_join_the_first_user(layout):
+    user_df = user_tables()[layout].iloc[:50]
+    duplicated = pd.concat([user_df, user_df.iloc[::-1]], ignore_index=True)
+    rows = join_rows(build_user_join(duplicated), user_df['user_id'])
+    assert rows.tolist() == list(range(len(user_df)))
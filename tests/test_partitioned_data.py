@@ -0,0 +1,76 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from partitioned_data import generate_partitioned, list_partitions, load_partitions, partitions_key
+
+NOW = datetime(2024, 6, 30)
+
+
+def generate(out_dir, days=90, workers=2):
+    return generate_partitioned(str(out_dir), days=days, num_users=300, num_tickets=120, chunk_size=100,
+                                workers=workers, seed=3, now=NOW)
+
+
+@pytest.fixture(scope='module')
+def data_dir(tmp_path_factory):
+    out_dir = tmp_path_factory.mktemp('partitioned')
+    generate(out_dir)
+    return out_dir
+
+
+def test_rows_are_written_to_their_month(data_dir):
+    for dataset, column in [('sales', 'date'), ('users', 'join_date'), ('tickets', 'created_date')]:
+        for path in list_partitions(str(data_dir), dataset):
+            month = os.path.basename(os.path.dirname(path))[len('month='):]
+            assert (pd.read_parquet(path)[column].dt.strftime('%Y-%m') == month).all()
+
+
+def test_ids_are_unique_and_complete(data_dir):
+    users = load_partitions(str(data_dir), 'users')
+    tickets = load_partitions(str(data_dir), 'tickets')
+    assert sorted(users['user_id']) == sorted(f'USER{n}' for n in range(1000, 1300))
+    assert tickets['ticket_id'].is_unique and len(tickets) == 120
+    assert set(tickets['user_id']) <= set(users['user_id'])
+
+
+def test_output_does_not_depend_on_workers(data_dir, tmp_path):
+    generate(tmp_path, workers=1)
+    for dataset in ['sales', 'users', 'tickets']:
+        pd.testing.assert_frame_equal(load_partitions(str(tmp_path), dataset),
+                                      load_partitions(str(data_dir), dataset))
+
+
+@pytest.mark.parametrize('start_date, end_date', [
+    ('2024-05-15', None),
+    ('2024-04-01', '2024-05-31'),
+    ('2030-01-01', None),
+    (None, None)
+])
+def test_date_range_reads_only_overlapping_months(data_dir, start_date, end_date):
+    sales = load_partitions(str(data_dir), 'sales')
+    loaded = load_partitions(str(data_dir), 'sales', start_date, end_date)
+    months = sales['date'].dt.to_period('M')
+    expected = pd.Series(True, index=sales.index)
+    if start_date is not None:
+        expected &= months >= pd.Period(start_date, 'M')
+    if end_date is not None:
+        expected &= months <= pd.Period(end_date, 'M')
+    assert len(loaded) == expected.sum()
+
+
+def test_regenerating_replaces_stale_months(tmp_path):
+    generate(tmp_path, days=200)
+    key = partitions_key(str(tmp_path))
+    longer = len(list_partitions(str(tmp_path), 'sales'))
+    generate(tmp_path, days=40)
+    assert len(list_partitions(str(tmp_path), 'sales')) < longer
+    assert load_partitions(str(tmp_path), 'sales')['date'].min() >= pd.Timestamp(NOW) - pd.Timedelta(days=41)
+    assert partitions_key(str(tmp_path)) != key
+
+
+def test_missing_dataset(tmp_path):
+    assert list_partitions(str(tmp_path), 'sales') == []
+    assert load_partitions(str(tmp_path), 'sales', columns=['date']).empty
@@ -0,0 +1,151 @@
+import json
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from event_log import EventLog
+from resource_governor import (DEFAULT_SETTINGS, RECENT_USE_SECONDS, TIER_DATASETS, TIER_DERIVED, TIER_VIEWS,
+                               CacheBudget, ResourceGovernor, load_settings, save_settings)
+from view_cache import ViewCache
+
+
+# Stand-in for a st.cache_resource function: returns its value, records clears
+class FakeCache:
+    def __init__(self, max_entries=None):
+        self._info = SimpleNamespace(max_entries=max_entries)
+        self.cleared = []
+
+    def __call__(self, key, _value):
+        return _value
+
+    def clear(self, *args, **kwargs):
+        self.cleared.append(args)
+
+
+class FakeSessionState(dict):
+    @property
+    def filtered_state(self):
+        return dict(self)
+
+
+def megabytes(n):
+    return np.zeros(n * 1024 * 1024, dtype=np.uint8)
+
+
+# Make every entry look unused for longer than the working-set window
+def age(budget, seconds=RECENT_USE_SECONDS + 1):
+    for entry in budget.entries.values():
+        entry['last_used'] -= seconds
+
+
+def test_settings_defaults_and_round_trip(tmp_path):
+    path = str(tmp_path / 'settings.json')
+    assert load_settings(path) == DEFAULT_SETTINGS
+
+    save_settings({**DEFAULT_SETTINGS, 'retention_period': '90 days'}, path)
+    assert load_settings(path)['retention_period'] == '90 days'
+
+    # Unknown keys are dropped, missing ones fall back to the defaults
+    with open(path, 'w') as f:
+        json.dump({'theme': 'Dark', 'removed_setting': 1}, f)
+    assert load_settings(path) == {**DEFAULT_SETTINGS, 'theme': 'Dark'}
+
+
+def test_eviction_clears_lower_tiers_first_in_lru_order():
+    budget = CacheBudget(max_bytes=10 * 1024 * 1024)
+    views, derived, datasets = FakeCache(), FakeCache(), FakeCache()
+    load_view = budget.track('views', TIER_VIEWS)(views)
+    load_index = budget.track('derived', TIER_DERIVED)(derived)
+    load_dataset = budget.track('datasets', TIER_DATASETS)(datasets)
+
+    load_dataset('users', megabytes(4))
+    load_index('users', megabytes(3))
+    load_view('a', megabytes(1))
+    load_view('b', megabytes(1))
+    age(budget)
+    load_view('a', None)
+    assert budget.bytes <= budget.max_bytes and budget.evictions == 0
+
+    # 2 MB over: view 'b', then the index; view 'a' was just used and stays
+    load_dataset('tickets', megabytes(3))
+    assert budget.evictions == 2
+    assert views.cleared == [('b', None)]
+    assert derived.cleared == [('users', None)]
+    assert datasets.cleared == []
+    assert budget.bytes <= budget.max_bytes
+
+
+def test_entries_in_use_are_never_cleared():
+    budget = CacheBudget(max_bytes=2 * 1024 * 1024)
+    views = FakeCache()
+    load_view = budget.track('views', TIER_VIEWS)(views)
+    load_view('a', megabytes(2))
+    load_view('b', megabytes(2))
+
+    # Over budget, but both entries are in the working set
+    assert budget.enforce() == 0 and views.cleared == []
+    assert budget.bytes > budget.max_bytes
+
+    age(budget)
+    load_view('b', None)
+    assert budget.enforce() == 1
+    assert views.cleared == [('a', None)]
+    assert budget.resize(0) == 0
+
+
+def test_max_entries_drops_the_oldest_entry():
+    budget = CacheBudget()
+    load_view = budget.track('views', TIER_VIEWS)(FakeCache(max_entries=2))
+    for key in 'abc':
+        load_view(key, megabytes(1))
+    report = budget.report().set_index('cache')
+    assert report.loc['views', 'entries'] == 2
+    assert report.loc['views', 'bytes'] == 2 * 1024 * 1024
+
+
+@pytest.fixture
+def governor(tmp_path):
+    return ResourceGovernor(ViewCache(), CacheBudget(), settings_path=str(tmp_path / 'settings.json'))
+
+
+def old_events(n, days_ago):
+    start = datetime.now() - timedelta(days=days_ago)
+    return [{'time': start + timedelta(minutes=i), 'kind': 'ticket', 'entity': f'TCK-{i}', 'user': 'Admin',
+             'action': f'Event {i}'} for i in range(n)]
+
+
+def test_retention_applies_to_every_event_log(tmp_path, governor):
+    logs = [EventLog(str(tmp_path / name)) for name in ('a', 'b')]
+    for log in logs:
+        log.append(old_events(10, 60) + old_events(5, 1))
+        governor.add_event_log(log)
+    # The default 30 days already applied when the logs were added
+    assert [len(log) for log in logs] == [5, 5]
+
+    assert governor.save({'retention_period': 'Forever'}) == 0
+    for log in logs:
+        log.append(old_events(3, 200))
+    assert governor.save({'retention_period': '90 days'}) == 6
+    assert [len(log) for log in logs] == [5, 5]
+    assert load_settings(governor.settings_path)['retention_period'] == '90 days'
+
+
+def test_idle_sessions_are_cleared(governor):
+    now = time.monotonic()
+    idle, active = FakeSessionState(page='Users', filters=1), FakeSessionState(page='Sales')
+    governor.sessions = {'idle': (now - 31 * 60, idle), 'active': (now, active)}
+
+    assert governor.sweep_sessions() == 1
+    assert idle == {} and active == {'page': 'Sales'}
+    assert list(governor.sessions) == ['active'] and 'idle' in governor.expired
+    assert governor.stats()['expired_sessions'] == 1
+
+
+def test_memory_report_includes_the_view_cache_and_event_logs(tmp_path, governor):
+    governor.add_event_log(EventLog(str(tmp_path / 'log')))
+    report = governor.memory_report()
+    assert {'Filtered views', 'Event log tail'} <= set(report['cache'])
+    assert list(report.columns) == ['cache', 'tier', 'entries', 'MB']
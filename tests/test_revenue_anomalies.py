@@ -0,0 +1,63 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_generators import generate_sales_data
+from revenue_anomalies import STAT_ARRAYS, add_revenue, anomaly_table, build_revenue_anomalies, refresh_anomalies
+
+NOW = datetime(2024, 6, 30)
+
+
+@pytest.fixture(scope='module')
+def sales():
+    sales = generate_sales_data(days=240, seed=61, now=NOW)
+    # A few spikes to flag
+    spikes = sales.sample(6, random_state=1).index
+    sales.loc[spikes, 'revenue'] *= 8
+    return sales
+
+
+def assert_days_match(state, expected, first_day):
+    assert state['keys'].equals(expected['keys'])
+    np.testing.assert_allclose(state['trend'], expected['trend'], rtol=1e-9)
+    for name in STAT_ARRAYS:
+        np.testing.assert_allclose(state[name][:, first_day:], expected[name][:, first_day:],
+                                   rtol=1e-4, atol=1e-2, err_msg=name)
+    np.testing.assert_array_equal(state['anomaly'][:, first_day:], expected['anomaly'][:, first_day:])
+
+
+@pytest.mark.parametrize('split_day', ['2024-03-01', '2024-06-20'])
+def test_added_days_match_a_full_build(sales, split_day):
+    old = sales[sales['date'] < split_day]
+    new = sales[sales['date'] >= split_day]
+    state = refresh_anomalies(add_revenue(build_revenue_anomalies([old]), new))
+    expected = build_revenue_anomalies([sales])
+
+    first_day = int((np.datetime64(split_day, 'D') - expected['start']).astype(np.int64))
+    assert_days_match(state, expected, first_day)
+    assert anomaly_table(state, since=split_day).equals(anomaly_table(expected, since=split_day))
+
+
+def test_several_refreshes_match_a_full_build(sales):
+    state = build_revenue_anomalies([sales[sales['date'] < '2024-05-01']])
+    for start, end in [('2024-05-01', '2024-05-20'), ('2024-05-20', '2024-06-02'), ('2024-06-02', '2024-07-01')]:
+        state = refresh_anomalies(add_revenue(state, sales[(sales['date'] >= start) & (sales['date'] < end)]))
+    # Days of earlier refreshes keep the fit of their time; the last ones match
+    expected = build_revenue_anomalies([sales])
+    first_day = int((np.datetime64('2024-06-02', 'D') - expected['start']).astype(np.int64))
+    assert_days_match(state, expected, first_day)
+
+
+def test_batches_in_one_build_match_a_single_batch(sales):
+    batches = [sales.iloc[start:start + 1000] for start in range(0, len(sales), 1000)]
+    state, expected = build_revenue_anomalies(batches), build_revenue_anomalies([sales])
+    assert_days_match(state, expected, 0)
+    assert anomaly_table(expected)['revenue'].gt(0).all() and len(anomaly_table(expected)) > 0
+
+
+def test_empty_batches():
+    state = build_revenue_anomalies([generate_sales_data(days=5, seed=62, now=NOW).iloc[:0]])
+    assert state['start'] is None
+    assert anomaly_table(state).empty
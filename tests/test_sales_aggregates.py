@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import sales_aggregates
+from partitioned_data import generate_partitioned, load_partitions
+from sales_aggregates import aggregate_sales, scan_sales
+
+
+@pytest.fixture(scope='module')
+def data_dir(tmp_path_factory):
+    out_dir = tmp_path_factory.mktemp('partitioned')
+    generate_partitioned(str(out_dir), days=120, num_users=200, num_tickets=50, chunk_size=5000, workers=2,
+                         seed=7, now=datetime(2024, 6, 30))
+    return str(out_dir)
+
+
+def assert_same_aggregates(streamed, expected):
+    assert streamed['time_col'] == expected['time_col']
+    assert streamed['total_revenue'] == expected['total_revenue']
+    assert streamed['avg_order'] == pytest.approx(expected['avg_order'])
+    for name in ['grouped_data', 'daily_revenue', 'product_revenue', 'region_revenue', 'agg_data']:
+        keys = [column for column in streamed[name].columns if column not in ('quantity', 'revenue')]
+        pd.testing.assert_frame_equal(streamed[name].sort_values(keys).reset_index(drop=True),
+                                      expected[name].sort_values(keys).reset_index(drop=True),
+                                      check_dtype=False)
+
+
+@pytest.mark.parametrize('group_by', ['Day', 'Week', 'Month'])
+def test_scan_matches_in_memory(data_dir, group_by, monkeypatch):
+    # Small batches and merges, so the streamed path folds many partials
+    monkeypatch.setattr(sales_aggregates, 'MERGE_EVERY', 4)
+    start_date = pd.Timestamp('2024-04-15')
+    sales_df = load_partitions(data_dir, 'sales')
+    expected = aggregate_sales([sales_df[sales_df['date'] >= start_date]], group_by)
+    assert expected['total_revenue'] > 0
+
+    streamed = aggregate_sales(scan_sales(data_dir, start_date, batch_size=1000), group_by)
+    assert_same_aggregates(streamed, expected)
+
+
+def test_scan_filters_match_in_memory(data_dir):
+    sales_df = load_partitions(data_dir, 'sales')
+    products = sorted(sales_df['product'].unique())[:2]
+    regions = sorted(sales_df['region'].unique())[1:]
+    mask = sales_df['product'].isin(products) & sales_df['region'].isin(regions)
+    expected = aggregate_sales([sales_df[mask]])
+
+    streamed = aggregate_sales(scan_sales(data_dir, None, products, regions, batch_size=700))
+    assert_same_aggregates(streamed, expected)
+
+
+def test_empty_scan(tmp_path):
+    result = aggregate_sales(scan_sales(str(tmp_path), None))
+    assert result['total_revenue'] == 0
+    assert result['grouped_data'].empty
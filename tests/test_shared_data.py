@@ -0,0 +1,78 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_generators import generate_sales_data, generate_tickets, generate_user_data
+from shared_data import attach_datasets, dataset_key, publish_datasets, read_manifest
+
+NOW = datetime(2024, 6, 30)
+
+
+@pytest.fixture(scope='module')
+def datasets():
+    return {
+        'sales': generate_sales_data(days=20, seed=41, now=NOW, num_users=50),
+        'users': generate_user_data(50, seed=41, now=NOW),
+        'tickets': generate_tickets(30, seed=41, now=NOW, num_users=50)
+    }
+
+
+def test_attached_frames_match_published(tmp_path, datasets):
+    version = publish_datasets(str(tmp_path), datasets)
+    manifest = read_manifest(str(tmp_path))
+    assert version == manifest['version'] == 1
+    assert manifest['rows'] == {name: len(df) for name, df in datasets.items()}
+
+    attached = attach_datasets(str(tmp_path), manifest)
+    for name, df in datasets.items():
+        pd.testing.assert_frame_equal(attached[name].astype(df.dtypes.to_dict()), df, check_dtype=False)
+    # Missing resolution dates stay missing
+    assert attached['tickets']['resolved_date'].isna().sum() == datasets['tickets']['resolved_date'].isna().sum()
+
+
+def test_empty_dataset(tmp_path, datasets):
+    publish_datasets(str(tmp_path), {'tickets': datasets['tickets'].iloc[:0]})
+    attached = attach_datasets(str(tmp_path), read_manifest(str(tmp_path)))
+    assert attached['tickets'].empty
+    assert list(attached['tickets'].columns) == list(datasets['tickets'].columns)
+
+
+def test_old_versions_are_removed_but_stay_readable(tmp_path, datasets):
+    publish_datasets(str(tmp_path), datasets)
+    first = attach_datasets(str(tmp_path), read_manifest(str(tmp_path)))
+    for _ in range(3):
+        version = publish_datasets(str(tmp_path), datasets, keep_versions=2)
+
+    assert version == 4
+    versions = {name.split('.')[1] for name in os.listdir(tmp_path) if name.endswith('.arrow')}
+    assert versions == {'v3', 'v4'}
+    # A process still mapping version 1 keeps a working frame
+    assert first['users']['user_id'].tolist() == datasets['users']['user_id'].tolist()
+
+
+def test_version_skips_files_of_a_failed_publish(tmp_path, datasets):
+    publish_datasets(str(tmp_path), datasets)
+    open(tmp_path / 'users.v7.arrow', 'wb').close()
+    assert publish_datasets(str(tmp_path), datasets) == 8
+
+
+def publish_small(shared_dir):
+    return publish_datasets(shared_dir, {'users': pd.DataFrame({'x': np.arange(10)})})
+
+
+def test_concurrent_publishers_get_distinct_versions(tmp_path):
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        versions = list(pool.map(publish_small, [str(tmp_path)] * 12))
+    assert sorted(versions) == list(range(1, 13))
+    assert read_manifest(str(tmp_path))['version'] == 12
+
+
+def test_dataset_key(datasets):
+    key = dataset_key(datasets['users'], datasets['tickets'])
+    assert key == dataset_key(datasets['users'].copy(), datasets['tickets'].copy())
+    regenerated = generate_tickets(30, seed=42, now=NOW, num_users=50)
+    assert dataset_key(datasets['users'], regenerated) != key
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stats_engine import (SKETCH_ACCURACY, column_summary, describe_summaries, merge_summaries, missing_values,
+                          summarize_frame, summary_quantile, update_frame_summaries)
+
+
+@pytest.mark.parametrize('values', [
+    np.random.default_rng(12).lognormal(0, 2, 50000),
+    np.random.default_rng(13).normal(0, 100, 50000),
+    np.concatenate([np.zeros(1000), np.random.default_rng(14).exponential(5, 9000)])
+], ids=['lognormal', 'mixed-sign', 'zeros'])
+def test_sketch_quantiles_within_relative_error(values):
+    # Summaries of several batches, merged as when rows are appended
+    summary = column_summary(values[:1])
+    for batch in np.array_split(values[1:], 5):
+        summary = merge_summaries(summary, column_summary(batch))
+
+    ordered = np.sort(values)
+    for q in [0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1]:
+        exact = ordered[int(q * (len(values) - 1))]
+        assert abs(summary_quantile(summary, q) - exact) <= SKETCH_ACCURACY * abs(exact) + 1e-9
+
+
+def test_appended_rows_match_describe():
+    rng = np.random.default_rng(15)
+    frame = pd.DataFrame({'price': rng.normal(100, 20, 6000), 'quantity': rng.integers(1, 50, 6000)})
+    frame.loc[rng.integers(0, 6000, 100), 'price'] = np.nan
+
+    summaries = summarize_frame(frame.iloc[:1000])
+    for start in range(1000, 6000, 1700):
+        summaries = update_frame_summaries(summaries, frame.iloc[start:start + 1700])
+
+    described = describe_summaries(summaries)
+    expected = frame.describe()
+    for row in ['count', 'mean', 'std', 'min', 'max']:
+        np.testing.assert_allclose(described.loc[row], expected.loc[row], rtol=1e-9)
+    for row in ['25%', '50%', '75%']:
+        np.testing.assert_allclose(described.loc[row], expected.loc[row], rtol=2 * SKETCH_ACCURACY)
+    assert missing_values(summaries) == frame.isna().sum().sum()
+
+
+def test_sketch_of_empty_column():
+    summary = column_summary(np.array([np.nan, np.nan]))
+    assert summary['count'] == 0 and summary['missing'] == 2
+    assert np.isnan(summary_quantile(summary, 0.5))
+    assert describe_summaries({'x': summary})['x'].iloc[1:].isna().all()
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bitmap_index import build_bitmap_index
+from ticket_store import TicketStore, TicketWriter, prune_ticket_dbs, read_updates, ticket_db_path
+
+
+@pytest.fixture
+def tickets():
+    return pd.DataFrame({
+        'ticket_id': [f'TCK-{1000 + i}' for i in range(50)],
+        'created_date': pd.Timestamp('2024-06-01'),
+        'resolved_date': pd.NaT,
+        'status': pd.Series(['Open', 'In Progress'] * 25, dtype='category'),
+        'priority': 'High'
+    })
+
+
+def open_store(db_path, frame):
+    return TicketStore(TicketWriter(db_path), frame, build_bitmap_index(frame))
+
+
+def test_updates_round_trip(tmp_path, tickets):
+    db_path = ticket_db_path('abc', str(tmp_path / 'tickets.db'))
+    store = open_store(db_path, tickets)
+    futures = [store.update_status(ticket_id, 'Resolved') for ticket_id in tickets['ticket_id'][:10]]
+    futures.append(store.update_status('TCK-1003', 'Open'))
+    for future in futures:
+        future.result(timeout=5)
+
+    snapshot = store.current()
+    assert snapshot['version'] > 0
+    statuses = snapshot['frame'].set_index('ticket_id')['status']
+    assert (statuses.iloc[:10].drop('TCK-1003') == 'Resolved').all()
+    assert statuses['TCK-1003'] == 'Open'
+    assert snapshot['frame']['resolved_date'].notna().sum() == 9
+    assert np.unpackbits(snapshot['index']['columns']['status']['Resolved']).sum() == 9
+
+    # The changes are persisted: a new writer and store on the database start from them
+    updates = read_updates(db_path).set_index('ticket_id')
+    assert len(updates) == 10
+    assert updates.loc['TCK-1003', 'status'] == 'Open' and pd.isna(updates.loc['TCK-1003', 'resolved_date'])
+    reopened = open_store(db_path, tickets).current()['frame']
+    pd.testing.assert_frame_equal(reopened, snapshot['frame'])
+
+
+def test_changes_of_another_writer_are_picked_up(tmp_path, tickets):
+    # Two writers on one database, as in two server processes
+    db_path = str(tmp_path / 'tickets.db')
+    first, second = open_store(db_path, tickets), open_store(db_path, tickets)
+    first.update_status('TCK-1001', 'Closed').result(timeout=5)
+    second.update_status('TCK-1002', 'Resolved').result(timeout=5)
+
+    for store in [first, second]:
+        statuses = store.current()['frame'].set_index('ticket_id')['status']
+        assert statuses['TCK-1001'] == 'Closed' and statuses['TCK-1002'] == 'Resolved'
+
+
+def test_datasets_get_separate_databases(tmp_path):
+    base_path = str(tmp_path / 'tickets.db')
+    assert ticket_db_path('a', base_path) != ticket_db_path('b', base_path)
+    assert ticket_db_path('a', base_path).endswith('.db')
+
+
+def test_prune_removes_only_databases_no_writer_holds(tmp_path, tickets):
+    base_path = str(tmp_path / 'tickets.db')
+    old_store = open_store(ticket_db_path('old', base_path), tickets)
+    old_store.update_status('TCK-1000', 'Resolved').result(timeout=5)
+    open_store(ticket_db_path('new', base_path), tickets)
+    # A database left by a process that is gone (no lock file at all)
+    TicketWriter(ticket_db_path('gone', base_path)).in_use.close()
+    (tmp_path / 'unrelated.db').write_text('')
+
+    assert prune_ticket_dbs(base_path) == [ticket_db_path('gone', base_path)]
+
+    # The process of the old dataset exits
+    old_store.writer.in_use.close()
+    assert prune_ticket_dbs(base_path) == [ticket_db_path('old', base_path)]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        'tickets.new.db', 'tickets.new.db-shm', 'tickets.new.db-wal', 'tickets.new.db.lock', 'unrelated.db']
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard_data import DATE_RANGES
+from data_generators import generate_sales_data, generate_tickets, generate_user_data
+from timeseries_rollups import (add_daily, build_dashboard_rollups, cumulative_series, empty_rollup,
+                                period_over_period, rollup_from_frame, rollup_to_frame, rolling_series,
+                                window_total)
+
+NOW = datetime(2024, 6, 30, 15)
+
+
+@pytest.fixture(scope='module')
+def sales():
+    return generate_sales_data(days=60, seed=51, now=NOW)
+
+
+@pytest.fixture(scope='module')
+def rollups(sales):
+    return build_dashboard_rollups(sales, generate_user_data(300, seed=51, now=NOW),
+                                   generate_tickets(200, seed=51, now=NOW))
+
+
+# Function to sum revenue over the days [start, end) from the rows
+def revenue_between(sales, start, end):
+    return sales.loc[(sales['date'] >= start) & (sales['date'] < end), 'revenue'].sum()
+
+
+@pytest.mark.parametrize('days', sorted(set(DATE_RANGES.values())))
+def test_period_over_period_matches_rows(sales, rollups, days):
+    end = pd.Timestamp(NOW.date()) + pd.Timedelta(days=1)
+    current, previous, change = period_over_period(rollups, 'revenue', NOW, days)
+    assert current == revenue_between(sales, end - pd.Timedelta(days=days), end)
+    assert previous == revenue_between(sales, end - pd.Timedelta(days=2 * days), end - pd.Timedelta(days=days))
+    # Windows reaching before the first day ("All time") have nothing to compare with
+    assert (change is None) == (previous == 0)
+
+
+@pytest.mark.parametrize('start, end', [
+    ('2020-01-01', '2030-01-01'),
+    ('2024-06-10', '2024-06-10'),
+    ('2024-08-01', '2024-09-01')
+], ids=['beyond-both-ends', 'empty', 'after-the-data'])
+def test_window_edges(sales, rollups, start, end):
+    expected = revenue_between(sales, pd.Timestamp(start), pd.Timestamp(end))
+    assert window_total(rollups, 'revenue', np.datetime64(start, 'D'), np.datetime64(end, 'D')) == expected
+
+
+def test_rolling_and_cumulative_series(sales, rollups):
+    daily = sales.groupby(sales['date'].dt.normalize())['revenue'].sum()
+    daily = daily.reindex(pd.date_range(daily.index.min() - pd.Timedelta(days=30), NOW.date()), fill_value=0)
+    expected = daily.rolling(7).sum().iloc[-20:]
+    result = rolling_series(rollups, 'revenue', 7, NOW, 20)
+    assert result.index.tolist() == expected.index.tolist()
+    np.testing.assert_allclose(result, expected)
+    np.testing.assert_allclose(cumulative_series(rollups, 'revenue', NOW, 10), daily.cumsum().iloc[-10:])
+
+
+def test_batches_fold_into_the_same_rollup(sales):
+    whole = add_daily(empty_rollup(), 'revenue', sales['date'], sales['revenue'])
+    rollup = empty_rollup()
+    # Later days first, so the covered range also grows backwards
+    for part in [sales.iloc[len(sales) // 2:], sales.iloc[:100], sales.iloc[100:len(sales) // 2]]:
+        rollup = add_daily(rollup, 'revenue', part['date'], part['revenue'])
+    assert rollup['start'] == whole['start']
+    np.testing.assert_allclose(rollup['prefix']['revenue'], whole['prefix']['revenue'])
+
+
+def test_missing_dates_and_series():
+    rollup = add_daily(empty_rollup(), 'tickets_closed', pd.Series([pd.NaT, pd.Timestamp('2024-06-01')]))
+    assert window_total(rollup, 'tickets_closed', np.datetime64('2024-01-01'), np.datetime64('2025-01-01')) == 1
+    assert window_total(rollup, 'revenue', np.datetime64('2024-01-01'), np.datetime64('2025-01-01')) == 0
+    assert period_over_period(rollup, 'revenue', NOW, 7) == (0, 0, None)
+    assert (cumulative_series(rollup, 'revenue', NOW, 5) == 0).all()
+
+
+def test_frame_round_trip(rollups):
+    restored = rollup_from_frame(rollup_to_frame(rollups))
+    assert restored['start'] == rollups['start']
+    for name, prefix in rollups['prefix'].items():
+        np.testing.assert_allclose(restored['prefix'][name], prefix)
+    assert rollup_from_frame(rollup_to_frame(empty_rollup())) == empty_rollup()
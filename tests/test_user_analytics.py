@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from data_generators import generate_user_data
+from user_analytics import active_user_summary, active_users, build_user_analytics, monthly_growth
+
+NOW = datetime(2024, 6, 30, 12)
+
+
+@pytest.fixture
+def users():
+    return generate_user_data(2000, seed=31, now=NOW)
+
+
+def test_growth_matches_join_months(users):
+    growth = monthly_growth(build_user_analytics(users))
+    expected = users['join_date'].dt.strftime('%Y-%m').value_counts().sort_index()
+    assert growth['join_month'].tolist() == expected.index.tolist()
+    assert growth['count'].tolist() == expected.tolist()
+    assert growth['cumulative'].iloc[-1] == len(users)
+
+
+@pytest.mark.parametrize('days', [0, 1, 7, 30, 400])
+def test_active_users_match_comparison(users, days):
+    expected = (users['last_login'] >= pd.Timestamp(NOW) - pd.Timedelta(days=days)).sum()
+    assert active_users(build_user_analytics(users), days, NOW) == expected
+
+
+def test_no_users():
+    state = build_user_analytics(generate_user_data(0, seed=32, now=NOW))
+    assert monthly_growth(state).empty
+    assert active_user_summary(state, NOW) == {'dau': 0, 'wau': 0, 'mau': 0}
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from view_cache import ViewCache, compact_rows, view_key
+
+
+def rows(n):
+    return np.arange(n, dtype=np.int64)
+
+
+def test_predicate_order_and_duplicates_share_a_key():
+    assert view_key('sales', {'product': ['B', 'A', 'A'], 'region': 'North'}) == \
+        view_key('sales', {'region': 'North', 'product': ('A', 'B')})
+    assert view_key('sales', {'product': ['A']}) != view_key('tickets', {'product': ['A']})
+    assert view_key('sales', {'product': []}) != view_key('sales', {'product': ['A']})
+
+
+def test_hit_after_miss():
+    cache = ViewCache()
+    calls = []
+    for _ in range(3):
+        cache.get_or_compute('sales', {'product': ['A']}, lambda: calls.append(1) or rows(10))
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 1
+
+
+def test_evicts_least_recently_used_within_budget():
+    cache = ViewCache(max_bytes=3 * 800)
+    for name in ['a', 'b', 'c']:
+        cache.get_or_compute('sales', {'view': name}, lambda: rows(100))
+    # Touch "a", so "b" is the least recently used
+    cache.get_or_compute('sales', {'view': 'a'}, lambda: pytest.fail("recomputed a cached view"))
+    cache.get_or_compute('sales', {'view': 'd'}, lambda: rows(100))
+
+    keys = [key[1][0][1] for key in cache.entries]
+    assert keys == ['c', 'a', 'd']
+    assert cache.bytes == 3 * 800 and cache.evictions == 1
+
+
+def test_evicted_view_held_by_a_reader_stays_intact():
+    cache = ViewCache(max_bytes=1000)
+    held = cache.get_or_compute('sales', {'view': 'a'}, lambda: rows(100))
+    cache.get_or_compute('sales', {'view': 'b'}, lambda: rows(100))
+    assert cache.stats()['entries'] == 1
+    np.testing.assert_array_equal(held, rows(100))
+
+
+def test_view_larger_than_budget_is_kept_alone():
+    cache = ViewCache(max_bytes=100)
+    cache.get_or_compute('sales', {'view': 'big'}, lambda: rows(1000))
+    assert cache.stats()['entries'] == 1
+    cache.get_or_compute('sales', {'view': 'small'}, lambda: rows(1))
+    assert cache.stats()['entries'] == 1 and cache.bytes == 8
+
+
+def test_resize_and_invalidate():
+    cache = ViewCache()
+    for version in [1, 2]:
+        for name in ['a', 'b']:
+            cache.get_or_compute(('tickets', version), {'view': name}, lambda: rows(50))
+    cache.invalidate(('tickets', 1))
+    assert {key[0] for key in cache.entries} == {('tickets', 2)}
+    assert cache.bytes == 2 * 400
+
+    cache.resize(400)
+    assert cache.stats()['entries'] == 1 and cache.bytes == 400
+    cache.invalidate(('tickets', 3))
+    assert cache.stats()['entries'] == 1
+
+
+def test_compact_rows_dtype():
+    assert compact_rows([1, 2], 10).dtype == np.int32
+    assert compact_rows([1, 2], 2 ** 31).dtype == np.int64
+    assert compact_rows([], 0).shape == (0,)
@@ -0,0 +1,293 @@
+import glob
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from bitmap_index import update_bitmap_index
+from shared_data import hold_in_use, remove_unused
+from timeseries_rollups import add_daily
+
+# Write-back store for ticket status changes.
+# The ticket datasets themselves stay immutable (generated, partitioned or
+# shared); changes are kept as an overlay in SQLite (WAL mode) and applied on
+# top of them. Each dataset gets its own database (ticket_db_path), so the
+# changes made to one dataset are never applied to a regenerated one that
+# reuses the ticket ids. A TicketWriter holds its database in use (a shared
+# lock on <db>.lock) while its process lives; prune_ticket_dbs() removes the
+# databases of earlier datasets - a generated dataset gets a new key on every
+# restart - that no process has open any more. All writes of a process go through one TicketWriter
+# per database: a thread that drains a queue and commits whatever has
+# accumulated in a single transaction (group commit). The activity entries
+# of a batch are appended to the event log (event_log.py) once it is committed.
+#
+# Every change row carries a sequence number, assigned inside the writing
+# transaction, so seq order is commit order across all processes sharing the
+# database. A writer publishes the changes after the last seq it has seen to
+# every TicketStore attached to it - after each of its own commits, and
+# whenever a store's snapshot is read and PRAGMA data_version shows that
+# another process committed - so all server processes converge on the same
+# ticket states.
+#
+# A TicketStore holds a snapshot of one ticket frame with its bitmap index and
+# the dashboard rollups. Publishing is copy-on-write: the status and
+# resolved_date columns, the bitmaps of the statuses involved and the
+# tickets_closed rollup are replaced, everything else is shared, and the new
+# snapshot is swapped in with a bumped version. Readers holding the previous
+# snapshot keep a consistent view for the rest of their rerun.
+
+DEFAULT_DB_PATH = os.environ.get('DASHBOARD_TICKET_DB',
+                                 os.path.join(tempfile.gettempdir(), 'admin-dashboard-tickets.db'))
+DONE_STATUSES = ['Resolved', 'Closed']
+BATCH_SIZE = 256
+BATCH_WAIT = 0.005
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ticket_updates (
+    ticket_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    resolved_date TEXT,
+    updated_at TEXT NOT NULL,
+    seq INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ticket_updates_seq ON ticket_updates (seq);
+"""
+
+
+# Function to get the database of one dataset (key from shared_data.dataset_key)
+def ticket_db_path(dataset_key, base_path=DEFAULT_DB_PATH):
+    root, ext = os.path.splitext(base_path)
+    return f'{root}.{dataset_key}{ext}'
+
+
+# Function to remove the databases next to base_path (every dataset key) that
+# no TicketWriter holds open; returns the paths removed
+def prune_ticket_dbs(base_path=DEFAULT_DB_PATH):
+    root, ext = os.path.splitext(base_path)
+    removed = []
+    for db_path in sorted(glob.glob(f'{glob.escape(root)}.*{ext}')):
+        if remove_unused(f'{db_path}.lock', [db_path, f'{db_path}-wal', f'{db_path}-shm']):
+            removed.append(db_path)
+    return removed
+
+
+# Function to open a connection to the ticket database
+def connect(db_path, check_same_thread=True):
+    conn = sqlite3.connect(db_path, timeout=30, check_same_thread=check_same_thread)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+# Function to turn update rows into a frame (resolved_date parsed, NULL -> NaT)
+def updates_frame(rows):
+    updates = pd.DataFrame(rows, columns=['ticket_id', 'status', 'resolved_date'])
+    updates['resolved_date'] = pd.to_datetime(updates['resolved_date'])
+    return updates
+
+
+# Function to read every persisted status change of a ticket database
+def read_updates(db_path):
+    with connect(db_path) as conn:
+        conn.executescript(SCHEMA)
+        return updates_frame(conn.execute("SELECT ticket_id, status, resolved_date FROM ticket_updates").fetchall())
+
+
+# Function to apply status changes to a ticket frame (returns a new frame)
+def overlay_updates(frame, updates):
+    rows = pd.Index(frame['ticket_id']).get_indexer(updates['ticket_id'])
+    updates = updates[rows >= 0]
+    rows = rows[rows >= 0]
+    frame = frame.copy()
+    frame.iloc[rows, frame.columns.get_loc('status')] = updates['status'].to_numpy()
+    frame.iloc[rows, frame.columns.get_loc('resolved_date')] = updates['resolved_date'].to_numpy()
+    return frame
+
+
+class TicketWriter:
+    def __init__(self, db_path=DEFAULT_DB_PATH, event_log=None, batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT):
+        self.db_path = db_path
+        self.event_log = event_log
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.queue = queue.Queue()
+        # Held while reading and publishing changes, and while a store
+        # attaches, so a store never misses or double-applies a change
+        self.lock = threading.Lock()
+        self.listeners = []
+        self.commits = 0
+        self.writes = 0
+        self.polls = 0
+        self.in_use = hold_in_use(f'{db_path}.lock')
+
+        # Reading connection: changes are published up to self.seq
+        self.reader = connect(db_path, check_same_thread=False)
+        self.reader.executescript(SCHEMA)
+        self.data_version = self.reader.execute('PRAGMA data_version').fetchone()[0]
+        self.seq = self.reader.execute("SELECT COALESCE(MAX(seq), 0) FROM ticket_updates").fetchone()[0]
+        self.thread = threading.Thread(target=self.run, name='ticket-writer', daemon=True)
+        self.thread.start()
+
+    # Queue a status change; the returned Future resolves once it is committed and published
+    def submit(self, ticket_id, status, resolved_date, user, action):
+        future = Future()
+        resolved = None if pd.isna(resolved_date) else pd.Timestamp(resolved_date).isoformat()
+        self.queue.put((future, ticket_id, status, resolved, user, action, datetime.now().isoformat()))
+        return future
+
+    # Writer thread: one transaction per batch of queued changes
+    def run(self):
+        conn = connect(self.db_path)
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+
+            try:
+                with conn:
+                    # The write lock is held from the first statement on, so
+                    # MAX(seq) + 1 is unique and increases in commit order
+                    conn.executemany(
+                        "INSERT INTO ticket_updates (ticket_id, status, resolved_date, updated_at, seq) "
+                        "VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM ticket_updates)) "
+                        "ON CONFLICT (ticket_id) DO UPDATE SET "
+                        "status = excluded.status, resolved_date = excluded.resolved_date, "
+                        "updated_at = excluded.updated_at, seq = excluded.seq",
+                        [(ticket_id, status, resolved, now)
+                         for _, ticket_id, status, resolved, _, _, now in batch])
+                self.commits += 1
+                self.writes += len(batch)
+                self.poll()
+                if self.event_log is not None:
+                    self.event_log.append([
+                        {'time': now, 'kind': 'ticket', 'entity': ticket_id, 'user': user, 'action': action}
+                        for _, ticket_id, _, _, user, action, now in batch])
+            except Exception as e:
+                for future, *_ in batch:
+                    future.set_exception(e)
+                continue
+            for future, *_ in batch:
+                future.set_result(None)
+
+    # Publish the changes committed since the last published one, by this or
+    # any other process; returns the number of changes (cheap when nothing changed)
+    def poll(self):
+        with self.lock:
+            data_version = self.reader.execute('PRAGMA data_version').fetchone()[0]
+            if data_version == self.data_version:
+                return 0
+            self.data_version = data_version
+            self.polls += 1
+            rows = self.reader.execute(
+                "SELECT ticket_id, status, resolved_date, seq FROM ticket_updates WHERE seq > ? ORDER BY seq",
+                (self.seq,)).fetchall()
+            if rows:
+                self.seq = rows[-1][3]
+                self.publish(updates_frame([row[:3] for row in rows]))
+            return len(rows)
+
+    # Send committed updates to the attached stores (dropping stores that are gone)
+    def publish(self, updates):
+        alive = []
+        for listener in self.listeners:
+            apply = listener()
+            if apply is not None:
+                apply(updates)
+                alive.append(listener)
+        self.listeners = alive
+
+    # Attach a store: it receives every committed update, starting with the ones published so far
+    def attach(self, apply):
+        with self.lock:
+            updates = updates_frame(self.reader.execute(
+                "SELECT ticket_id, status, resolved_date FROM ticket_updates WHERE seq <= ? ORDER BY seq",
+                (self.seq,)).fetchall())
+            if len(updates):
+                apply(updates)
+            self.listeners.append(weakref.WeakMethod(apply))
+
+    def stats(self):
+        return {'commits': self.commits, 'writes': self.writes, 'polls': self.polls, 'queued': self.queue.qsize()}
+
+
+class TicketStore:
+    def __init__(self, writer, frame, index, rollups=None):
+        self.writer = writer
+        self.positions = pd.Index(frame['ticket_id'])
+        self.lock = threading.Lock()
+        self.on_publish = []
+        self.snapshot = {'version': 0, 'frame': frame, 'index': index, 'rollups': rollups}
+        writer.attach(self.apply)
+
+    # Apply committed updates to a new snapshot (copy-on-write)
+    def apply(self, updates):
+        rows = self.positions.get_indexer(updates['ticket_id'])
+        updates = updates[rows >= 0].assign(row=rows[rows >= 0]).drop_duplicates('row', keep='last')
+        if updates.empty:
+            return
+        rows = updates['row'].to_numpy()
+
+        with self.lock:
+            old = self.snapshot
+            frame = old['frame'].copy(deep=False)
+            old_status = frame['status'].to_numpy(dtype=object)[rows]
+            old_resolved = frame['resolved_date'].to_numpy()[rows]
+
+            status = frame['status'].to_numpy(dtype=object).copy()
+            status[rows] = updates['status'].to_numpy(dtype=object)
+            dtype = old['frame']['status'].dtype
+            if isinstance(dtype, pd.CategoricalDtype):
+                # A status the frame has not had yet becomes a new category
+                new = pd.Index(updates['status'].unique()).difference(dtype.categories)
+                dtype = pd.CategoricalDtype(dtype.categories.append(new), ordered=dtype.ordered)
+            frame['status'] = pd.Series(status, index=frame.index).astype(dtype)
+            resolved = frame['resolved_date'].to_numpy().copy()
+            resolved[rows] = updates['resolved_date'].to_numpy().astype(resolved.dtype)
+            frame['resolved_date'] = resolved
+
+            index = old['index']
+            if 'status' in index['columns']:
+                index = update_bitmap_index(index, 'status', rows, old_status, updates['status'].to_numpy())
+
+            # Move closed tickets between days of the tickets_closed rollup
+            rollups = old['rollups']
+            if rollups is not None:
+                rollups = add_daily(rollups, 'tickets_closed', old_resolved, -np.ones(len(rows)))
+                rollups = add_daily(rollups, 'tickets_closed', updates['resolved_date'], np.ones(len(rows)))
+
+            self.snapshot = {'version': old['version'] + 1, 'frame': frame, 'index': index, 'rollups': rollups}
+            for callback in self.on_publish:
+                callback(old['version'], self.snapshot['version'])
+
+    # Function to get the current snapshot, with the changes committed by
+    # other processes applied first
+    def current(self):
+        self.writer.poll()
+        return self.snapshot
+
+    # Change the status of a ticket; returns the writer's Future
+    def update_status(self, ticket_id, status, user='Admin'):
+        frame = self.snapshot['frame']
+        row = self.positions.get_loc(ticket_id)
+        old_status = frame['status'].iloc[row]
+        old_resolved = frame['resolved_date'].iloc[row]
+
+        # Closing keeps an existing resolution date; reopening clears it
+        if status in DONE_STATUSES:
+            resolved = old_resolved if pd.notna(old_resolved) else pd.Timestamp.now()
+        else:
+            resolved = pd.NaT
+        return self.writer.submit(ticket_id, status, resolved, user,
+                                  f"Status changed from {old_status} to {status}")
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+# Daily rollups for the Dashboard KPI cards.
+# Each series (revenue, new users, tickets opened / closed) is kept as one
+# total per calendar day plus its prefix sum, so the total of any window of
+# days - and of the window before it - is two array lookups. Rolling 7/30/90
+# day series for the trend sparklines are a single vectorized difference of
+# the prefix array. Batches of new rows can be folded in without rescanning
+# the tables.
+
+
+# Function to create an empty rollup state
+def empty_rollup():
+    return {'start': None, 'daily': {}, 'prefix': {}}
+
+
+# Function to convert timestamps to day numbers (NaT are dropped with their weights)
+def to_days(dates, weights=None):
+    days = np.asarray(pd.to_datetime(dates)).astype('datetime64[D]')
+    valid = ~np.isnat(days)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)[valid]
+    return days[valid], weights
+
+
+# Function to fold a batch of dated values into a rollup series.
+# Without weights the series counts rows per day.
+def add_daily(rollup, name, dates, weights=None):
+    days, weights = to_days(dates, weights)
+    if len(days) == 0 and name in rollup['daily']:
+        return rollup
+
+    # Grow the covered day range so it holds both the old series and the batch
+    old_start = rollup['start']
+    old_days = len(next(iter(rollup['daily'].values()))) if rollup['daily'] else 0
+    bounds = [days.min(), days.max()] if len(days) else []
+    if old_start is not None:
+        bounds += [old_start, old_start + max(old_days - 1, 0)]
+    if not bounds:
+        bounds = [np.datetime64('today', 'D')] * 2
+    start = min(bounds)
+    n_days = int((max(bounds) - start).astype(np.int64)) + 1
+
+    daily = {}
+    for series_name, values in rollup['daily'].items():
+        offset = int((old_start - start).astype(np.int64))
+        grown = np.zeros(n_days, dtype=values.dtype)
+        grown[offset:offset + len(values)] = values
+        daily[series_name] = grown
+
+    counts = np.bincount((days - start).astype(np.int64), weights=weights, minlength=n_days)
+    if name in daily:
+        counts = daily[name] + counts
+    daily[name] = counts
+
+    return {
+        'start': start,
+        'daily': daily,
+        'prefix': {series_name: np.concatenate([[0], np.cumsum(values)]) for series_name, values in daily.items()}
+    }
+
+
+# Function to build the rollups the Dashboard reads. sales_df may be None
+# (out-of-core mode); the columns needed are date/revenue, join_date and
+# created_date/resolved_date.
+def build_dashboard_rollups(sales_df, user_df, ticket_df):
+    rollup = empty_rollup()
+    if sales_df is not None:
+        rollup = add_daily(rollup, 'revenue', sales_df['date'], sales_df['revenue'])
+    rollup = add_daily(rollup, 'new_users', user_df['join_date'])
+    rollup = add_daily(rollup, 'tickets_opened', ticket_df['created_date'])
+    rollup = add_daily(rollup, 'tickets_closed', ticket_df['resolved_date'])
+    return rollup
+
+
+# Function to store a rollup as a frame: one row per day, one column per series
+def rollup_to_frame(rollup):
+    n_days = len(next(iter(rollup['daily'].values()))) if rollup['daily'] else 0
+    dates = rollup['start'] + np.arange(n_days) if rollup['start'] is not None else np.array([], 'datetime64[D]')
+    return pd.DataFrame({'date': dates.astype('datetime64[ns]'), **rollup['daily']})
+
+
+# Function to rebuild a rollup (with its prefix sums) from rollup_to_frame()
+def rollup_from_frame(df):
+    if len(df) == 0:
+        return empty_rollup()
+    daily = {name: np.asarray(df[name], dtype=np.float64) for name in df.columns if name != 'date'}
+    return {
+        'start': np.datetime64(pd.Timestamp(df['date'].iloc[0]).date(), 'D'),
+        'daily': daily,
+        'prefix': {name: np.concatenate([[0], np.cumsum(values)]) for name, values in daily.items()}
+    }
+
+
+# Function to turn dates into prefix-array positions (day boundaries, clipped)
+def day_positions(rollup, name, days):
+    offsets = (np.asarray(days, dtype='datetime64[D]') - rollup['start']).astype(np.int64)
+    return np.clip(offsets, 0, len(rollup['prefix'][name]) - 1)
+
+
+# Function to get the total of a series over the days [start, end)
+def window_total(rollup, name, start, end):
+    if name not in rollup['prefix']:
+        return 0
+    prefix = rollup['prefix'][name]
+    lo, hi = day_positions(rollup, name, [start, end])
+    return prefix[hi] - prefix[lo]
+
+
+# Function to compare the last `days` days up to `today` (inclusive) with the
+# `days` before them: (current, previous, percent change or None)
+def period_over_period(rollup, name, today, days):
+    end = np.datetime64(pd.Timestamp(today).date(), 'D') + 1
+    current = window_total(rollup, name, end - days, end)
+    previous = window_total(rollup, name, end - 2 * days, end - days)
+    change = (current - previous) / previous * 100 if previous else None
+    return current, previous, change
+
+
+# Function to get the running total of a series at the end of each of the
+# last `periods` days up to `today`
+def cumulative_series(rollup, name, today, periods=90):
+    ends = np.datetime64(pd.Timestamp(today).date(), 'D') - np.arange(periods - 1, -1, -1) + 1
+    if name not in rollup['prefix']:
+        return pd.Series(0, index=pd.to_datetime(ends - 1))
+    return pd.Series(rollup['prefix'][name][day_positions(rollup, name, ends)], index=pd.to_datetime(ends - 1))
+
+
+# Function to get a rolling `window`-day total for each of the last `periods` days
+def rolling_series(rollup, name, window, today, periods=90):
+    totals = cumulative_series(rollup, name, today, periods + window)
+    return (totals - totals.shift(window)).iloc[window:]
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+# Precomputed user analytics for the Dashboard and User Management pages.
+# The state keeps join-cohort counts per month and the sorted last-login
+# timestamps, built once per dataset version, so the growth chart reads an
+# O(months) series and active-user counts are binary searches instead of full
+# comparisons over user_df.
+
+
+# Function to build the analytics state for a user table
+def build_user_analytics(users):
+    return {
+        'n_users': len(users),
+        'cohorts': users['join_date'].dt.strftime('%Y-%m').value_counts().astype('int64').sort_index(),
+        'last_logins': np.sort(users['last_login'].to_numpy().astype('datetime64[us]'))
+    }
+
+
+# Function to get monthly new users and cumulative growth
+def monthly_growth(state):
+    monthly_users = state['cohorts'].rename_axis('join_month').reset_index(name='count')
+    monthly_users['cumulative'] = monthly_users['count'].cumsum()
+    return monthly_users
+
+
+# Function to count users whose last login falls in the last `days` days
+def active_users(state, days, now):
+    cutoff = np.datetime64(pd.Timestamp(now) - pd.Timedelta(days=days), 'us')
+    return int(state['n_users'] - np.searchsorted(state['last_logins'], cutoff, side='left'))
+
+
+# Function to get DAU / WAU / MAU as of `now`
+def active_user_summary(state, now):
+    return {
+        'dau': active_users(state, 1, now),
+        'wau': active_users(state, 7, now),
+        'mau': active_users(state, 30, now)
+    }
+
@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Memoized filtered views shared by all sessions of a server process.
+# A view is identified by (dataset key, canonical filter predicate) and stored
+# as a small numpy array - row positions or a packed bitmap - never as a
+# copied frame. Entries live in an LRU bounded by total bytes, and hit/miss
+# counters are kept so the budget can be tuned.
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+# Function to canonicalize one predicate value: multiselect order and
+# duplicates do not change an isin filter, so value lists become sorted tuples
+def canonical_value(value):
+    if isinstance(value, (list, tuple, set, frozenset, np.ndarray)):
+        return tuple(sorted(set(value), key=repr))
+    return value
+
+
+# Function to build the cache key of a view
+def view_key(dataset_key, predicate):
+    return dataset_key, tuple(sorted((name, canonical_value(value)) for name, value in predicate.items()))
+
+
+# Function to store row positions compactly
+def compact_rows(rows, n_rows):
+    return np.asarray(rows, dtype=np.int32 if n_rows < 2 ** 31 else np.int64)
+
+
+class ViewCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    # Return the cached view, computing (outside the lock) and storing it on a miss
+    def get_or_compute(self, dataset_key, predicate, compute):
+        key = view_key(dataset_key, predicate)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+
+        value = compute()
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = value
+                self.bytes += value.nbytes
+                self.evict()
+        return value
+
+    # Drop least recently used entries until the byte budget is met
+    def evict(self):
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            _, value = self.entries.popitem(last=False)
+            self.bytes -= value.nbytes
+            self.evictions += 1
+
+    # Drop every view of one dataset (e.g. after it was modified)
+    def invalidate(self, dataset_key):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == dataset_key]:
+                self.bytes -= self.entries.pop(key).nbytes
+
+    def resize(self, max_bytes):
+        with self.lock:
+            self.max_bytes = max_bytes
+            self.evict()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }